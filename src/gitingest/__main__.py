@@ -9,8 +9,8 @@ from typing import TypedDict
 import click
 from typing_extensions import Unpack
 
-from gitingest.config import MAX_FILE_SIZE, OUTPUT_FILE_NAME
-from gitingest.entrypoint import ingest_async
+from gitingest.config import DEFAULT_READ_WORKERS, MAX_FILE_SIZE, OUTPUT_FILE_NAME
+from gitingest.entrypoint import stream_ingest_async
 
 # Import logging configuration first to intercept all logging
 from gitingest.utils.logging_config import get_logger
@@ -29,6 +29,7 @@ class _CLIArgs(TypedDict):
     include_submodules: bool
     token: str | None
     output: str | None
+    read_workers: int
 
 
 @click.command()
@@ -76,17 +77,25 @@ class _CLIArgs(TypedDict):
     default=None,
     help="Output file path (default: digest.txt in current directory). Use '-' for stdout.",
 )
+@click.option(
+    "--read-workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=DEFAULT_READ_WORKERS,
+    show_default=True,
+    help="Number of threads used to read file contents concurrently.",
+)
 def main(**cli_kwargs: Unpack[_CLIArgs]) -> None:
     """Run the CLI entry point to analyze a repo / directory and dump its contents.
 
     Parameters
     ----------
     **cli_kwargs : Unpack[_CLIArgs]
-        A dictionary of keyword arguments forwarded to ``ingest_async``.
+        A dictionary of keyword arguments forwarded to ``stream_ingest_async``.
 
     Notes
     -----
-    See ``ingest_async`` for a detailed description of each argument.
+    See ``stream_ingest_async`` for a detailed description of each argument.
 
     Examples
     --------
@@ -125,6 +134,7 @@ async def _async_main(
     include_submodules: bool = False,
     token: str | None = None,
     output: str | None = None,
+    read_workers: int = DEFAULT_READ_WORKERS,
 ) -> None:
     """Analyze a directory or repository and create a text dump of its contents.
 
@@ -154,6 +164,8 @@ async def _async_main(
     output : str | None
         The path where the output file will be written (default: ``digest.txt`` in current directory).
         Use ``"-"`` to write to ``stdout``.
+    read_workers : int
+        Number of threads used to read file contents concurrently (default: 8).
 
     Raises
     ------
@@ -173,7 +185,7 @@ async def _async_main(
         else:
             click.echo(f"Analyzing source, output will be written to '{output_target}'...", err=True)
 
-        summary, _, _ = await ingest_async(
+        summary, _ = await stream_ingest_async(
             source,
             max_file_size=max_size,
             include_patterns=include_patterns,
@@ -183,6 +195,7 @@ async def _async_main(
             include_submodules=include_submodules,
             token=token,
             output=output_target,
+            read_workers=read_workers,
         )
     except Exception as exc:
         # Convert any exception into Click.Abort so that exit status is non-zero
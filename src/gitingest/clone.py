@@ -2,33 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import re
+import shutil
+import tarfile
+import threading
+import time
+from contextlib import contextmanager, suppress
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator, NoReturn
+
+import httpx
 
 from gitingest.config import DEFAULT_TIMEOUT
+from gitingest.schemas.cloning import CloneBackend
+from gitingest.utils.archive_utils import download_archive, get_archive_url
+from gitingest.utils.git_objects import list_tree
 from gitingest.utils.git_utils import (
     check_repo_exists,
     checkout_partial_clone,
-    create_git_auth_header,
     create_git_command,
     ensure_git_installed,
-    is_github_host,
     resolve_commit,
     run_command,
 )
 from gitingest.utils.logging_config import get_logger
 from gitingest.utils.os_utils import ensure_directory_exists_or_create
+from gitingest.utils.progress import report_progress
 from gitingest.utils.timeout_wrapper import async_timeout
 
 if TYPE_CHECKING:
     from gitingest.schemas import CloneConfig
+    from gitingest.utils.mirror_cache import MirrorCache
 
 # Initialize logger for this module
 logger = get_logger(__name__)
 
 
 @async_timeout(DEFAULT_TIMEOUT)
-async def clone_repo(config: CloneConfig, *, token: str | None = None) -> None:
+async def clone_repo(
+    config: CloneConfig,
+    *,
+    token: str | None = None,
+    mirror_cache: MirrorCache | None = None,
+) -> None:
     """Clone a repository to a local path based on the provided configuration.
 
     This function handles the process of cloning a Git repository to the local file system.
@@ -41,6 +59,9 @@ async def clone_repo(config: CloneConfig, *, token: str | None = None) -> None:
         The configuration for cloning the repository.
     token : str | None
         GitHub personal access token (PAT) for accessing private repositories.
+    mirror_cache : MirrorCache | None
+        Local mirrors to clone public repositories from, fetching only the commits they are missing. If ``None``
+        (default), the repository is cloned from the remote.
 
     Raises
     ------
@@ -67,57 +88,285 @@ async def clone_repo(config: CloneConfig, *, token: str | None = None) -> None:
         },
     )
 
+    timer = _StepTimer()
+
     logger.debug("Ensuring git is installed")
-    await ensure_git_installed()
+    with timer.step("ensure_git_installed"):
+        await ensure_git_installed()
 
     logger.debug("Creating local directory", extra={"parent_path": str(Path(local_path).parent)})
     await ensure_directory_exists_or_create(Path(local_path).parent)
 
-    logger.debug("Checking if repository exists", extra={"url": url})
-    if not await check_repo_exists(url, token=token):
-        logger.error("Repository not found", extra={"url": url})
-        msg = "Repository not found. Make sure it is public or that you have provided a valid token."
-        raise ValueError(msg)
-
-    logger.debug("Resolving commit reference")
-    commit = await resolve_commit(config, token=token)
+    logger.debug("Resolving commit reference", extra={"url": url})
+    with timer.step("resolve_commit"):
+        commit = await _resolve_existing_commit(config, token=token)
     logger.debug("Resolved commit", extra={"commit": commit})
 
-    clone_cmd = ["git"]
-    if token and is_github_host(url):
-        clone_cmd += ["-c", create_git_auth_header(token, url=url)]
+    # An archive holds no git objects to read the files from
+    if config.backend == CloneBackend.ARCHIVE and config.checkout:
+        with timer.step("archive"):
+            downloaded = await _download_archive(config, commit, token=token)
+        if downloaded:
+            logger.info(
+                "Archive download completed successfully",
+                extra={"local_path": local_path, "durations_ms": timer.durations},
+            )
+            return
 
-    clone_cmd += ["clone", "--single-branch", "--no-checkout", "--depth=1"]
-    if partial_clone:
-        clone_cmd += ["--filter=blob:none", "--sparse"]
+    # Private repositories are never mirrored, so that their objects cannot be served to other requests
+    if token or (mirror_cache is not None and not mirror_cache.can_clone(url, commit)):
+        mirror_cache = None
 
-    clone_cmd += [url, local_path]
-
-    # Clone the repository
-    logger.info("Executing git clone command", extra={"command": " ".join([*clone_cmd[:-1], "<url>", local_path])})
-    await run_command(*clone_cmd)
-    logger.info("Git clone completed successfully")
+    git = create_git_command(["git"], local_path, url, token)
 
-    # Checkout the subpath if it is a partial clone
-    if partial_clone:
-        logger.info("Setting up partial clone for subpath", extra={"subpath": config.subpath})
-        await checkout_partial_clone(config, token=token)
-        logger.debug("Partial clone setup completed")
+    if mirror_cache is not None:
+        logger.info("Cloning from repository mirror", extra={"url": url, "local_path": local_path})
+        with timer.step("mirror"):
+            await mirror_cache.clone(url, commit, local_path)
+    else:
+        await _fetch_commit(config, commit, git=git, timer=timer)
 
-    git = create_git_command(["git"], local_path, url, token)
+    if not config.checkout:
+        # Point HEAD at the commit so that its files can be read from the object database
+        with timer.step("update_head"):
+            await run_command(*git, "update-ref", "--no-deref", "HEAD", commit)
+        logger.info(
+            "Git fetch completed successfully, without checkout",
+            extra={"local_path": local_path, "durations_ms": timer.durations},
+        )
+        return
 
-    # Ensure the commit is locally available
-    logger.debug("Fetching specific commit", extra={"commit": commit})
-    await run_command(*git, "fetch", "--depth=1", "origin", commit)
+    # Checkout the subpath if it is a partial clone, without the large files if they were left out of the clone
+    if config.blob_size_limit is not None:
+        logger.info("Leaving large files out of the checkout", extra={"blob_size_limit": config.blob_size_limit})
+        with timer.step("sparse_checkout"):
+            await _sparse_checkout_small_blobs(config, commit, git=git)
+    elif partial_clone:
+        await _sparse_checkout_subpath(config, token=token, timer=timer)
 
     # Write the work-tree at that commit
     logger.info("Checking out commit", extra={"commit": commit})
-    await run_command(*git, "checkout", commit)
+    with timer.step("checkout"):
+        await run_command(*git, "checkout", commit)
 
     # Update submodules
     if config.include_submodules:
         logger.info("Updating submodules")
-        await run_command(*git, "submodule", "update", "--init", "--recursive", "--depth=1")
+        with timer.step("submodules"):
+            await run_command(*git, "submodule", "update", "--init", "--recursive", "--depth=1")
         logger.debug("Submodules updated successfully")
 
-    logger.info("Git clone operation completed successfully", extra={"local_path": local_path})
+    logger.info(
+        "Git clone operation completed successfully",
+        extra={"local_path": local_path, "durations_ms": timer.durations},
+    )
+
+
+async def _fetch_commit(config: CloneConfig, commit: str, *, git: list[str], timer: _StepTimer) -> None:
+    """Create an empty repository at ``config.local_path`` and fetch ``commit`` into it, without checking it out.
+
+    A clone would first download the tip of a branch, only to fetch the resolved commit afterwards. Fetching the
+    commit into an empty repository takes a single round trip and never transfers anything twice.
+
+    Parameters
+    ----------
+    config : CloneConfig
+        The configuration for cloning the repository.
+    commit : str
+        The commit SHA to fetch.
+    git : list[str]
+        The git command to run in the repository, with authentication if needed.
+    timer : _StepTimer
+        Records the duration of every step.
+
+    """
+    logger.info("Initializing repository", extra={"local_path": config.local_path})
+    with timer.step("init"):
+        await run_command("git", "init", "--quiet", config.local_path)
+        await run_command("git", "-C", config.local_path, "remote", "add", "origin", config.url)
+
+    # Without a checkout, blobs left out by the filter would be fetched one at a time when read
+    partial_clone = config.subpath != "/" and config.checkout
+    fetch_cmd = [*git, "fetch", "--depth=1"]
+    if config.blob_size_limit is not None:
+        # Leaves out the blobs of at least ``limit`` bytes; hosts without filter support send every blob instead
+        fetch_cmd += [f"--filter=blob:limit={config.blob_size_limit + 1}"]
+    elif partial_clone:
+        fetch_cmd += ["--filter=blob:none"]
+
+    logger.info(
+        "Fetching commit",
+        extra={"commit": commit, "partial_clone": partial_clone, "blob_size_limit": config.blob_size_limit},
+    )
+    with timer.step("fetch"):
+        await run_command(*fetch_cmd, "origin", commit)
+
+
+async def _sparse_checkout_subpath(config: CloneConfig, *, token: str | None, timer: _StepTimer) -> None:
+    """Restrict the checkout to ``config.subpath``."""
+    logger.info("Setting up partial clone for subpath", extra={"subpath": config.subpath})
+    with timer.step("sparse_checkout"):
+        await checkout_partial_clone(config, token=token)
+    logger.debug("Partial clone setup completed")
+
+
+async def _sparse_checkout_small_blobs(config: CloneConfig, commit: str, *, git: list[str]) -> None:
+    """Restrict the checkout to ``config.subpath`` and leave out the files larger than ``config.blob_size_limit``.
+
+    The sizes come from the tree of the commit, so the blobs left out of the clone are never fetched. Non-cone
+    sparse-checkout patterns are written, as cone mode cannot leave out single files.
+
+    Parameters
+    ----------
+    config : CloneConfig
+        The configuration for cloning the repository.
+    commit : str
+        The commit SHA to check out.
+    git : list[str]
+        The git command to run in the repository, with authentication if needed.
+
+    """
+    subpath = config.subpath.strip("/")
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, partial(list_tree, Path(config.local_path), commit, subpath))
+
+    limit = config.blob_size_limit or 0
+    large_files = [
+        entry.path for entry in entries if entry.object_type == "blob" and (entry.size is None or entry.size > limit)
+    ]
+    if not subpath and not large_files:
+        return
+
+    logger.debug("Leaving files out of the checkout", extra={"subpath": subpath, "large_files": len(large_files)})
+    # A directory pattern ends with a slash; a file URL (``config.blob``) names a single file
+    included = f"/{_escape_sparse_pattern(subpath)}{'' if config.blob else '/'}" if subpath else "/*"
+    patterns = [included, *(f"!/{_escape_sparse_pattern(path)}" for path in large_files)]
+
+    info_dir = Path(config.local_path) / ".git" / "info"
+    info_dir.mkdir(parents=True, exist_ok=True)
+    (info_dir / "sparse-checkout").write_text("\n".join(patterns) + "\n", encoding="utf-8")
+    await run_command(*git, "config", "core.sparseCheckout", "true")
+
+
+def _escape_sparse_pattern(path: str) -> str:
+    """Escape the characters of ``path`` that have a special meaning in a sparse-checkout (gitignore) pattern."""
+    escaped = re.sub(r"([\\*?\[!#])", r"\\\1", path)
+    return escaped[:-1] + "\\ " if escaped.endswith(" ") else escaped
+
+
+async def _download_archive(config: CloneConfig, commit: str, *, token: str | None) -> bool:
+    """Download ``commit`` as a tarball and extract it into ``config.local_path``, if the host allows it.
+
+    Parameters
+    ----------
+    config : CloneConfig
+        The configuration for cloning the repository.
+    commit : str
+        The commit SHA to download.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    bool
+        ``True`` if the repository was extracted, ``False`` if it has to be cloned with git instead.
+
+    """
+    archive = None if config.include_submodules else get_archive_url(config.url, commit, token=token)
+    if archive is None:
+        logger.info("Archive download not available, cloning with git", extra={"url": config.url})
+        return False
+
+    archive_url, headers = archive
+    local_path = Path(config.local_path)
+    logger.info("Downloading archive", extra={"archive_url": archive_url, "local_path": str(local_path)})
+
+    cancelled = threading.Event()
+    loop = asyncio.get_running_loop()
+    download = partial(
+        download_archive,
+        archive_url,
+        local_path,
+        headers=headers,
+        subpath=config.subpath,
+        cancelled=cancelled,
+    )
+    try:
+        await loop.run_in_executor(None, download)
+    except (httpx.HTTPError, tarfile.TarError) as exc:
+        logger.warning("Archive download failed, cloning with git", extra={"url": config.url, "error": str(exc)})
+        shutil.rmtree(local_path, ignore_errors=True)
+        return False
+    except BaseException:  # cancelled, e.g. because the clone timed out
+        cancelled.set()
+        raise
+    return True
+
+
+async def _resolve_existing_commit(config: CloneConfig, *, token: str | None) -> str:
+    """Check that the repository exists and resolve the commit to clone, both at once.
+
+    The existence check (an HTTP request) and the commit resolution (``git ls-remote``) are independent network round
+    trips, so they run concurrently.
+
+    Parameters
+    ----------
+    config : CloneConfig
+        The configuration for cloning the repository.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    str
+        The commit SHA.
+
+    Raises
+    ------
+    ValueError
+        If the repository is not found.
+
+    """
+    exists = asyncio.ensure_future(check_repo_exists(config.url, token=token))
+    try:
+        commit = await resolve_commit(config, token=token)
+    except Exception:
+        # A missing repository also makes the resolution fail; report it as such, unless the check failed too
+        repo_exists = True
+        with suppress(Exception):
+            repo_exists = await exists
+        if not repo_exists:
+            _raise_repository_not_found(config.url)
+        raise
+    except BaseException:  # cancelled, e.g. because the clone timed out
+        exists.cancel()
+        raise
+
+    if not await exists:
+        _raise_repository_not_found(config.url)
+    return commit
+
+
+def _raise_repository_not_found(url: str) -> NoReturn:
+    """Log and raise the error of a repository that does not exist or is not accessible."""
+    logger.error("Repository not found", extra={"url": url})
+    msg = "Repository not found. Make sure it is public or that you have provided a valid token."
+    raise ValueError(msg)
+
+
+class _StepTimer:
+    """Wall-clock duration of every step of a clone, reported in the logs."""
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        """Time the body of the ``with`` block as step ``name``, and report it as the progress of the clone."""
+        report_progress("clone", name, force=True)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = round((time.perf_counter() - start) * 1000, 1)
+            logger.debug("Clone step finished", extra={"step": name, "duration_ms": self.durations[name]})
@@ -1,5 +1,6 @@
 """Configuration file for the project."""
 
+import os
 import tempfile
 from pathlib import Path
 
@@ -8,7 +9,15 @@ MAX_DIRECTORY_DEPTH = 20  # Maximum depth of directory traversal
 MAX_FILES = 10_000  # Maximum number of files to process
 MAX_TOTAL_SIZE_BYTES = 500 * 1024 * 1024  # Maximum size of output file (500 MB)
 DEFAULT_TIMEOUT = 60  # seconds
+DEFAULT_READ_WORKERS = 8  # Number of threads used to read file contents concurrently
+DEFAULT_TOKEN_THREADS = min(4, os.cpu_count() or 1)  # Threads (or processes, for very large digests) counting tokens
+TOKEN_BATCH_SIZE = 4 * 1024 * 1024  # Characters of file content encoded per tokenization batch (4 MB)
+TOKEN_PROCESS_POOL_THRESHOLD = 64 * 1024 * 1024  # Digest size above which batches go to a process pool (64 MB)
 
 OUTPUT_FILE_NAME = "digest.txt"
 
 TMP_BASE_PATH = Path(tempfile.gettempdir()) / "gitingest"
+TOKEN_CACHE_PATH = TMP_BASE_PATH / "token_counts.sqlite3"  # Persistent cache of per-file token counts
+TOKEN_CACHE_MAX_ENTRIES = 1_000_000  # Maximum number of per-file token counts kept in the cache
+MIRROR_CACHE_PATH = TMP_BASE_PATH / "mirrors"  # Bare mirrors of remote repositories, reused across clones
+MIRROR_CACHE_MAX_BYTES = 10 * 1024 * 1024 * 1024  # Disk budget of the repository mirrors (10 GB)
@@ -9,12 +9,12 @@ import stat
 import sys
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING, AsyncGenerator, Callable
+from typing import TYPE_CHECKING, AsyncGenerator, Callable, Iterable
 from urllib.parse import urlparse
 
 from gitingest.clone import clone_repo
-from gitingest.config import MAX_FILE_SIZE
-from gitingest.ingestion import ingest_query
+from gitingest.config import DEFAULT_READ_WORKERS, MAX_FILE_SIZE
+from gitingest.ingestion import ingest_query, stream_ingest_query
 from gitingest.query_parser import parse_local_dir_path, parse_remote_repo
 from gitingest.utils.auth import resolve_token
 from gitingest.utils.compat_func import removesuffix
@@ -44,6 +44,7 @@ async def ingest_async(
     include_submodules: bool = False,
     token: str | None = None,
     output: str | None = None,
+    read_workers: int = DEFAULT_READ_WORKERS,
 ) -> tuple[str, str, str]:
     """Ingest a source and process its contents.
 
@@ -76,6 +77,8 @@ async def ingest_async(
         File path where the summary and content should be written.
         If ``"-"`` (dash), the results are written to ``stdout``.
         If ``None``, the results are not written to a file.
+    read_workers : int
+        Number of threads used to read file contents concurrently (default: 8). Use ``1`` to read files serially.
 
     Returns
     -------
@@ -86,45 +89,18 @@ async def ingest_async(
         - The content of the files in the repository or directory.
 
     """
-    logger.info("Starting ingestion process", extra={"source": source})
-
     token = resolve_token(token)
-
-    source = removesuffix(source.strip(), ".git")
-
-    # Determine the parsing method based on the source type
-    if urlparse(source).scheme in ("https", "http") or any(h in source for h in KNOWN_GIT_HOSTS):
-        # We either have a full URL or a domain-less slug
-        logger.info("Parsing remote repository", extra={"source": source})
-        query = await parse_remote_repo(source, token=token)
-        query.include_submodules = include_submodules
-        _override_branch_and_tag(query, branch=branch, tag=tag)
-
-    else:
-        # Local path scenario
-        logger.info("Processing local directory", extra={"source": source})
-        query = parse_local_dir_path(source)
-
-    query.max_file_size = max_file_size
-    query.ignore_patterns, query.include_patterns = process_patterns(
-        exclude_patterns=exclude_patterns,
+    query = await _parse_query(
+        source,
+        max_file_size=max_file_size,
         include_patterns=include_patterns,
-    )
-
-    if query.url:
-        _override_branch_and_tag(query, branch=branch, tag=tag)
-
-    query.include_submodules = include_submodules
-
-    logger.debug(
-        "Configuration completed",
-        extra={
-            "max_file_size": query.max_file_size,
-            "include_submodules": query.include_submodules,
-            "include_gitignored": include_gitignored,
-            "has_include_patterns": bool(query.include_patterns),
-            "has_exclude_patterns": bool(query.ignore_patterns),
-        },
+        exclude_patterns=exclude_patterns,
+        branch=branch,
+        tag=tag,
+        include_gitignored=include_gitignored,
+        include_submodules=include_submodules,
+        token=token,
+        read_workers=read_workers,
     )
 
     async with _clone_repo_if_remote(query, token=token):
@@ -148,6 +124,84 @@ async def ingest_async(
         return summary, tree, content
 
 
+async def stream_ingest_async(
+    source: str,
+    *,
+    output: str,
+    max_file_size: int = MAX_FILE_SIZE,
+    include_patterns: str | set[str] | None = None,
+    exclude_patterns: str | set[str] | None = None,
+    branch: str | None = None,
+    tag: str | None = None,
+    include_gitignored: bool = False,
+    include_submodules: bool = False,
+    token: str | None = None,
+    read_workers: int = DEFAULT_READ_WORKERS,
+) -> tuple[str, str]:
+    """Ingest a source and stream its digest to ``output`` without holding it in memory.
+
+    Unlike ``ingest_async``, the content of the files is not returned: the digest is written to ``output`` chunk by
+    chunk, on a worker thread, as it is produced.
+
+    Parameters
+    ----------
+    source : str
+        The source to analyze, which can be a URL (for a Git repository) or a local directory path.
+    output : str
+        File path where the digest should be written. If ``"-"`` (dash), the digest is written to ``stdout``.
+    max_file_size : int
+        Maximum allowed file size for file ingestion. Files larger than this size are ignored (default: 10 MB).
+    include_patterns : str | set[str] | None
+        Pattern or set of patterns specifying which files to include. If ``None``, all files are included.
+    exclude_patterns : str | set[str] | None
+        Pattern or set of patterns specifying which files to exclude. If ``None``, no files are excluded.
+    branch : str | None
+        The branch to clone and ingest (default: the default branch).
+    tag : str | None
+        The tag to clone and ingest. If ``None``, no tag is used.
+    include_gitignored : bool
+        If ``True``, include files ignored by ``.gitignore`` and ``.gitingestignore`` (default: ``False``).
+    include_submodules : bool
+        If ``True``, recursively include all Git submodules within the repository (default: ``False``).
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+        Can also be set via the ``GITHUB_TOKEN`` environment variable.
+    read_workers : int
+        Number of threads used to read file contents concurrently (default: 8). Use ``1`` to read files serially.
+
+    Returns
+    -------
+    tuple[str, str]
+        A tuple containing the summary and the tree-like string representation of the file structure.
+
+    """
+    token = resolve_token(token)
+    query = await _parse_query(
+        source,
+        max_file_size=max_file_size,
+        include_patterns=include_patterns,
+        exclude_patterns=exclude_patterns,
+        branch=branch,
+        tag=tag,
+        include_gitignored=include_gitignored,
+        include_submodules=include_submodules,
+        token=token,
+        read_workers=read_workers,
+    )
+
+    async with _clone_repo_if_remote(query, token=token):
+        if not include_gitignored:
+            logger.debug("Applying gitignore patterns")
+            _apply_gitignores(query)
+
+        logger.info("Streaming output", extra={"output_path": output})
+        loop = asyncio.get_running_loop()
+        summary, tree = await loop.run_in_executor(None, _stream_output, query, output)
+
+        logger.info("Ingestion completed successfully")
+        return summary, tree
+
+
 def ingest(
     source: str,
     *,
@@ -160,6 +214,7 @@ def ingest(
     include_submodules: bool = False,
     token: str | None = None,
     output: str | None = None,
+    read_workers: int = DEFAULT_READ_WORKERS,
 ) -> tuple[str, str, str]:
     """Provide a synchronous wrapper around ``ingest_async``.
 
@@ -192,6 +247,8 @@ def ingest(
         File path where the summary and content should be written.
         If ``"-"`` (dash), the results are written to ``stdout``.
         If ``None``, the results are not written to a file.
+    read_workers : int
+        Number of threads used to read file contents concurrently (default: 8). Use ``1`` to read files serially.
 
     Returns
     -------
@@ -218,10 +275,71 @@ def ingest(
             include_submodules=include_submodules,
             token=token,
             output=output,
+            read_workers=read_workers,
         ),
     )
 
 
+async def _parse_query(
+    source: str,
+    *,
+    max_file_size: int,
+    include_patterns: str | set[str] | None,
+    exclude_patterns: str | set[str] | None,
+    branch: str | None,
+    tag: str | None,
+    include_gitignored: bool,
+    include_submodules: bool,
+    token: str | None,
+    read_workers: int,
+) -> IngestionQuery:
+    """Parse ``source`` into a query configured with the options of ``ingest_async``, without cloning it.
+
+    ``token`` must already be resolved (see ``resolve_token``).
+    """
+    logger.info("Starting ingestion process", extra={"source": source})
+
+    source = removesuffix(source.strip(), ".git")
+
+    # Determine the parsing method based on the source type
+    if urlparse(source).scheme in ("https", "http") or any(h in source for h in KNOWN_GIT_HOSTS):
+        # We either have a full URL or a domain-less slug
+        logger.info("Parsing remote repository", extra={"source": source})
+        query = await parse_remote_repo(source, token=token)
+        query.include_submodules = include_submodules
+        _override_branch_and_tag(query, branch=branch, tag=tag)
+
+    else:
+        # Local path scenario
+        logger.info("Processing local directory", extra={"source": source})
+        query = parse_local_dir_path(source)
+
+    query.max_file_size = max_file_size
+    query.read_workers = read_workers
+    query.ignore_patterns, query.include_patterns = process_patterns(
+        exclude_patterns=exclude_patterns,
+        include_patterns=include_patterns,
+    )
+
+    if query.url:
+        _override_branch_and_tag(query, branch=branch, tag=tag)
+
+    query.include_submodules = include_submodules
+
+    logger.debug(
+        "Configuration completed",
+        extra={
+            "max_file_size": query.max_file_size,
+            "read_workers": query.read_workers,
+            "include_submodules": query.include_submodules,
+            "include_gitignored": include_gitignored,
+            "has_include_patterns": bool(query.include_patterns),
+            "has_exclude_patterns": bool(query.ignore_patterns),
+        },
+    )
+    return query
+
+
 def _override_branch_and_tag(query: IngestionQuery, branch: str | None, tag: str | None) -> None:
     """Compare the caller-supplied ``branch`` and ``tag`` with the ones already in ``query``.
 
@@ -333,6 +451,8 @@ def _handle_remove_readonly(
 async def _write_output(tree: str, content: str, target: str | None) -> None:
     """Write combined output to ``target`` (``"-"`` ⇒ stdout).
 
+    The tree and the content are written one after the other rather than concatenated, to avoid copying the digest.
+
     Parameters
     ----------
     tree : str
@@ -343,10 +463,36 @@ async def _write_output(tree: str, content: str, target: str | None) -> None:
         The path to the output file. If ``None``, the results are not written to a file.
 
     """
-    data = f"{tree}\n{content}"
+    chunks = (tree, "\n", content)
     loop = asyncio.get_running_loop()
     if target == "-":
-        await loop.run_in_executor(None, sys.stdout.write, data)
+        await loop.run_in_executor(None, sys.stdout.writelines, chunks)
         await loop.run_in_executor(None, sys.stdout.flush)
     elif target is not None:
-        await loop.run_in_executor(None, Path(target).write_text, data, "utf-8")
+        await loop.run_in_executor(None, _write_file, Path(target), chunks)
+
+
+def _stream_output(query: IngestionQuery, target: str) -> tuple[str, str]:
+    """Stream the digest of ``query`` to ``target`` (``"-"`` ⇒ stdout), returning the summary and the tree."""
+    if target == "-":
+        summary, tree = stream_ingest_query(query, sink=sys.stdout.write)
+        sys.stdout.flush()
+        return summary, tree
+
+    with Path(target).open("w", encoding="utf-8") as fp:
+        return stream_ingest_query(query, sink=fp.write)
+
+
+def _write_file(path: Path, chunks: Iterable[str]) -> None:
+    """Write ``chunks`` to the file at ``path`` (UTF-8).
+
+    Parameters
+    ----------
+    path : Path
+        The path to the output file.
+    chunks : Iterable[str]
+        The strings to write, in order.
+
+    """
+    with path.open("w", encoding="utf-8") as fp:
+        fp.writelines(chunks)
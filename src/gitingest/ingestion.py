@@ -2,23 +2,30 @@
 
 from __future__ import annotations
 
+import os
+from contextlib import closing, contextmanager
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterator
 
 from gitingest.config import MAX_DIRECTORY_DEPTH, MAX_FILES, MAX_TOTAL_SIZE_BYTES
-from gitingest.output_formatter import format_node
+from gitingest.output_formatter import format_node, write_node
 from gitingest.schemas import FileSystemNode, FileSystemNodeType, FileSystemStats
-from gitingest.utils.ingestion_utils import _should_exclude, _should_include
+from gitingest.utils.git_objects import GitBlobNode, GitObjectReader, list_tree
+from gitingest.utils.ingestion_utils import PathMatcher
 from gitingest.utils.logging_config import get_logger
+from gitingest.utils.progress import report_progress
 
 if TYPE_CHECKING:
+    from gitingest.output_formatter import DigestSink
     from gitingest.schemas import IngestionQuery
+    from gitingest.utils.git_objects import GitTreeEntry
+    from gitingest.utils.token_utils import TokenCounter
 
 # Initialize logger for this module
 logger = get_logger(__name__)
 
 
-def ingest_query(query: IngestionQuery) -> tuple[str, str, str]:
+def ingest_query(query: IngestionQuery, *, token_counter: TokenCounter | None = None) -> tuple[str, str, str]:
     """Run the ingestion process for a parsed query.
 
     This is the main entry point for analyzing a codebase directory or single file. It processes the query
@@ -29,12 +36,87 @@ def ingest_query(query: IngestionQuery) -> tuple[str, str, str]:
     ----------
     query : IngestionQuery
         The parsed query object containing information about the repository and query parameters.
+    token_counter : TokenCounter | None
+        The counter receiving the token count of the digest and of every file, e.g. to inspect the per-file counts
+        afterwards (default: a new ``TokenCounter``).
 
     Returns
     -------
     tuple[str, str, str]
         A tuple containing the summary, directory structure, and file contents.
 
+    """
+    with _open_node(query) as node:
+        return format_node(node, query=query, token_counter=token_counter)
+
+
+def stream_ingest_query(
+    query: IngestionQuery,
+    sink: DigestSink,
+    *,
+    token_counter: TokenCounter | None = None,
+) -> tuple[str, str]:
+    """Run the ingestion process for a parsed query, streaming the digest to ``sink``.
+
+    Unlike ``ingest_query``, the digest is never held in memory as a whole: the directory structure and the content
+    of every file are handed to ``sink`` chunk by chunk as they are produced.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    sink : DigestSink
+        The callable receiving the digest chunks, e.g. the ``write`` method of a text file.
+    token_counter : TokenCounter | None
+        The counter receiving the token count of the digest and of every file (default: a new ``TokenCounter``).
+
+    Returns
+    -------
+    tuple[str, str]
+        A tuple containing the summary and the directory structure.
+
+    """
+    with _open_node(query) as node:
+        return write_node(node, query=query, sink=sink, token_counter=token_counter)
+
+
+@contextmanager
+def _open_node(query: IngestionQuery) -> Iterator[FileSystemNode]:
+    """Build the file system node for a parsed query, from the git objects if ``query.from_git_objects`` is set.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+
+    Yields
+    ------
+    FileSystemNode
+        The file node, or the root directory node with all included files and directories attached. File contents
+        can be read until the context exits.
+
+    """
+    if not query.from_git_objects:
+        yield _build_node(query)
+        return
+
+    with closing(GitObjectReader(query.local_path)) as reader:
+        yield _build_git_node(query, reader)
+
+
+def _build_node(query: IngestionQuery) -> FileSystemNode:
+    """Build the file system node for a parsed query.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+
+    Returns
+    -------
+    FileSystemNode
+        The file node, or the root directory node with all included files and directories attached.
+
     Raises
     ------
     ValueError
@@ -91,20 +173,106 @@ def ingest_query(query: IngestionQuery) -> tuple[str, str, str]:
                 "file_size": file_node.size,
             },
         )
-        return format_node(file_node, query=query)
+        return file_node
 
     logger.info("Processing directory", extra={"directory_path": str(path)})
 
     root_node = FileSystemNode(
         name=path.name,
         type=FileSystemNodeType.DIRECTORY,
-        path_str=str(path.relative_to(query.local_path)),
+        path_str=path.relative_to(query.local_path).as_posix(),
         path=path,
     )
 
     stats = FileSystemStats()
+    matcher = PathMatcher.from_query(query)
+
+    _process_node(node=root_node, query=query, stats=stats, matcher=matcher)
+    _report_walk(stats, force=True)
+
+    logger.info(
+        "Directory processing completed",
+        extra={
+            "total_files": root_node.file_count,
+            "total_directories": root_node.dir_count,
+            "total_size_bytes": root_node.size,
+            "stats_total_files": stats.total_files,
+            "stats_total_size": stats.total_size,
+            "pruned_directories": stats.pruned_dirs,
+        },
+    )
+
+    return root_node
+
+
+def _build_git_node(query: IngestionQuery, reader: GitObjectReader) -> FileSystemNode:
+    """Build the file system node for a parsed query from the tree of the commit at ``HEAD``.
+
+    The tree is listed with ``git ls-tree``, so neither a checkout nor a file system walk is needed, and files are
+    filtered on the sizes of the listing before any blob is read. The contents are read lazily through ``reader``.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    reader : GitObjectReader
+        The reader of the blobs of the repository at ``query.local_path``.
+
+    Returns
+    -------
+    FileSystemNode
+        The file node, or the root directory node with all included files and directories attached.
+
+    Raises
+    ------
+    ValueError
+        If the path cannot be found, is not a file, or the file has no content.
+
+    """
+    logger.info(
+        "Starting file ingestion from git objects",
+        extra={
+            "slug": query.slug,
+            "subpath": query.subpath,
+            "local_path": str(query.local_path),
+            "max_file_size": query.max_file_size,
+        },
+    )
+
+    subpath = query.subpath.strip("/")
+    entries = [entry for entry in list_tree(query.local_path, "HEAD", subpath) if entry.object_type == "blob"]
+
+    if not entries:
+        logger.error("Path not found", extra={"path": subpath, "slug": query.slug})
+        msg = f"{query.slug} cannot be found"
+        raise ValueError(msg)
+
+    if query.type == "blob":
+        entry = entries[0]
+        if entry.path != subpath:
+            logger.error("Expected file but found non-file", extra={"path": subpath})
+            msg = f"Path {query.local_path / subpath} is not a file"
+            raise ValueError(msg)
+
+        file_node = _git_file_node(entry, query=query, reader=reader, depth=0)
+        file_node.file_count = 1
+        if not file_node.content:
+            logger.error("File has no content", extra={"file_name": file_node.name})
+            msg = f"File {file_node.name} has no content"
+            raise ValueError(msg)
+        return file_node
+
+    root_path = query.local_path / subpath if subpath else query.local_path
+    root_node = FileSystemNode(
+        name=root_path.name,
+        type=FileSystemNodeType.DIRECTORY,
+        path_str=subpath or ".",
+        path=root_path,
+    )
 
-    _process_node(node=root_node, query=query, stats=stats)
+    stats = FileSystemStats()
+    _attach_git_entries(root_node, entries, query=query, reader=reader, stats=stats)
+    _report_walk(stats, force=True)
 
     logger.info(
         "Directory processing completed",
@@ -114,18 +282,191 @@ def ingest_query(query: IngestionQuery) -> tuple[str, str, str]:
             "total_size_bytes": root_node.size,
             "stats_total_files": stats.total_files,
             "stats_total_size": stats.total_size,
+            "pruned_directories": stats.pruned_dirs,
         },
     )
 
-    return format_node(root_node, query=query)
+    return root_node
+
+
+def _attach_git_entries(
+    root_node: FileSystemNode,
+    entries: list[GitTreeEntry],
+    *,
+    query: IngestionQuery,
+    reader: GitObjectReader,
+    stats: FileSystemStats,
+) -> None:
+    """Attach the included entries of a tree listing below ``root_node``, with the filters and limits of a walk.
+
+    Directory nodes are created when their first included file is attached, and the exclusion of every directory is
+    decided once and shared by all the entries below it.
+
+    Parameters
+    ----------
+    root_node : FileSystemNode
+        The directory node of ``query.subpath``.
+    entries : list[GitTreeEntry]
+        The blobs below ``query.subpath``.
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    reader : GitObjectReader
+        The reader of the blobs of the repository.
+    stats : FileSystemStats
+        Statistics tracking object for the total file count and size.
+
+    """
+    matcher = PathMatcher.from_query(query)
+    root_prefix = "" if root_node.path_str == "." else f"{root_node.path_str}/"
+    dir_nodes: dict[str, FileSystemNode | None] = {root_node.path_str: root_node}
+
+    def _dir_node(rel_path: str) -> FileSystemNode | None:
+        """Return the node of the directory ``rel_path``, or ``None`` if it is excluded or too deep."""
+        if rel_path in dir_nodes:
+            return dir_nodes[rel_path]
+
+        parent_path, _, name = rel_path.rpartition("/")
+        parent = _dir_node(parent_path or ".")
+        node = None
+        if parent is not None and parent.depth < MAX_DIRECTORY_DEPTH and not matcher.is_excluded(rel_path):
+            if matcher.include_spec and not matcher.is_included(rel_path, is_dir=True):
+                pass
+            elif matcher.is_pruned(rel_path):
+                stats.pruned_dirs += 1
+            else:
+                node = FileSystemNode(
+                    name=name,
+                    type=FileSystemNodeType.DIRECTORY,
+                    path_str=rel_path,
+                    path=query.local_path / rel_path,
+                    depth=parent.depth + 1,
+                )
+        dir_nodes[rel_path] = node
+        return node
+
+    for entry in entries:
+        if not entry.path.startswith(root_prefix):
+            continue
+
+        parent_path = entry.path.rpartition("/")[0] or "."
+        parent = _dir_node(parent_path)
+        if parent is None or not _include_git_entry(entry, query=query, matcher=matcher, stats=stats):
+            continue
+
+        parent.children.append(_git_file_node(entry, query=query, reader=reader, depth=parent.depth + 1))
+
+    _roll_up(root_node, dir_nodes)
+
+
+def _include_git_entry(
+    entry: GitTreeEntry,
+    *,
+    query: IngestionQuery,
+    matcher: PathMatcher,
+    stats: FileSystemStats,
+) -> bool:
+    """Return ``True`` if the file or symlink ``entry`` passes the patterns and limits of ``query``, and count it."""
+    if matcher.is_excluded(entry.path):
+        return False
+
+    if matcher.include_spec and not matcher.is_included(entry.path, is_dir=False):
+        return False
+
+    if entry.is_symlink:
+        stats.total_files += 1
+        return True
+
+    if entry.size is None:
+        logger.debug(
+            "Skipping file: blob was left out of the partial clone",
+            extra={"file_path": entry.path, "max_file_size": query.max_file_size},
+        )
+        return False
+
+    if entry.size > query.max_file_size:
+        logger.debug(
+            "Skipping file: would exceed max file size limit",
+            extra={"file_path": entry.path, "file_size": entry.size, "max_file_size": query.max_file_size},
+        )
+        return False
+
+    if stats.total_files + 1 > MAX_FILES:
+        logger.warning(
+            "Maximum file limit reached",
+            extra={"current_files": stats.total_files, "max_files": MAX_FILES, "file_path": entry.path},
+        )
+        return False
+
+    if stats.total_size + entry.size > MAX_TOTAL_SIZE_BYTES:
+        logger.warning(
+            "Skipping file: would exceed total size limit",
+            extra={
+                "file_path": entry.path,
+                "file_size": entry.size,
+                "current_total_size": stats.total_size,
+                "max_total_size": MAX_TOTAL_SIZE_BYTES,
+            },
+        )
+        return False
+
+    stats.total_files += 1
+    stats.total_size += entry.size
+    _report_walk(stats)
+    return True
+
+
+def _git_file_node(entry: GitTreeEntry, *, query: IngestionQuery, reader: GitObjectReader, depth: int) -> GitBlobNode:
+    """Return the node of the file or symlink ``entry``, whose content is read through ``reader``."""
+    return GitBlobNode(
+        name=entry.path.rpartition("/")[2],
+        type=FileSystemNodeType.SYMLINK if entry.is_symlink else FileSystemNodeType.FILE,
+        size=0 if entry.is_symlink else entry.size or 0,
+        file_count=0 if entry.is_symlink else 1,
+        path_str=entry.path,
+        path=query.local_path / entry.path,
+        depth=depth,
+        object_id=entry.object_id,
+        reader=reader,
+    )
 
 
-def _process_node(node: FileSystemNode, query: IngestionQuery, stats: FileSystemStats) -> None:
+def _roll_up(root_node: FileSystemNode, dir_nodes: dict[str, FileSystemNode | None]) -> None:
+    """Attach the non-empty directories to their parents, deepest first, summing their sizes and counts."""
+    nodes = sorted(
+        (node for node in dir_nodes.values() if node is not None),
+        key=lambda node: node.depth,
+        reverse=True,
+    )
+    for node in nodes:
+        for child in node.children:
+            node.size += child.size
+            node.file_count += child.file_count if child.type != FileSystemNodeType.SYMLINK else 1
+        node.sort_children()
+
+        if node is root_node or not node.children:
+            continue
+
+        parent = dir_nodes[node.path_str.rpartition("/")[0] or "."]
+        if parent is not None:
+            parent.children.append(node)
+            parent.dir_count += 1 + node.dir_count
+
+
+def _process_node(
+    node: FileSystemNode,
+    query: IngestionQuery,
+    stats: FileSystemStats,
+    matcher: PathMatcher,
+) -> None:
     """Process a file or directory item within a directory.
 
     This function handles each file or directory item, checking if it should be included or excluded based on the
     provided patterns. It handles symlinks, directories, and files accordingly.
 
+    Entries are listed with ``os.scandir`` so that their type comes from the cached directory entry and only regular
+    files are ``stat``-ed (once). Relative paths are built by string concatenation from the parent's relative path.
+    Directories that ``matcher`` proves cannot contain any matching path are skipped without being listed.
+
     Parameters
     ----------
     node : FileSystemNode
@@ -134,78 +475,128 @@ def _process_node(node: FileSystemNode, query: IngestionQuery, stats: FileSystem
         The parsed query object containing information about the repository and query parameters.
     stats : FileSystemStats
         Statistics tracking object for the total file count and size.
+    matcher : PathMatcher
+        The compiled include and ignore patterns of ``query``.
 
     """
     if limit_exceeded(stats, depth=node.depth):
         return
 
-    for sub_path in node.path.iterdir():
-        if query.ignore_patterns and _should_exclude(sub_path, query.local_path, query.ignore_patterns):
-            continue
-
-        if query.include_patterns and not _should_include(sub_path, query.local_path, query.include_patterns):
-            continue
+    rel_prefix = "" if node.path_str == "." else f"{node.path_str}/"
 
-        if sub_path.is_symlink():
-            _process_symlink(path=sub_path, parent_node=node, stats=stats, local_path=query.local_path)
-        elif sub_path.is_file():
-            if sub_path.stat().st_size > query.max_file_size:
-                logger.debug(
-                    "Skipping file: would exceed max file size limit",
-                    extra={
-                        "file_path": str(sub_path),
-                        "file_size": sub_path.stat().st_size,
-                        "max_file_size": query.max_file_size,
-                    },
-                )
+    with os.scandir(node.path) as entries:
+        for entry in entries:
+            rel_path = rel_prefix + entry.name
+            if matcher.is_excluded(rel_path):
                 continue
-            _process_file(path=sub_path, parent_node=node, stats=stats, local_path=query.local_path)
-        elif sub_path.is_dir():
-            child_directory_node = FileSystemNode(
-                name=sub_path.name,
-                type=FileSystemNodeType.DIRECTORY,
-                path_str=str(sub_path.relative_to(query.local_path)),
-                path=sub_path,
-                depth=node.depth + 1,
-            )
-
-            _process_node(node=child_directory_node, query=query, stats=stats)
-
-            if not child_directory_node.children:
+
+            if matcher.include_spec and not matcher.is_included(rel_path, is_dir=entry.is_dir()):
                 continue
 
-            node.children.append(child_directory_node)
-            node.size += child_directory_node.size
-            node.file_count += child_directory_node.file_count
-            node.dir_count += 1 + child_directory_node.dir_count
-        else:
-            logger.warning("Unknown file type, skipping", extra={"file_path": str(sub_path)})
+            if entry.is_symlink():
+                _process_symlink(entry=entry, rel_path=rel_path, parent_node=node, stats=stats)
+            elif entry.is_file():
+                file_size = entry.stat().st_size
+                if file_size > query.max_file_size:
+                    logger.debug(
+                        "Skipping file: would exceed max file size limit",
+                        extra={
+                            "file_path": entry.path,
+                            "file_size": file_size,
+                            "max_file_size": query.max_file_size,
+                        },
+                    )
+                    continue
+                _process_file(entry=entry, rel_path=rel_path, file_size=file_size, parent_node=node, stats=stats)
+            elif entry.is_dir():
+                _process_directory(
+                    entry=entry,
+                    rel_path=rel_path,
+                    parent_node=node,
+                    query=query,
+                    stats=stats,
+                    matcher=matcher,
+                )
+            else:
+                logger.warning("Unknown file type, skipping", extra={"file_path": entry.path})
 
     node.sort_children()
 
 
-def _process_symlink(path: Path, parent_node: FileSystemNode, stats: FileSystemStats, local_path: Path) -> None:
+def _process_directory(
+    entry: os.DirEntry,
+    rel_path: str,
+    parent_node: FileSystemNode,
+    query: IngestionQuery,
+    stats: FileSystemStats,
+    matcher: PathMatcher,
+) -> None:
+    """Process a directory in the file system.
+
+    This function recurses into the directory unless it can be pruned, and attaches it to ``parent_node`` if it
+    contains at least one file.
+
+    Parameters
+    ----------
+    entry : os.DirEntry
+        The directory entry of the directory.
+    rel_path : str
+        The path of the directory relative to the repository root.
+    parent_node : FileSystemNode
+        The parent directory node.
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    stats : FileSystemStats
+        Statistics tracking object for the total file count and size.
+    matcher : PathMatcher
+        The compiled include and ignore patterns of ``query``.
+
+    """
+    if matcher.is_pruned(rel_path):
+        stats.pruned_dirs += 1
+        return
+
+    child = FileSystemNode(
+        name=entry.name,
+        type=FileSystemNodeType.DIRECTORY,
+        path_str=rel_path,
+        path=Path(entry.path),
+        depth=parent_node.depth + 1,
+    )
+
+    _process_node(node=child, query=query, stats=stats, matcher=matcher)
+
+    if not child.children:
+        return
+
+    parent_node.children.append(child)
+    parent_node.size += child.size
+    parent_node.file_count += child.file_count
+    parent_node.dir_count += 1 + child.dir_count
+
+
+def _process_symlink(entry: os.DirEntry, rel_path: str, parent_node: FileSystemNode, stats: FileSystemStats) -> None:
     """Process a symlink in the file system.
 
     This function checks the symlink's target.
 
     Parameters
     ----------
-    path : Path
-        The full path of the symlink.
+    entry : os.DirEntry
+        The directory entry of the symlink.
+    rel_path : str
+        The path of the symlink relative to the repository root.
     parent_node : FileSystemNode
         The parent directory node.
     stats : FileSystemStats
         Statistics tracking object for the total file count and size.
-    local_path : Path
-        The base path of the repository or directory being processed.
 
     """
     child = FileSystemNode(
-        name=path.name,
+        name=entry.name,
         type=FileSystemNodeType.SYMLINK,
-        path_str=str(path.relative_to(local_path)),
-        path=path,
+        path_str=rel_path,
+        path=Path(entry.path),
         depth=parent_node.depth + 1,
     )
     stats.total_files += 1
@@ -213,7 +604,13 @@ def _process_symlink(path: Path, parent_node: FileSystemNode, stats: FileSystemS
     parent_node.file_count += 1
 
 
-def _process_file(path: Path, parent_node: FileSystemNode, stats: FileSystemStats, local_path: Path) -> None:
+def _process_file(
+    entry: os.DirEntry,
+    rel_path: str,
+    file_size: int,
+    parent_node: FileSystemNode,
+    stats: FileSystemStats,
+) -> None:
     """Process a file in the file system.
 
     This function checks the file's size, increments the statistics, and reads its content.
@@ -221,14 +618,16 @@ def _process_file(path: Path, parent_node: FileSystemNode, stats: FileSystemStat
 
     Parameters
     ----------
-    path : Path
-        The full path of the file.
+    entry : os.DirEntry
+        The directory entry of the file.
+    rel_path : str
+        The path of the file relative to the repository root.
+    file_size : int
+        The size of the file in bytes, as reported by ``entry.stat()``.
     parent_node : FileSystemNode
         The dictionary to accumulate the results.
     stats : FileSystemStats
         Statistics tracking object for the total file count and size.
-    local_path : Path
-        The base path of the repository or directory being processed.
 
     """
     if stats.total_files + 1 > MAX_FILES:
@@ -237,17 +636,16 @@ def _process_file(path: Path, parent_node: FileSystemNode, stats: FileSystemStat
             extra={
                 "current_files": stats.total_files,
                 "max_files": MAX_FILES,
-                "file_path": str(path),
+                "file_path": entry.path,
             },
         )
         return
 
-    file_size = path.stat().st_size
     if stats.total_size + file_size > MAX_TOTAL_SIZE_BYTES:
         logger.warning(
             "Skipping file: would exceed total size limit",
             extra={
-                "file_path": str(path),
+                "file_path": entry.path,
                 "file_size": file_size,
                 "current_total_size": stats.total_size,
                 "max_total_size": MAX_TOTAL_SIZE_BYTES,
@@ -257,14 +655,15 @@ def _process_file(path: Path, parent_node: FileSystemNode, stats: FileSystemStat
 
     stats.total_files += 1
     stats.total_size += file_size
+    _report_walk(stats)
 
     child = FileSystemNode(
-        name=path.name,
+        name=entry.name,
         type=FileSystemNodeType.FILE,
         size=file_size,
         file_count=1,
-        path_str=str(path.relative_to(local_path)),
-        path=path,
+        path_str=rel_path,
+        path=Path(entry.path),
         depth=parent_node.depth + 1,
     )
 
@@ -273,6 +672,18 @@ def _process_file(path: Path, parent_node: FileSystemNode, stats: FileSystemStat
     parent_node.file_count += 1
 
 
+def _report_walk(stats: FileSystemStats, *, force: bool = False) -> None:
+    """Report the files and bytes included so far, against the limits of the ingestion."""
+    report_progress(
+        "walk",
+        force=force,
+        files=stats.total_files,
+        bytes=stats.total_size,
+        max_files=MAX_FILES,
+        max_bytes=MAX_TOTAL_SIZE_BYTES,
+    )
+
+
 def limit_exceeded(stats: FileSystemStats, depth: int) -> bool:
     """Check if any of the traversal limits have been exceeded.
 
@@ -2,15 +2,15 @@
 
 from __future__ import annotations
 
-import ssl
-from typing import TYPE_CHECKING
-
-import requests.exceptions
-import tiktoken
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator
 
 from gitingest.schemas import FileSystemNode, FileSystemNodeType
-from gitingest.utils.compat_func import readlink
 from gitingest.utils.logging_config import get_logger
+from gitingest.utils.progress import report_progress
+from gitingest.utils.token_cache import default_token_cache
+from gitingest.utils.token_utils import TokenCounter, format_token_count
 
 if TYPE_CHECKING:
     from gitingest.schemas import IngestionQuery
@@ -18,13 +18,17 @@ if TYPE_CHECKING:
 # Initialize logger for this module
 logger = get_logger(__name__)
 
-_TOKEN_THRESHOLDS: list[tuple[int, str]] = [
-    (1_000_000, "M"),
-    (1_000, "k"),
-]
+DigestSink = Callable[[str], object]
+
+_READ_AHEAD_PER_WORKER = 4  # Number of files read ahead of the digest writer per read worker
 
 
-def format_node(node: FileSystemNode, query: IngestionQuery) -> tuple[str, str, str]:
+def format_node(
+    node: FileSystemNode,
+    query: IngestionQuery,
+    *,
+    token_counter: TokenCounter | None = None,
+) -> tuple[str, str, str]:
     """Generate a summary, directory structure, and file contents for a given file system node.
 
     If the node represents a directory, the function will recursively process its contents.
@@ -35,12 +39,100 @@ def format_node(node: FileSystemNode, query: IngestionQuery) -> tuple[str, str,
         The file system node to be summarized.
     query : IngestionQuery
         The parsed query object containing information about the repository and query parameters.
+    token_counter : TokenCounter | None
+        The counter receiving the token count of the digest and of every file (default: a new ``TokenCounter`` backed
+        by the persistent token count cache).
 
     Returns
     -------
     tuple[str, str, str]
         A tuple containing the summary, directory structure, and file contents.
 
+    """
+    chunks: list[str] = []
+    summary, tree = _write_digest(
+        node,
+        query,
+        sink=chunks.append,
+        token_counter=token_counter or TokenCounter(cache=default_token_cache()),
+        write_tree=False,
+        release_contents=False,
+    )
+    return summary, tree, "".join(chunks)
+
+
+def write_node(
+    node: FileSystemNode,
+    query: IngestionQuery,
+    sink: DigestSink,
+    *,
+    token_counter: TokenCounter | None = None,
+) -> tuple[str, str]:
+    """Stream the digest of a file system node to ``sink`` without building it in memory.
+
+    The digest (the directory structure, a newline, then the content of every file, exactly as returned by
+    ``format_node``) is handed to ``sink`` chunk by chunk. File contents are read ahead on ``query.read_workers``
+    threads, counted as they are written and released afterwards.
+
+    Parameters
+    ----------
+    node : FileSystemNode
+        The file system node to be summarized.
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    sink : DigestSink
+        The callable receiving the digest chunks, e.g. the ``write`` method of a text file.
+    token_counter : TokenCounter | None
+        The counter receiving the token count of the digest and of every file (default: a new ``TokenCounter`` backed
+        by the persistent token count cache).
+
+    Returns
+    -------
+    tuple[str, str]
+        A tuple containing the summary and the directory structure.
+
+    """
+    return _write_digest(
+        node,
+        query,
+        sink=sink,
+        token_counter=token_counter or TokenCounter(cache=default_token_cache()),
+        write_tree=True,
+        release_contents=True,
+    )
+
+
+def _write_digest(
+    node: FileSystemNode,
+    query: IngestionQuery,
+    *,
+    sink: DigestSink,
+    token_counter: TokenCounter,
+    write_tree: bool,
+    release_contents: bool,
+) -> tuple[str, str]:
+    """Write the file contents under ``node`` (optionally preceded by the tree) to ``sink``.
+
+    Parameters
+    ----------
+    node : FileSystemNode
+        The file system node to be summarized.
+    query : IngestionQuery
+        The parsed query object containing information about the repository and query parameters.
+    sink : DigestSink
+        The callable receiving the chunks.
+    token_counter : TokenCounter
+        The counter receiving the token count of the directory structure and of every file.
+    write_tree : bool
+        Whether to write the directory structure and a blank line before the file contents.
+    release_contents : bool
+        Whether to drop the memoised content of each file once it has been written.
+
+    Returns
+    -------
+    tuple[str, str]
+        A tuple containing the summary and the directory structure.
+
     """
     is_single_file = node.type == FileSystemNodeType.FILE
     summary = _create_summary_prefix(query, single_file=is_single_file)
@@ -51,15 +143,39 @@ def format_node(node: FileSystemNode, query: IngestionQuery) -> tuple[str, str,
         summary += f"File: {node.name}\n"
         summary += f"Lines: {len(node.content.splitlines()):,}\n"
 
-    tree = "Directory structure:\n" + _create_tree_structure(query, node=node)
+    tree_lines = ["Directory structure:\n"]
+    tree_lines.extend(_iter_tree_lines(query, node=node))
+    tree = "".join(tree_lines)
+    try:
+        token_counter.add(tree)
+
+        if write_tree:
+            sink(tree)
+            sink("\n")
+
+        for i, leaf in enumerate(_iter_loaded_leaves(node, workers=query.read_workers)):
+            if i:
+                sink("\n")
+                token_counter.add("\n")
 
-    content = _gather_file_contents(node)
+            content_string = leaf.content_string
+            sink(content_string)
+            token_counter.add_file(leaf, content_string)
 
-    token_estimate = _format_token_count(tree + content)
-    if token_estimate:
-        summary += f"\nEstimated tokens: {token_estimate}"
+            if release_contents:
+                leaf.release_content()
 
-    return summary, tree, content
+            report_progress("format", files=i + 1, total_files=node.file_count)
+
+        report_progress("format", "Digest written", force=True, files=node.file_count, total_files=node.file_count)
+
+        if token_counter.total is not None:
+            summary += f"\nEstimated tokens: {format_token_count(token_counter.total)}"
+    finally:
+        # Stop the token counting workers even if the sink raised, e.g. because the client of a stream went away
+        token_counter.close()
+
+    return summary, tree
 
 
 def _create_summary_prefix(query: IngestionQuery, *, single_file: bool = False) -> str:
@@ -102,109 +218,124 @@ def _create_summary_prefix(query: IngestionQuery, *, single_file: bool = False)
     return "\n".join(parts) + "\n"
 
 
-def _gather_file_contents(node: FileSystemNode) -> str:
-    """Recursively gather contents of all files under the given node.
+def _iter_loaded_leaves(node: FileSystemNode, *, workers: int) -> Iterable[FileSystemNode]:
+    """Return the file and symlink nodes under ``node`` in digest order, loading their contents ahead of time.
 
-    This function recursively processes a directory node and gathers the contents of all files
-    under that node. It returns the concatenated content of all files as a single string.
+    With more than one worker, up to ``_READ_AHEAD_PER_WORKER`` files per worker are read concurrently ahead of the
+    one being consumed, which bounds memory use while hiding per-file read latency.
 
     Parameters
     ----------
     node : FileSystemNode
         The current directory or file node being processed.
+    workers : int
+        The number of threads used to read files ahead. With a single worker, files are read lazily.
 
     Returns
     -------
-    str
-        The concatenated content of all files under the given node.
+    Iterable[FileSystemNode]
+        The non-directory nodes under (or equal to) ``node``.
+
+    """
+    leaves = _iter_leaf_nodes(node)
+    if workers <= 1:
+        return leaves
+    return _read_ahead(leaves, workers=workers)
+
+
+def _iter_leaf_nodes(node: FileSystemNode) -> Iterator[FileSystemNode]:
+    """Yield the file and symlink nodes under ``node`` depth-first, in ``sort_children`` order.
+
+    Parameters
+    ----------
+    node : FileSystemNode
+        The node to traverse.
+
+    Yields
+    ------
+    FileSystemNode
+        Every non-directory node under (or equal to) ``node``.
 
     """
     if node.type != FileSystemNodeType.DIRECTORY:
-        return node.content_string
+        yield node
+        return
 
-    # Recursively gather contents of all files under the current directory
-    return "\n".join(_gather_file_contents(child) for child in node.children)
+    for child in node.children:
+        yield from _iter_leaf_nodes(child)
 
 
-def _create_tree_structure(
-    query: IngestionQuery,
-    *,
-    node: FileSystemNode,
-    prefix: str = "",
-    is_last: bool = True,
-) -> str:
-    """Generate a tree-like string representation of the file structure.
+def _read_ahead(nodes: Iterable[FileSystemNode], workers: int) -> Iterator[FileSystemNode]:
+    """Yield ``nodes`` in order, loading their contents on a thread pool ahead of time.
 
-    This function generates a string representation of the directory structure, formatted
-    as a tree with appropriate indentation for nested directories and files.
+    Parameters
+    ----------
+    nodes : Iterable[FileSystemNode]
+        The nodes whose contents should be loaded.
+    workers : int
+        The number of threads used to read files.
+
+    Yields
+    ------
+    FileSystemNode
+        The next node, whose content has been loaded.
+
+    """
+    window = workers * _READ_AHEAD_PER_WORKER
+    pending: deque[tuple[FileSystemNode, Future[str]]] = deque()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gitingest-read") as pool:
+        for node in nodes:
+            pending.append((node, pool.submit(getattr, node, "content")))
+            if len(pending) >= window:
+                ready, future = pending.popleft()
+                future.result()  # Propagate exceptions raised in the worker thread
+                yield ready
+
+        while pending:
+            ready, future = pending.popleft()
+            future.result()
+            yield ready
+
+
+def _iter_tree_lines(query: IngestionQuery, *, node: FileSystemNode) -> Iterator[str]:
+    """Yield the lines of a tree-like representation of the file structure under ``node``.
+
+    The tree is rendered in a single depth-first pass over an explicit stack, so every line is built once, with
+    appropriate indentation for nested directories and files, regardless of the depth of the tree.
 
     Parameters
     ----------
     query : IngestionQuery
         The parsed query object containing information about the repository and query parameters.
     node : FileSystemNode
-        The current directory or file node being processed.
-    prefix : str
-        A string used for indentation and formatting of the tree structure (default: ``""``).
-    is_last : bool
-        A flag indicating whether the current node is the last in its directory (default: ``True``).
+        The root node of the tree.
 
-    Returns
-    -------
+    Yields
+    ------
     str
-        A string representing the directory structure formatted as a tree.
+        The line of each node (including the trailing newline), in ``sort_children`` order.
 
     """
     if not node.name:
         # If no name is present, use the slug as the top-level directory name
         node.name = query.slug
 
-    tree_str = ""
-    current_prefix = "└── " if is_last else "├── "
-
-    # Indicate directories with a trailing slash
-    display_name = node.name
-    if node.type == FileSystemNodeType.DIRECTORY:
-        display_name += "/"
-    elif node.type == FileSystemNodeType.SYMLINK:
-        display_name += " -> " + readlink(node.path).name
-
-    tree_str += f"{prefix}{current_prefix}{display_name}\n"
-
-    if node.type == FileSystemNodeType.DIRECTORY and node.children:
-        prefix += "    " if is_last else "│   "
-        for i, child in enumerate(node.children):
-            tree_str += _create_tree_structure(query, node=child, prefix=prefix, is_last=i == len(node.children) - 1)
-    return tree_str
-
+    stack: list[tuple[FileSystemNode, str, bool]] = [(node, "", True)]
+    while stack:
+        current, prefix, is_last = stack.pop()
 
-def _format_token_count(text: str) -> str | None:
-    """Return a human-readable token-count string (e.g. 1.2k, 1.2 M).
-
-    Parameters
-    ----------
-    text : str
-        The text string for which the token count is to be estimated.
+        # Indicate directories with a trailing slash
+        display_name = current.name
+        if current.type == FileSystemNodeType.DIRECTORY:
+            display_name += "/"
+        elif current.type == FileSystemNodeType.SYMLINK:
+            display_name += " -> " + current.symlink_target().name
 
-    Returns
-    -------
-    str | None
-        The formatted number of tokens as a string (e.g., ``"1.2k"``, ``"1.2M"``), or ``None`` if an error occurs.
+        yield f"{prefix}{'└── ' if is_last else '├── '}{display_name}\n"
 
-    """
-    try:
-        encoding = tiktoken.get_encoding("o200k_base")  # gpt-4o, gpt-4o-mini
-        total_tokens = len(encoding.encode(text, disallowed_special=()))
-    except (ValueError, UnicodeEncodeError) as exc:
-        logger.warning("Failed to estimate token size", extra={"error": str(exc)})
-        return None
-    except (requests.exceptions.RequestException, ssl.SSLError) as exc:
-        # If network errors, skip token count estimation instead of erroring out
-        logger.warning("Failed to download tiktoken model", extra={"error": str(exc)})
-        return None
-
-    for threshold, suffix in _TOKEN_THRESHOLDS:
-        if total_tokens >= threshold:
-            return f"{total_tokens / threshold:.1f}{suffix}"
-
-    return str(total_tokens)
+        if current.type == FileSystemNodeType.DIRECTORY and current.children:
+            child_prefix = prefix + ("    " if is_last else "│   ")
+            last = len(current.children) - 1
+            # Pushed in reverse so that the first child is rendered next
+            stack.extend((current.children[i], child_prefix, i == last) for i in range(last, -1, -1))
@@ -1,7 +1,7 @@
 """Module containing the schemas for the Gitingest package."""
 
-from gitingest.schemas.cloning import CloneConfig
+from gitingest.schemas.cloning import CloneBackend, CloneConfig
 from gitingest.schemas.filesystem import FileSystemNode, FileSystemNodeType, FileSystemStats
 from gitingest.schemas.ingestion import IngestionQuery
 
-__all__ = ["CloneConfig", "FileSystemNode", "FileSystemNodeType", "FileSystemStats", "IngestionQuery"]
+__all__ = ["CloneBackend", "CloneConfig", "FileSystemNode", "FileSystemNodeType", "FileSystemStats", "IngestionQuery"]
@@ -4,6 +4,15 @@ from __future__ import annotations
 
 from pydantic import BaseModel, Field
 
+from gitingest.utils.compat_typing import StrEnum
+
+
+class CloneBackend(StrEnum):
+    """How the files of a repository are fetched."""
+
+    GIT = "git"  # Shallow git clone, with a ``.git`` directory
+    ARCHIVE = "archive"  # Tarball of the commit from the host, without history (falls back to git if unavailable)
+
 
 class CloneConfig(BaseModel):  # pylint: disable=too-many-instance-attributes
     """Configuration for cloning a Git repository.
@@ -29,6 +38,15 @@ class CloneConfig(BaseModel):  # pylint: disable=too-many-instance-attributes
         Whether the repository is a blob (default: ``False``).
     include_submodules : bool
         Whether to clone submodules (default: ``False``).
+    backend : CloneBackend
+        How the files are fetched (default: ``CloneBackend.GIT``).
+    checkout : bool
+        Whether to write the files of the commit to ``local_path`` (default: ``True``). If ``False``, the commit is
+        only fetched and ``HEAD`` points to it, so that its files can be read from the git objects; submodules are not
+        fetched.
+    blob_size_limit : int | None
+        If set, blobs larger than this many bytes are left out of the clone, and the files they hold are not checked
+        out (default: ``None``, every blob is fetched).
 
     """
 
@@ -40,3 +58,6 @@ class CloneConfig(BaseModel):  # pylint: disable=too-many-instance-attributes
     subpath: str = Field(default="/")
     blob: bool = Field(default=False)
     include_submodules: bool = Field(default=False)
+    backend: CloneBackend = Field(default=CloneBackend.GIT)
+    checkout: bool = Field(default=True)
+    blob_size_limit: int | None = Field(default=None, ge=0)
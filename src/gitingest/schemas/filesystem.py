@@ -8,7 +8,13 @@ from enum import Enum, auto
 from typing import TYPE_CHECKING
 
 from gitingest.utils.compat_func import readlink
-from gitingest.utils.file_utils import _decodes, _get_preferred_encodings, _read_chunk
+from gitingest.utils.file_utils import (
+    _CHUNK_SIZE,
+    _decodes,
+    _get_preferred_encodings,
+    _normalize_newlines,
+    _read_file,
+)
 from gitingest.utils.notebook import process_notebook
 
 if TYPE_CHECKING:
@@ -31,6 +37,7 @@ class FileSystemStats:
 
     total_files: int = 0
     total_size: int = 0
+    pruned_dirs: int = 0
 
 
 @dataclass
@@ -49,6 +56,8 @@ class FileSystemNode:  # pylint: disable=too-many-instance-attributes
     dir_count: int = 0
     depth: int = 0
     children: list[FileSystemNode] = field(default_factory=list)
+    token_count: int | None = field(default=None, compare=False)
+    _content: str | None = field(default=None, init=False, repr=False, compare=False)
 
     def sort_children(self) -> None:
         """Sort the children nodes of a directory according to a specific order.
@@ -96,7 +105,7 @@ class FileSystemNode:  # pylint: disable=too-many-instance-attributes
         parts = [
             SEPARATOR,
             f"{self.type.name}: {str(self.path_str).replace(os.sep, '/')}"
-            + (f" -> {readlink(self.path).name}" if self.type == FileSystemNodeType.SYMLINK else ""),
+            + (f" -> {self.symlink_target().name}" if self.type == FileSystemNodeType.SYMLINK else ""),
             SEPARATOR,
             f"{self.content}",
         ]
@@ -104,11 +113,42 @@ class FileSystemNode:  # pylint: disable=too-many-instance-attributes
         return "\n".join(parts) + "\n\n"
 
     @property
-    def content(self) -> str:  # pylint: disable=too-many-return-statements
+    def content(self) -> str:
         """Return file content (if text / notebook) or an explanatory placeholder.
 
-        Heuristically decides whether the file is text or binary by decoding a small chunk of the file
-        with multiple encodings and checking for common binary markers.
+        The file is read on first access and the result is kept on the node, so formatting a node several times
+        (e.g. for the line count, the digest and the token estimate) reads the file only once.
+
+        Returns
+        -------
+        str
+            The content of the file, or an error message if the file could not be read.
+
+        """
+        if self._content is None:
+            self._content = self._read_content()
+        return self._content
+
+    def release_content(self) -> None:
+        """Drop the memoised content of the node, e.g. once it has been written to a digest."""
+        self._content = None
+
+    def symlink_target(self) -> Path:
+        """Return the target of the symlink node.
+
+        Returns
+        -------
+        Path
+            The path the symlink points to, as stored in the link.
+
+        """
+        return readlink(self.path)
+
+    def _read_content(self) -> str:  # pylint: disable=too-many-return-statements
+        """Return file content (if text / notebook) or an explanatory placeholder.
+
+        The file is read into memory once. Whether it is text or binary is decided heuristically by decoding its first
+        bytes with multiple encodings, and the whole buffer is then decoded with the first encoding that fits.
 
         Returns
         -------
@@ -130,18 +170,20 @@ class FileSystemNode:  # pylint: disable=too-many-instance-attributes
 
         if self.path.suffix == ".ipynb":  # Notebook
             try:
-                return process_notebook(self.path)
+                return self._read_notebook()
             except Exception as exc:
                 return f"Error processing notebook: {exc}"
 
-        chunk = _read_chunk(self.path)
+        data = self._read_bytes()
 
-        if chunk is None:
+        if data is None:
             return "Error reading file"
 
-        if chunk == b"":
+        if data == b"":
             return "[Empty file]"
 
+        chunk = data[:_CHUNK_SIZE]
+
         if not _decodes(chunk, "utf-8"):
             return "[Binary file]"
 
@@ -155,7 +197,14 @@ class FileSystemNode:  # pylint: disable=too-many-instance-attributes
             return "Error: Unable to decode file with available encodings"
 
         try:
-            with self.path.open(encoding=good_enc) as fp:
-                return fp.read()
-        except (OSError, UnicodeDecodeError) as exc:
+            return _normalize_newlines(data.decode(good_enc))
+        except (LookupError, UnicodeDecodeError) as exc:
             return f"Error reading file with {good_enc!r}: {exc}"
+
+    def _read_bytes(self) -> bytes | None:
+        """Return the raw content of the file, or ``None`` if it cannot be read."""
+        return _read_file(self.path)
+
+    def _read_notebook(self) -> str:
+        """Return the Jupyter notebook file converted to a Python script."""
+        return process_notebook(self.path)
@@ -7,7 +7,7 @@ from uuid import UUID  # noqa: TC003 (typing-only-standard-library-import) neede
 
 from pydantic import BaseModel, Field
 
-from gitingest.config import MAX_FILE_SIZE
+from gitingest.config import DEFAULT_READ_WORKERS, MAX_FILE_SIZE
 from gitingest.schemas.cloning import CloneConfig
 
 
@@ -42,12 +42,20 @@ class IngestionQuery(BaseModel):  # pylint: disable=too-many-instance-attributes
         The tag of the repository.
     max_file_size : int
         The maximum file size to ingest in bytes (default: 10 MB).
+    read_workers : int
+        The number of threads used to read file contents concurrently (default: 8).
     ignore_patterns : set[str]
         The patterns to ignore (default: ``set()``).
     include_patterns : set[str] | None
         The patterns to include.
     include_submodules : bool
         Whether to include all Git submodules within the repository. (default: ``False``)
+    from_git_objects : bool
+        Whether to read the files from the git objects of the cloned commit instead of a checkout of it
+        (default: ``False``). Submodules are not included.
+    filter_large_blobs : bool
+        Whether to leave the files larger than ``max_file_size`` out of the clone, instead of fetching them only to
+        skip them (default: ``False``).
     s3_url : str | None
         The S3 URL where the digest is stored if S3 is enabled.
 
@@ -66,9 +74,12 @@ class IngestionQuery(BaseModel):  # pylint: disable=too-many-instance-attributes
     commit: str | None = None
     tag: str | None = None
     max_file_size: int = Field(default=MAX_FILE_SIZE)
+    read_workers: int = Field(default=DEFAULT_READ_WORKERS, ge=1)
     ignore_patterns: set[str] = Field(default_factory=set)  # TODO: ssame type for ignore_* and include_* patterns
     include_patterns: set[str] | None = None
     include_submodules: bool = Field(default=False)
+    from_git_objects: bool = Field(default=False)
+    filter_large_blobs: bool = Field(default=False)
     s3_url: str | None = None
 
     def extract_clone_config(self) -> CloneConfig:
@@ -98,4 +109,6 @@ class IngestionQuery(BaseModel):  # pylint: disable=too-many-instance-attributes
             subpath=self.subpath,
             blob=self.type == "blob",
             include_submodules=self.include_submodules,
+            checkout=not self.from_git_objects,
+            blob_size_limit=self.max_file_size if self.filter_large_blobs else None,
         )
@@ -0,0 +1,209 @@
+"""Utility functions for downloading repositories as archives (tarballs) instead of cloning them."""
+
+from __future__ import annotations
+
+import io
+import os
+import shutil
+import tarfile
+from contextlib import suppress
+from pathlib import Path, PurePosixPath
+from typing import TYPE_CHECKING, Iterator
+from urllib.parse import urlparse
+
+import httpx
+
+from gitingest.utils.compat_func import removesuffix
+from gitingest.utils.exceptions import ArchiveDownloadCancelledError
+from gitingest.utils.git_utils import is_github_host
+from gitingest.utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    import threading
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+# Tarball endpoint of every supported host, formatted with the repository ``path`` (``owner/repo``), its ``name``,
+# and the ``commit`` SHA
+_ARCHIVE_URL_TEMPLATES: dict[str, str] = {
+    "github.com": "https://codeload.github.com/{path}/tar.gz/{commit}",
+    "gitlab.com": "https://gitlab.com/{path}/-/archive/{commit}/{name}-{commit}.tar.gz",
+    "bitbucket.org": "https://bitbucket.org/{path}/get/{commit}.tar.gz",
+    "gitea.com": "https://gitea.com/{path}/archive/{commit}.tar.gz",
+    "codeberg.org": "https://codeberg.org/{path}/archive/{commit}.tar.gz",
+}
+_CHUNK_SIZE = 1024 * 1024  # Bytes read from the network and written to disk at a time
+_DOWNLOAD_TIMEOUT = httpx.Timeout(30.0)  # Seconds without progress before the download fails
+
+
+def get_archive_url(url: str, commit: str, token: str | None = None) -> tuple[str, dict[str, str]] | None:
+    """Return the URL and headers to download ``commit`` of the repository at ``url`` as a gzipped tarball.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the repository.
+    commit : str
+        The commit SHA to download.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    tuple[str, dict[str, str]] | None
+        The archive URL and the HTTP headers to send, or ``None`` if the host does not provide archives (or does not
+        provide them with a token).
+
+    """
+    parsed = urlparse(url)
+    path = removesuffix(parsed.path, ".git").strip("/")
+    if not path:
+        return None
+
+    if token:
+        if not is_github_host(url):
+            return None
+        # Public GitHub vs. GitHub Enterprise
+        base_api = "https://api.github.com" if parsed.netloc == "github.com" else f"https://{parsed.netloc}/api/v3"
+        return f"{base_api}/repos/{path}/tarball/{commit}", {"Authorization": f"Bearer {token}"}
+
+    template = _ARCHIVE_URL_TEMPLATES.get(parsed.netloc)
+    if template is None:
+        return None
+    return template.format(path=path, name=path.rsplit("/", 1)[-1], commit=commit), {}
+
+
+def download_archive(
+    archive_url: str,
+    local_path: Path,
+    *,
+    headers: dict[str, str] | None = None,
+    subpath: str = "/",
+    cancelled: threading.Event | None = None,
+) -> None:
+    """Download the tarball at ``archive_url`` and extract it into ``local_path`` while it is being downloaded.
+
+    The archive is never stored: it is decompressed and unpacked as it streams in. Like ``git archive`` output, the
+    tarball is expected to contain a single top-level directory, which is stripped.
+
+    Parameters
+    ----------
+    archive_url : str
+        The URL of the tarball.
+    local_path : Path
+        The directory to extract the repository into.
+    headers : dict[str, str] | None
+        The HTTP headers to send (e.g. for authentication).
+    subpath : str
+        Only the files below this path (relative to the repository root) are extracted (default: ``"/"``).
+    cancelled : threading.Event | None
+        Stops the download when set.
+
+    """
+    with httpx.stream(
+        "GET",
+        archive_url,
+        headers=headers,
+        follow_redirects=True,
+        timeout=_DOWNLOAD_TIMEOUT,
+    ) as response:
+        response.raise_for_status()
+        stream = io.BufferedReader(_ChunkStream(response.iter_bytes(_CHUNK_SIZE), cancelled), buffer_size=_CHUNK_SIZE)
+        with tarfile.open(fileobj=stream, mode="r|*") as tar:
+            extract_archive(tar, local_path, subpath=subpath)
+
+
+def extract_archive(tar: tarfile.TarFile, local_path: Path, *, subpath: str = "/") -> None:
+    """Extract the files, directories and symlinks of ``tar`` into ``local_path``, stripping the top-level directory.
+
+    Members are processed in archive order, so ``tar`` may be opened in streaming mode. Members whose path is absolute
+    or contains ``..`` are skipped, as are devices, FIFOs and hard links, which git never produces.
+
+    Parameters
+    ----------
+    tar : tarfile.TarFile
+        The archive to extract.
+    local_path : Path
+        The directory to extract the repository into.
+    subpath : str
+        Only the files below this path (relative to the repository root) are extracted (default: ``"/"``).
+
+    """
+    prefix = subpath.strip("/")
+    local_path.mkdir(parents=True, exist_ok=True)
+    root = os.path.realpath(local_path)
+    has_symlinks = False
+
+    for member in tar:
+        member_path = PurePosixPath(member.name)
+        parts = member_path.parts[1:]  # Strip the top-level directory
+        if not parts or member_path.is_absolute() or ".." in member_path.parts:
+            continue
+
+        rel_path = "/".join(parts)
+        if prefix and rel_path != prefix and not rel_path.startswith(f"{prefix}/"):
+            continue
+
+        target = local_path.joinpath(*parts)
+        # Never write through a symlink extracted earlier, as it may point outside of ``local_path``
+        if has_symlinks and not _is_within(os.path.realpath(target.parent), root):
+            continue
+
+        if member.isdir():
+            target.mkdir(parents=True, exist_ok=True)
+        elif member.isfile():
+            _extract_file(tar, member, target)
+        elif member.issym():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with suppress(OSError):  # e.g. symlinks are not permitted on Windows
+                os.symlink(member.linkname, target)
+                has_symlinks = True
+
+
+def _is_within(path: str, root: str) -> bool:
+    """Return ``True`` if the resolved ``path`` is ``root`` or below it."""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def _extract_file(tar: tarfile.TarFile, member: tarfile.TarInfo, target: Path) -> None:
+    """Write the content of the regular file ``member`` to ``target``, keeping its executable bit."""
+    source = tar.extractfile(member)
+    if source is None:
+        return
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # A symlink extracted earlier at the same path may point outside of the destination: replace it, never follow it
+    if target.is_symlink():
+        target.unlink()
+    with source, target.open("wb") as destination:
+        shutil.copyfileobj(source, destination, _CHUNK_SIZE)
+    if member.mode & 0o111:
+        target.chmod(0o755)
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only binary stream over an iterator of byte chunks, e.g. the body of an HTTP response."""
+
+    def __init__(self, chunks: Iterator[bytes], cancelled: threading.Event | None = None) -> None:
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:  # type: ignore[override]
+        if self._cancelled is not None and self._cancelled.is_set():
+            raise ArchiveDownloadCancelledError
+
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self._pending = chunk
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
@@ -25,3 +25,11 @@ class InvalidGitHubTokenError(ValueError):
             "https://github.com/settings/tokens/new?description=gitingest&scopes=repo."
         )
         super().__init__(msg)
+
+
+class EncodingLoadError(Exception):
+    """Exception raised when a ``tiktoken`` encoding cannot be loaded (e.g. its BPE file cannot be downloaded)."""
+
+
+class ArchiveDownloadCancelledError(Exception):
+    """Exception raised when the download of a repository archive is cancelled (e.g. because the clone timed out)."""
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import locale
 import platform
+from functools import lru_cache
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -17,24 +18,25 @@ except locale.Error:
 _CHUNK_SIZE = 1024  # bytes
 
 
-def _get_preferred_encodings() -> list[str]:
-    """Get list of encodings to try, prioritized for the current platform.
+@lru_cache(maxsize=1)
+def _get_preferred_encodings() -> tuple[str, ...]:
+    """Get the encodings to try, prioritized for the current platform.
 
     Returns
     -------
-    list[str]
-        List of encoding names to try in priority order, starting with the
+    tuple[str, ...]
+        Encoding names to try in priority order, starting with the
         platform's default encoding followed by common fallback encodings.
 
     """
     encodings = [locale.getpreferredencoding(), "utf-8", "utf-16", "utf-16le", "utf-8-sig", "latin"]
     if platform.system() == "Windows":
         encodings += ["cp1252", "iso-8859-1"]
-    return list(dict.fromkeys(encodings))
+    return tuple(dict.fromkeys(encodings))
 
 
-def _read_chunk(path: Path) -> bytes | None:
-    """Attempt to read the first *size* bytes of *path* in binary mode.
+def _read_file(path: Path) -> bytes | None:
+    """Read the whole content of *path* in binary mode.
 
     Parameters
     ----------
@@ -44,12 +46,12 @@ def _read_chunk(path: Path) -> bytes | None:
     Returns
     -------
     bytes | None
-        The first ``_CHUNK_SIZE`` bytes of ``path``, or ``None`` on any ``OSError``.
+        The content of ``path``, or ``None`` on any ``OSError``.
 
     """
     try:
         with path.open("rb") as fp:
-            return fp.read(_CHUNK_SIZE)
+            return fp.read()
     except OSError:
         return None
 
@@ -75,3 +77,22 @@ def _decodes(chunk: bytes, encoding: str) -> bool:
     except UnicodeDecodeError:
         return False
     return True
+
+
+def _normalize_newlines(text: str) -> str:
+    """Translate Windows and classic Mac OS line endings to Unix ones, as reading a file in text mode would.
+
+    Parameters
+    ----------
+    text : str
+        The decoded text.
+
+    Returns
+    -------
+    str
+        The text with universal newlines translated.
+
+    """
+    if "\r" not in text:
+        return text
+    return text.replace("\r\n", "\n").replace("\r", "\n")
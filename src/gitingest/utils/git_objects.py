@@ -0,0 +1,223 @@
+"""Utilities for reading the files of a commit straight from the git object database, without a checkout."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import IO
+
+from gitingest.schemas import FileSystemNode
+from gitingest.utils.logging_config import get_logger
+from gitingest.utils.notebook import process_notebook_content
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+_SYMLINK_MODE = "120000"
+_PROMISOR_CONFIG = r"^(extensions\.partialclone|remote\..*\.promisor)$"  # Set in partial clones
+
+
+@dataclass(frozen=True)
+class GitTreeEntry:
+    """A file, symlink or submodule listed in the tree of a commit."""
+
+    mode: str  # e.g. ``100644`` for a regular file, ``120000`` for a symlink, ``160000`` for a submodule
+    object_type: str  # ``blob`` or ``commit`` (submodule)
+    object_id: str
+    size: int | None  # Size of the blob in bytes (``0`` for submodules), ``None`` if a partial clone left it out
+    path: str  # Path relative to the repository root, with ``/`` separators
+
+    @property
+    def is_symlink(self) -> bool:
+        """Whether the entry is a symlink, whose blob holds the link target."""
+        return self.mode == _SYMLINK_MODE
+
+
+def list_tree(repo_path: Path, commit: str, subpath: str = "") -> list[GitTreeEntry]:
+    """List the blobs and submodules in the tree of ``commit``, with their sizes, using ``git ls-tree -r -l``.
+
+    In a partial clone, ``git ls-tree -l`` would fetch every blob left out by the filter to report its size, so the
+    sizes are looked up among the objects of the repository instead, and the blobs left out get a ``None`` size.
+
+    Parameters
+    ----------
+    repo_path : Path
+        The path to the git repository.
+    commit : str
+        The commit (or any tree-ish) to list.
+    subpath : str
+        Only the entries at or below this path (relative to the repository root) are listed (default: everything).
+
+    Returns
+    -------
+    list[GitTreeEntry]
+        The entries of the tree, in git's order (sorted by path).
+
+    """
+    partial_clone = bool(_git_output(repo_path, "config", "--get-regexp", _PROMISOR_CONFIG, check=False).strip())
+    args = ["ls-tree", "-r", *([] if partial_clone else ["-l"]), "-z", "--full-tree", commit]
+    if subpath:
+        args += ["--", subpath]
+
+    entries = []
+    for record in _git_output(repo_path, "--literal-pathspecs", *args).split(b"\0"):
+        if not record:
+            continue
+        # <mode> SP <type> SP <object> [SP+ <size>] TAB <path>
+        meta, path = record.split(b"\t", 1)
+        mode, object_type, object_id, *size = meta.decode().split()
+        entries.append(
+            GitTreeEntry(
+                mode=mode,
+                object_type=object_type,
+                object_id=object_id,
+                size=(int(size[0]) if size[0].isdigit() else 0) if size else None,
+                path=os.fsdecode(path),
+            ),
+        )
+
+    if partial_clone:
+        sizes = _object_sizes(repo_path)
+        entries = [
+            replace(entry, size=sizes.get(entry.object_id, 0 if entry.object_type != "blob" else None))
+            for entry in entries
+        ]
+    return entries
+
+
+def _object_sizes(repo_path: Path) -> dict[str, int]:
+    """Return the size of every object present in the repository, without fetching any missing one."""
+    output = _git_output(repo_path, "cat-file", "--batch-all-objects", "--batch-check=%(objectname) %(objectsize)")
+    return {object_id: int(size) for object_id, size in (line.split() for line in output.decode().splitlines())}
+
+
+def _git_output(repo_path: Path, *args: str, check: bool = True) -> bytes:
+    """Run a git command in ``repo_path`` and return its output.
+
+    Raises
+    ------
+    RuntimeError
+        If the command fails and ``check`` is set, e.g. because the commit is not in the repository.
+
+    """
+    cmd = ["git", "-C", str(repo_path), *args]
+    result = subprocess.run(cmd, capture_output=True, check=False)  # noqa: S603
+    if check and result.returncode != 0:
+        msg = f"Command failed: {' '.join(cmd)}\nError: {result.stderr.decode(errors='replace').strip()}"
+        raise RuntimeError(msg)
+    return result.stdout
+
+
+class GitObjectReader:
+    """Read blobs from a git repository through a single long-lived ``git cat-file --batch`` process.
+
+    The process is started on the first read and reused for every blob, so reading a file costs one round trip on a
+    pipe instead of spawning ``git``. Reads are serialised, so a reader can be shared by the threads reading file
+    contents ahead of the formatter.
+    """
+
+    def __init__(self, repo_path: Path) -> None:
+        self.repo_path = repo_path
+        self._process: subprocess.Popen[bytes] | None = None
+        self._lock = threading.Lock()
+
+    def read(self, object_id: str) -> bytes | None:
+        """Return the content of the blob ``object_id``, or ``None`` if it is missing from the repository.
+
+        Parameters
+        ----------
+        object_id : str
+            The SHA of the blob.
+
+        Returns
+        -------
+        bytes | None
+            The content of the blob, or ``None`` if it cannot be read.
+
+        """
+        with self._lock:
+            try:
+                return self._request(object_id)
+            except (OSError, ValueError) as exc:
+                logger.warning("Failed to read git object", extra={"object_id": object_id, "error": str(exc)})
+                self._stop()
+                return None
+
+    def close(self) -> None:
+        """Stop the ``git cat-file`` process."""
+        with self._lock:
+            self._stop()
+
+    def _request(self, object_id: str) -> bytes | None:
+        """Send ``object_id`` to the ``git cat-file`` process and return the content of the blob it answers with."""
+        stdin, stdout = self._pipes()
+        stdin.write(object_id.encode() + b"\n")
+        stdin.flush()
+
+        # "<object> <type> <size>" followed by the content and a newline, or "<object> missing"
+        header = stdout.readline().split()
+        if not header:
+            msg = "git cat-file exited"
+            raise OSError(msg)
+        if len(header) != 3:  # noqa: PLR2004
+            logger.warning("Git object not found", extra={"object_id": object_id})
+            return None
+
+        data = stdout.read(int(header[2]))
+        stdout.read(1)
+        return data
+
+    def _pipes(self) -> tuple[IO[bytes], IO[bytes]]:
+        """Return the stdin and stdout of the ``git cat-file`` process, starting it if needed."""
+        if self._process is None:
+            self._process = subprocess.Popen(  # noqa: S603
+                ["git", "-C", str(self.repo_path), "cat-file", "--batch"],  # noqa: S607
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        if self._process.stdin is None or self._process.stdout is None:
+            msg = "git cat-file was started without pipes"
+            raise OSError(msg)
+        return self._process.stdin, self._process.stdout
+
+    def _stop(self) -> None:
+        process, self._process = self._process, None
+        if process is None:
+            return
+        if process.stdin is not None:
+            process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        if process.stdout is not None:
+            process.stdout.close()
+
+
+@dataclass
+class GitBlobNode(FileSystemNode):
+    """File or symlink node whose content is read from a git blob instead of the file system."""
+
+    object_id: str = ""
+    reader: GitObjectReader | None = field(default=None, repr=False, compare=False)
+
+    def symlink_target(self) -> Path:
+        """Return the target of the symlink node, which git stores as the content of its blob."""
+        return Path(os.fsdecode(self._read_bytes() or b""))
+
+    def _read_bytes(self) -> bytes | None:
+        if self.reader is None:
+            return None
+        return self.reader.read(self.object_id)
+
+    def _read_notebook(self) -> str:
+        data = self._read_bytes()
+        if data is None:
+            msg = f"Git object {self.object_id} not found"
+            raise ValueError(msg)
+        return process_notebook_content(data, name=self.path_str)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import os
 import re
 import sys
 from pathlib import Path
@@ -28,6 +29,8 @@ logger = get_logger(__name__)
 #   - github_pat_                       → 22 alphanumerics + "_" + 59 alphanumerics
 _GITHUB_PAT_PATTERN: Final[str] = r"^(?:gh[pousr]_[A-Za-z0-9]{36}|github_pat_[A-Za-z0-9]{22}_[A-Za-z0-9]{59})$"
 
+_git_installed = False  # Set once ``ensure_git_installed`` succeeds, as git does not go away while we run
+
 
 def is_github_host(url: str) -> bool:
     """Check if a URL is from a GitHub host (github.com or GitHub Enterprise).
@@ -66,11 +69,13 @@ async def run_command(*args: str) -> tuple[bytes, bytes]:
         If command exits with a non-zero status.
 
     """
-    # Execute the requested command
+    # Execute the requested command. Git must fail instead of prompting for credentials, e.g. when resolving a
+    # commit of a repository that turns out to be private or missing.
     proc = await asyncio.create_subprocess_exec(
         *args,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
     )
     stdout, stderr = await proc.communicate()
     if proc.returncode != 0:
@@ -83,7 +88,8 @@ async def run_command(*args: str) -> tuple[bytes, bytes]:
 async def ensure_git_installed() -> None:
     """Ensure Git is installed and accessible on the system.
 
-    On Windows, this also checks whether Git is configured to support long file paths.
+    On Windows, this also checks whether Git is configured to support long file paths. The check only runs until it
+    succeeds once; later calls in the same process return immediately.
 
     Raises
     ------
@@ -91,6 +97,10 @@ async def ensure_git_installed() -> None:
         If Git is not installed or not accessible.
 
     """
+    global _git_installed  # noqa: PLW0603  # pylint: disable=global-statement
+    if _git_installed:
+        return
+
     try:
         await run_command("git", "--version")
     except RuntimeError as exc:
@@ -110,6 +120,8 @@ async def ensure_git_installed() -> None:
             # Ignore if checking 'core.longpaths' fails.
             pass
 
+    _git_installed = True
+
 
 async def check_repo_exists(url: str, token: str | None = None) -> bool:
     """Check whether a remote Git repository is reachable.
@@ -2,87 +2,224 @@
 
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import TYPE_CHECKING, AbstractSet
 
 from pathspec import PathSpec
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from gitingest.schemas import IngestionQuery
 
+_SPEC_CACHE_SIZE = 64  # Number of distinct compiled pattern sets kept in memory
 
-def _should_include(path: Path, base_path: Path, include_patterns: set[str]) -> bool:
-    """Return ``True`` if ``path`` matches any of ``include_patterns``.
 
-    Parameters
+@dataclass(frozen=True)
+class PathMatcher:
+    """Compiled include / ignore patterns used to filter paths during a single ingestion.
+
+    Compiling a ``PathSpec`` parses every pattern into a regular expression, which is far more expensive than
+    matching a path against it. The matcher is therefore built once per query and consulted for every entry.
+
+    Attributes
     ----------
-    path : Path
-        The absolute path of the file or directory to check.
+    ignore_spec : PathSpec | None
+        The compiled ignore patterns, or ``None`` if nothing is ignored.
+    include_spec : PathSpec | None
+        The compiled include patterns, or ``None`` if everything is included.
+    ignore_prunable : bool
+        Whether a directory matching ``ignore_spec`` can be skipped as a whole, i.e. no negated ignore pattern could
+        re-include one of its descendants.
+    include_anchors : tuple[tuple[str, ...], ...] | None
+        The path segments of every anchored include pattern, or ``None`` if at least one include pattern can match at
+        any depth (in which case no directory can be pruned based on the include patterns).
 
-    base_path : Path
-        The base directory from which the relative path is calculated.
+    """
 
-    include_patterns : set[str]
-        A set of patterns to check against the relative path.
+    ignore_spec: PathSpec | None = None
+    include_spec: PathSpec | None = None
+    ignore_prunable: bool = False
+    include_anchors: tuple[tuple[str, ...], ...] | None = None
+
+    @classmethod
+    def compile(
+        cls,
+        ignore_patterns: AbstractSet[str] | None,
+        include_patterns: AbstractSet[str] | None,
+    ) -> PathMatcher:
+        """Build a matcher from raw pattern sets, reusing previously compiled specs when possible.
+
+        Parameters
+        ----------
+        ignore_patterns : AbstractSet[str] | None
+            Patterns of paths to exclude.
+        include_patterns : AbstractSet[str] | None
+            Patterns of paths to include.
+
+        Returns
+        -------
+        PathMatcher
+            The compiled matcher.
+
+        """
+        return cls(
+            ignore_spec=_compile_spec(frozenset(ignore_patterns)) if ignore_patterns else None,
+            include_spec=_compile_spec(frozenset(include_patterns)) if include_patterns else None,
+            ignore_prunable=not any(pattern.startswith("!") for pattern in ignore_patterns or ()),
+            include_anchors=_include_anchors(include_patterns) if include_patterns else None,
+        )
+
+    @classmethod
+    def from_query(cls, query: IngestionQuery) -> PathMatcher:
+        """Build a matcher from the include and ignore patterns of ``query``.
+
+        Parameters
+        ----------
+        query : IngestionQuery
+            The parsed query object containing the include and ignore patterns.
+
+        Returns
+        -------
+        PathMatcher
+            The compiled matcher.
+
+        """
+        return cls.compile(query.ignore_patterns, query.include_patterns)
+
+    def is_excluded(self, rel_path: str) -> bool:
+        """Return ``True`` if ``rel_path`` matches any of the ignore patterns.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the file or directory relative to the repository root.
+
+        Returns
+        -------
+        bool
+            ``True`` if the path matches any of the ignore patterns, ``False`` otherwise.
+
+        """
+        return self.ignore_spec is not None and self.ignore_spec.match_file(rel_path)
+
+    def is_included(self, rel_path: str, *, is_dir: bool) -> bool:
+        """Return ``True`` if ``rel_path`` matches any of the include patterns.
+
+        Directories are always included so that their children are visited.
+
+        Parameters
+        ----------
+        rel_path : str
+            The path of the file or directory relative to the repository root.
+        is_dir : bool
+            Whether the path points to a directory.
+
+        Returns
+        -------
+        bool
+            ``True`` if the path matches any of the include patterns (or no include patterns are set),
+            ``False`` otherwise.
+
+        """
+        if self.include_spec is None or is_dir:
+            return True
+        return self.include_spec.match_file(rel_path)
+
+    def is_pruned(self, rel_dir: str) -> bool:
+        """Return ``True`` if no descendant of the directory ``rel_dir`` can end up in the digest.
+
+        A directory is pruned if it matches an ignore pattern as a directory (e.g. ``bin/``) and no negated ignore
+        pattern exists, or if none of the anchored include patterns (e.g. ``src/**/*.py``) can match below it.
+
+        Parameters
+        ----------
+        rel_dir : str
+            The path of the directory relative to the repository root.
+
+        Returns
+        -------
+        bool
+            ``True`` if the whole subtree can be skipped without listing it, ``False`` otherwise.
+
+        """
+        if self.ignore_prunable and self.ignore_spec is not None and self.ignore_spec.match_file(f"{rel_dir}/"):
+            return True
+
+        if self.include_anchors is None:
+            return False
+
+        parts = rel_dir.split("/")
+        return not any(_anchor_may_match(anchor, parts) for anchor in self.include_anchors)
+
+
+@lru_cache(maxsize=_SPEC_CACHE_SIZE)
+def _compile_spec(patterns: frozenset[str]) -> PathSpec:
+    """Compile ``patterns`` into a ``PathSpec``, caching the result by pattern set.
+
+    Parameters
+    ----------
+    patterns : frozenset[str]
+        The patterns to compile.
 
     Returns
     -------
-    bool
-        ``True`` if the path matches any of the include patterns, ``False`` otherwise.
+    PathSpec
+        The compiled ``PathSpec``.
 
     """
-    rel_path = _relative_or_none(path, base_path)
-    if rel_path is None:  # outside repo → do *not* include
-        return False
-    if path.is_dir():  # keep directories so children are visited
-        return True
+    return PathSpec.from_lines("gitwildmatch", sorted(patterns))
 
-    spec = PathSpec.from_lines("gitwildmatch", include_patterns)
-    return spec.match_file(str(rel_path))
 
+def _include_anchors(include_patterns: AbstractSet[str]) -> tuple[tuple[str, ...], ...] | None:
+    """Split anchored include patterns into path segments.
 
-def _should_exclude(path: Path, base_path: Path, ignore_patterns: set[str]) -> bool:
-    """Return ``True`` if ``path`` matches any of ``ignore_patterns``.
+    Following ``.gitignore`` semantics, a pattern is anchored to the repository root if it starts with a slash or
+    contains a slash anywhere but at its end. Negated patterns can only remove matches and are skipped.
 
     Parameters
     ----------
-    path : Path
-        The absolute path of the file or directory to check.
-    base_path : Path
-        The base directory from which the relative path is calculated.
-    ignore_patterns : set[str]
-        A set of patterns to check against the relative path.
+    include_patterns : AbstractSet[str]
+        The include patterns to split.
 
     Returns
     -------
-    bool
-        ``True`` if the path matches any of the ignore patterns, ``False`` otherwise.
+    tuple[tuple[str, ...], ...] | None
+        The segments of every anchored pattern, or ``None`` if any pattern may match at arbitrary depth.
 
     """
-    rel_path = _relative_or_none(path, base_path)
-    if rel_path is None:  # outside repo → already "excluded"
-        return True
+    anchors: list[tuple[str, ...]] = []
+    for pattern in include_patterns:
+        if not pattern or pattern.startswith(("!", "#")):
+            continue
 
-    spec = PathSpec.from_lines("gitwildmatch", ignore_patterns)
-    return spec.match_file(str(rel_path))
+        body = pattern.rstrip("/")
+        if "/" not in body or "\\" in body:  # unanchored, or escapes we do not interpret
+            return None
 
+        anchors.append(tuple(body.lstrip("/").split("/")))
+    return tuple(anchors)
 
-def _relative_or_none(path: Path, base: Path) -> Path | None:
-    """Return *path* relative to *base* or ``None`` if *path* is outside *base*.
+
+def _anchor_may_match(anchor: tuple[str, ...], parts: list[str]) -> bool:
+    """Return ``True`` if the anchored pattern ``anchor`` can match the directory ``parts`` or a path below it.
 
     Parameters
     ----------
-    path : Path
-        The absolute path of the file or directory to check.
-    base : Path
-        The base directory from which the relative path is calculated.
+    anchor : tuple[str, ...]
+        The segments of an anchored include pattern.
+    parts : list[str]
+        The components of a directory path relative to the repository root.
 
     Returns
     -------
-    Path | None
-        The relative path of ``path`` to ``base``, or ``None`` if ``path`` is outside ``base``.
+    bool
+        ``True`` if a descendant of the directory may match the pattern, ``False`` otherwise.
 
     """
-    try:
-        return path.relative_to(base)
-    except ValueError:  # path is not a sub-path of base
-        return None
+    for segment, part in zip(anchor, parts):
+        if segment == "**":
+            return True
+        if not fnmatchcase(part, segment):
+            return False
+    return True
@@ -0,0 +1,313 @@
+"""Persistent cache of bare repository mirrors, shared by all clones of the same remote repository."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import shutil
+from collections import Counter
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import IO, AsyncIterator, Iterator
+from urllib.parse import urlparse
+
+from gitingest.config import MIRROR_CACHE_MAX_BYTES, MIRROR_CACHE_PATH
+from gitingest.utils.compat_func import removesuffix
+from gitingest.utils.git_utils import run_command
+from gitingest.utils.logging_config import get_logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: mirrors are then only locked within the process
+    fcntl = None
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+_LAST_USED_MARKER = "gitingest-last-used"  # File touched every time a mirror is used, for LRU eviction
+_SAFE_SEGMENT = re.compile(r"^[A-Za-z0-9._-]+$")
+_FULL_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+class MirrorCache:
+    """Local bare mirrors of remote repositories from which per-request clones are materialized.
+
+    Every remote repository (keyed by host, owner and name) gets one bare mirror under ``root``. A clone fetches only
+    the commits missing from the mirror, then creates a repository at the requested path whose object store
+    hard-links the mirror's immutable pack files, so the network transfer and most of the disk writes happen once per
+    commit instead of once per request. Because the clone does not reference the mirror afterwards, it can be deleted
+    like any other clone, and a mirror can be evicted while clones made from it are still being ingested.
+
+    A lock per mirror serializes fetches, so concurrent requests for the same repository share a single fetch. When
+    the mirrors exceed ``max_bytes``, the least recently used ones are deleted, except those in use: the lock is also
+    taken by eviction, and is backed by a file lock, so that it holds across worker processes sharing ``root``.
+
+    Attributes
+    ----------
+    root : Path
+        The directory holding the mirrors.
+    max_bytes : int
+        The disk budget of all mirrors together.
+
+    """
+
+    def __init__(self, root: Path, max_bytes: int = MIRROR_CACHE_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._locks: dict[Path, asyncio.Lock] = {}
+        self._lock_users: Counter[Path] = Counter()
+
+    def mirror_path(self, url: str) -> Path | None:
+        """Return the location of the mirror of ``url``, or ``None`` if the URL cannot be mirrored.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the remote repository.
+
+        Returns
+        -------
+        Path | None
+            ``<root>/<host>/<owner>/<repo>.git``, or ``None`` for non-HTTP(S) URLs and paths that are not safe to use
+            as directory names.
+
+        """
+        parsed = urlparse(url)
+        if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+            return None
+
+        segments = [parsed.hostname, *removesuffix(parsed.path, ".git").strip("/").split("/")]
+        min_segments = 3  # host, owner and repository name
+        if len(segments) < min_segments or not all(_SAFE_SEGMENT.match(s) and s.strip(".") for s in segments):
+            return None
+
+        *parents, name = segments
+        return self.root.joinpath(*parents, f"{name}.git")
+
+    def can_clone(self, url: str, commit: str) -> bool:
+        """Return ``True`` if ``commit`` of ``url`` can be cloned through the cache.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the remote repository.
+        commit : str
+            The commit to clone.
+
+        Returns
+        -------
+        bool
+            ``True`` if the URL can be mirrored and ``commit`` is a full commit SHA, ``False`` otherwise.
+
+        """
+        return self.mirror_path(url) is not None and _FULL_SHA.match(commit) is not None
+
+    async def clone(self, url: str, commit: str, local_path: str) -> None:
+        """Create a repository at ``local_path`` containing ``commit`` of ``url``, without checking it out.
+
+        The commit is fetched into the mirror first unless it is already there. The new repository has ``url`` as
+        its ``origin`` remote, so sparse checkouts and submodule updates behave like in a regular clone.
+
+        Parameters
+        ----------
+        url : str
+            The URL of the remote repository.
+        commit : str
+            The full SHA of the commit to make available.
+        local_path : str
+            The directory in which to create the repository.
+
+        Raises
+        ------
+        ValueError
+            If ``url`` and ``commit`` cannot be cloned through the cache.
+
+        """
+        mirror = self.mirror_path(url)
+        if mirror is None or not self.can_clone(url, commit):
+            msg = f"Cannot clone {url!r} at {commit!r} through the mirror cache"
+            raise ValueError(msg)
+
+        loop = asyncio.get_running_loop()
+        async with self._lock(mirror):
+            await self._fetch(mirror, url, commit)
+
+            await run_command("git", "init", "--quiet", local_path)
+            await loop.run_in_executor(None, _link_objects, mirror, Path(local_path) / ".git")
+            await run_command("git", "-C", local_path, "remote", "add", "origin", url)
+
+            (mirror / _LAST_USED_MARKER).touch()
+
+        await self._evict()
+
+    @asynccontextmanager
+    async def _lock(self, mirror: Path, *, blocking: bool = True) -> AsyncIterator[bool]:
+        """Lock ``mirror`` against the other clones and evictions, of this process and of other processes.
+
+        Yields whether the lock was acquired, which is always the case when ``blocking``. The lock of a mirror is
+        dropped once no coroutine of this process uses it anymore.
+        """
+        lock = self._locks.setdefault(mirror, asyncio.Lock())
+        self._lock_users[mirror] += 1
+        try:
+            async with lock:
+                file_lock = _FileLock(mirror)
+                try:
+                    loop = asyncio.get_running_loop()
+                    yield await loop.run_in_executor(None, partial(file_lock.acquire, blocking=blocking))
+                finally:
+                    file_lock.release()
+        finally:
+            self._lock_users[mirror] -= 1
+            if not self._lock_users[mirror]:
+                del self._lock_users[mirror], self._locks[mirror]
+
+    async def _fetch(self, mirror: Path, url: str, commit: str) -> None:
+        """Fetch ``commit`` into ``mirror``, creating the mirror if needed."""
+        if not (mirror / "HEAD").exists():
+            logger.info("Creating repository mirror", extra={"url": url, "mirror": str(mirror)})
+            mirror.parent.mkdir(parents=True, exist_ok=True)
+            await run_command("git", "init", "--quiet", "--bare", str(mirror))
+            # Keep fetched objects in packs, so that materializing a clone only links a handful of files
+            await run_command("git", "-C", str(mirror), "config", "fetch.unpackLimit", "1")
+
+        try:
+            await run_command("git", "-C", str(mirror), "cat-file", "-e", f"{commit}^{{commit}}")
+        except RuntimeError:
+            pass
+        else:
+            logger.debug("Commit already mirrored", extra={"url": url, "commit": commit})
+            return
+
+        logger.info("Fetching commit into mirror", extra={"url": url, "commit": commit})
+        # The ref keeps the commit reachable, so that garbage collection of the mirror does not drop it
+        refspec = f"+{commit}:refs/gitingest/{commit}"
+        await run_command("git", "-C", str(mirror), "fetch", "--quiet", "--depth=1", "--no-tags", url, refspec)
+
+    async def _evict(self) -> None:
+        """Delete the least recently used mirrors until all mirrors fit in ``max_bytes``, skipping those in use."""
+        loop = asyncio.get_running_loop()
+        mirrors = await loop.run_in_executor(None, _mirrors_by_last_use, self.root)
+
+        total = sum(size for size, _ in mirrors)
+        for size, mirror in mirrors:
+            if total <= self.max_bytes:
+                break
+            if mirror in self._locks:  # In use by this process
+                continue
+            async with self._lock(mirror, blocking=False) as locked:
+                if not locked:  # In use by another process
+                    continue
+                logger.info("Evicting repository mirror", extra={"mirror": str(mirror), "size": size})
+                await loop.run_in_executor(None, partial(shutil.rmtree, mirror, ignore_errors=True))
+            total -= size
+
+
+class _FileLock:
+    """Exclusive ``fcntl`` lock of a mirror, shared by all processes.
+
+    The lock file lives next to the mirror rather than inside it, so that evicting the mirror does not delete a lock
+    that other processes are waiting for. Without ``fcntl``, acquiring the lock always succeeds.
+    """
+
+    def __init__(self, mirror: Path) -> None:
+        self.path = mirror.with_name(f"{mirror.name}.lock")
+        self._file: IO[bytes] | None = None
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        """Acquire the lock, waiting for it if ``blocking``. Return ``False`` if it is held elsewhere otherwise."""
+        if fcntl is None:
+            return True
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file = self.path.open("ab")
+        try:
+            fcntl.flock(file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            file.close()
+            return False
+        self._file = file
+        return True
+
+    def release(self) -> None:
+        """Release the lock, if acquired."""
+        if self._file is not None:
+            self._file.close()  # Closing the file releases the lock
+            self._file = None
+
+
+def _link_objects(mirror: Path, git_dir: Path) -> None:
+    """Hard-link the object store of ``mirror`` into ``git_dir``, copying files that cannot be linked.
+
+    Parameters
+    ----------
+    mirror : Path
+        The bare mirror to take the objects from.
+    git_dir : Path
+        The ``.git`` directory of the repository receiving the objects.
+
+    """
+    source_root = mirror / "objects"
+    target_root = git_dir / "objects"
+    for dirpath, dirnames, filenames in os.walk(source_root):
+        # Skip metadata (e.g. alternates) and the temporary files of interrupted fetches
+        dirnames[:] = [name for name in dirnames if name != "info" and not name.startswith("incoming-")]
+        target_dir = target_root / Path(dirpath).relative_to(source_root)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for name in filenames:
+            if name.startswith("tmp_"):
+                continue
+            source, target = Path(dirpath) / name, target_dir / name
+            try:
+                os.link(source, target)
+            except OSError:  # e.g. the mirror is on another file system
+                shutil.copy2(source, target)
+
+    # The mirror only holds the history down to the fetched commits
+    shallow = mirror / "shallow"
+    if shallow.exists():
+        shutil.copy2(shallow, git_dir / "shallow")
+
+
+def _mirrors_by_last_use(root: Path) -> list[tuple[int, Path]]:
+    """Return the size and location of every mirror below ``root``, least recently used first."""
+    mirrors = []
+    for mirror in _iter_mirrors(root):
+        marker = mirror / _LAST_USED_MARKER
+        last_used = marker.stat().st_mtime if marker.exists() else 0.0
+        mirrors.append((last_used, _disk_usage(mirror), mirror))
+    return [(size, mirror) for _, size, mirror in sorted(mirrors)]
+
+
+def _iter_mirrors(root: Path) -> Iterator[Path]:
+    """Yield every mirror below ``root``."""
+    for dirpath, dirnames, _ in os.walk(root):
+        for name in list(dirnames):
+            if name.endswith(".git"):
+                dirnames.remove(name)
+                yield Path(dirpath) / name
+
+
+def _disk_usage(path: Path) -> int:
+    """Return the total size in bytes of the files below ``path``."""
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            with suppress(OSError):  # deleted by a concurrent git process
+                total += (Path(dirpath) / name).stat().st_size
+    return total
+
+
+@lru_cache(maxsize=1)
+def default_mirror_cache() -> MirrorCache:
+    """Return the mirror cache shared by all clones of this process, stored at ``MIRROR_CACHE_PATH``.
+
+    Returns
+    -------
+    MirrorCache
+        The shared mirror cache.
+
+    """
+    return MirrorCache(MIRROR_CACHE_PATH)
@@ -44,6 +44,43 @@ def process_notebook(file: Path, *, include_output: bool = True) -> str:
         msg = f"Invalid JSON in notebook: {file}"
         raise InvalidNotebookError(msg) from exc
 
+    return _convert_notebook(notebook, include_output=include_output)
+
+
+def process_notebook_content(data: bytes, *, name: str, include_output: bool = True) -> str:
+    """Process the raw content of a Jupyter notebook and return an executable Python script as a string.
+
+    Parameters
+    ----------
+    data : bytes
+        The content of the Jupyter notebook file.
+    name : str
+        The name of the notebook, used in error messages.
+    include_output : bool
+        Whether to include cell outputs in the generated script (default: ``True``).
+
+    Returns
+    -------
+    str
+        The executable Python script as a string.
+
+    Raises
+    ------
+    InvalidNotebookError
+        If the notebook is invalid or cannot be processed.
+
+    """
+    try:
+        notebook: dict[str, Any] = json.loads(data.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        msg = f"Invalid JSON in notebook: {name}"
+        raise InvalidNotebookError(msg) from exc
+
+    return _convert_notebook(notebook, include_output=include_output)
+
+
+def _convert_notebook(notebook: dict[str, Any], *, include_output: bool) -> str:
+    """Convert a parsed Jupyter notebook to an executable Python script."""
     # Check if the notebook contains worksheets
     worksheets = notebook.get("worksheets")
     if worksheets:
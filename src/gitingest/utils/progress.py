@@ -0,0 +1,101 @@
+"""Progress events of an ingestion (clone, walk, format, upload), reported to whoever is listening."""
+
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+_reporter: ContextVar[ProgressReporter | None] = ContextVar("gitingest_progress_reporter", default=None)
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """The progress of an ingestion at some point in time.
+
+    Attributes
+    ----------
+    stage : str
+        The stage of the ingestion: ``clone``, ``walk``, ``format``, ``store``, or a stage of the caller's own.
+    message : str
+        What is being done within the stage, e.g. the step of the clone.
+    counters : dict[str, int]
+        Counts of work done and limits of the stage, e.g. ``files`` and ``max_files`` while walking the repository.
+    timestamp : float
+        When the event was reported (Unix timestamp).
+
+    """
+
+    stage: str
+    message: str = ""
+    counters: dict[str, int] = field(default_factory=dict)
+    timestamp: float = field(default_factory=time.time)
+
+
+class ProgressReporter:
+    """Receiver of the progress events reported while it is active, at most one per stage every ``min_interval``.
+
+    Events are reported from hot loops (e.g. once per file walked), so the ones following an event of the same stage
+    by less than ``min_interval`` seconds are dropped before being built. The first event of a stage and events
+    reported with ``force`` are always passed on.
+
+    Attributes
+    ----------
+    callback : Callable[[ProgressEvent], None]
+        Called with every event passed on, from the thread that reported it.
+    min_interval : float
+        The minimum number of seconds between two events of the same stage.
+
+    """
+
+    def __init__(self, callback: Callable[[ProgressEvent], None], min_interval: float = 0.25) -> None:
+        self.callback = callback
+        self.min_interval = min_interval
+        self._last_stage = ""
+        self._last_time = 0.0
+        self._lock = threading.Lock()
+
+    def due(self, stage: str, *, force: bool = False) -> bool:
+        """Return ``True`` if an event of ``stage`` reported now would be passed on, and count it as passed on."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and stage == self._last_stage and now - self._last_time < self.min_interval:
+                return False
+            self._last_stage, self._last_time = stage, now
+            return True
+
+    @contextmanager
+    def activate(self) -> Iterator[ProgressReporter]:
+        """Receive the progress events reported in the current context (and the tasks and threads it starts)."""
+        token = _reporter.set(self)
+        try:
+            yield self
+        finally:
+            _reporter.reset(token)
+
+
+def report_progress(stage: str, message: str = "", *, force: bool = False, **counters: int) -> None:
+    """Report the progress of the ingestion to the active ``ProgressReporter``, if any.
+
+    This is cheap enough to call for every file: without an active reporter it returns immediately, and with one it
+    only builds an event when the reporter is due for one.
+
+    Parameters
+    ----------
+    stage : str
+        The stage of the ingestion.
+    message : str
+        What is being done within the stage.
+    force : bool
+        Pass the event on even if an event of the same stage was just reported, e.g. for the last one of the stage.
+    **counters : int
+        Counts of work done and limits of the stage.
+
+    """
+    reporter = _reporter.get()
+    if reporter is None or not reporter.due(stage, force=force):
+        return
+    reporter.callback(ProgressEvent(stage=stage, message=message, counters=counters))
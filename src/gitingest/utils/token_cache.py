@@ -0,0 +1,207 @@
+"""Persistent cache of per-file token counts, keyed by content hash."""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Mapping
+
+from gitingest.config import TOKEN_CACHE_MAX_ENTRIES, TOKEN_CACHE_PATH
+from gitingest.utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+_SQLITE_MAX_PARAMS = 900  # Stay below SQLite's default limit of 999 bound parameters per statement
+_SQLITE_TIMEOUT = 30  # Seconds to wait for another process holding the database lock
+
+_SELECT_COUNTS = "SELECT digest, tokens FROM token_counts WHERE encoding = ? AND digest IN ({placeholders})"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS token_counts (
+    encoding TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    tokens INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (encoding, digest)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS token_counts_last_used ON token_counts (last_used);
+"""
+
+
+class TokenCountCache:
+    """SQLite-backed cache mapping the hash of a text and an encoding name to the text's token count.
+
+    Files rarely change between two ingestions of the same repository, so the token counts of unchanged files can be
+    looked up instead of being recounted. The cache is bounded to ``max_entries`` rows; the least recently used rows
+    are evicted first. It is safe to share between threads and processes.
+
+    A cache that cannot be opened or written (e.g. a read-only or corrupted database) logs a warning once and then
+    behaves as an empty cache, so token counting never fails because of it.
+
+    Attributes
+    ----------
+    path : Path
+        The location of the SQLite database.
+    max_entries : int
+        The maximum number of token counts kept in the cache.
+
+    """
+
+    def __init__(self, path: Path, max_entries: int = TOKEN_CACHE_MAX_ENTRIES) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+        self._size = 0  # Upper bound of the number of rows, so that they are only counted when eviction is likely
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        """Return the cache key of ``text``.
+
+        Parameters
+        ----------
+        text : str
+            The text whose token count is cached.
+
+        Returns
+        -------
+        bytes
+            A 128-bit BLAKE2b digest of the UTF-8 encoded text.
+
+        """
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get_many(self, encoding_name: str, digests: Iterable[bytes]) -> dict[bytes, int]:
+        """Return the cached token counts of ``digests`` and mark them as recently used.
+
+        Parameters
+        ----------
+        encoding_name : str
+            The name of the encoding the counts were computed with.
+        digests : Iterable[bytes]
+            The cache keys to look up.
+
+        Returns
+        -------
+        dict[bytes, int]
+            The token count of every digest found in the cache.
+
+        """
+        keys = list(dict.fromkeys(digests))
+        found: dict[bytes, int] = {}
+
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not keys:
+                return found
+
+            try:
+                for start in range(0, len(keys), _SQLITE_MAX_PARAMS):
+                    chunk = keys[start : start + _SQLITE_MAX_PARAMS]
+                    placeholders = ",".join("?" * len(chunk))
+                    query = _SELECT_COUNTS.format(placeholders=placeholders)
+                    found.update(conn.execute(query, (encoding_name, *chunk)))
+
+                if found:
+                    now = time.time()
+                    with conn:
+                        conn.executemany(
+                            "UPDATE token_counts SET last_used = ? WHERE encoding = ? AND digest = ?",
+                            ((now, encoding_name, digest) for digest in found),
+                        )
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+        return found
+
+    def put_many(self, encoding_name: str, counts: Mapping[bytes, int]) -> None:
+        """Store the token counts of ``counts``, evicting the least recently used entries beyond ``max_entries``.
+
+        Parameters
+        ----------
+        encoding_name : str
+            The name of the encoding the counts were computed with.
+        counts : Mapping[bytes, int]
+            The token count of every cache key.
+
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None or not counts:
+                return
+
+            now = time.time()
+            try:
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO token_counts (encoding, digest, tokens, last_used) VALUES (?,?,?,?)",
+                        ((encoding_name, digest, tokens, now) for digest, tokens in counts.items()),
+                    )
+                    self._size += len(counts)
+                    if self._size > self.max_entries:
+                        self._evict(conn)
+            except sqlite3.Error as exc:
+                self._disable(exc)
+
+    def close(self) -> None:
+        """Close the database connection. The cache reopens it on next use."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Delete the least recently used rows beyond ``max_entries``."""
+        (self._size,) = conn.execute("SELECT COUNT(*) FROM token_counts").fetchone()
+        if self._size > self.max_entries:
+            conn.execute(
+                "DELETE FROM token_counts WHERE (encoding, digest) IN "
+                "(SELECT encoding, digest FROM token_counts ORDER BY last_used LIMIT ?)",
+                (self._size - self.max_entries,),
+            )
+            logger.debug("Evicted token counts", extra={"evicted": self._size - self.max_entries})
+            self._size = self.max_entries
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Return the database connection, opening the database and creating its schema on first use."""
+        if self._conn is None and not self._disabled:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=_SQLITE_TIMEOUT, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                (self._size,) = conn.execute("SELECT COUNT(*) FROM token_counts").fetchone()
+            except (OSError, sqlite3.Error) as exc:
+                self._disable(exc)
+            else:
+                self._conn = conn
+        return self._conn
+
+    def _disable(self, exc: Exception) -> None:
+        """Stop using the cache after an error."""
+        logger.warning("Token count cache unavailable", extra={"path": str(self.path), "error": str(exc)})
+        self._disabled = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+@lru_cache(maxsize=1)
+def default_token_cache() -> TokenCountCache:
+    """Return the token count cache shared by all ingestions of this process, stored at ``TOKEN_CACHE_PATH``.
+
+    Returns
+    -------
+    TokenCountCache
+        The shared token count cache.
+
+    """
+    return TokenCountCache(TOKEN_CACHE_PATH)
@@ -0,0 +1,418 @@
+"""Utility functions for estimating the number of tokens in a digest."""
+
+from __future__ import annotations
+
+import multiprocessing
+import ssl
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Sequence
+
+from gitingest.config import DEFAULT_TOKEN_THREADS, TOKEN_BATCH_SIZE, TOKEN_PROCESS_POOL_THRESHOLD
+from gitingest.utils.exceptions import EncodingLoadError
+from gitingest.utils.logging_config import get_logger
+
+if TYPE_CHECKING:
+    import tiktoken
+
+    from gitingest.schemas import FileSystemNode
+    from gitingest.utils.token_cache import TokenCountCache
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"  # gpt-4o, gpt-4o-mini
+
+_TOKEN_THRESHOLDS: list[tuple[int, str]] = [
+    (1_000_000, "M"),
+    (1_000, "k"),
+]
+
+_BATCHES_IN_FLIGHT_PER_PROCESS = 2  # Number of batches queued per worker process before the writer waits
+
+_Batch = Sequence["FileSystemNode | None"]
+
+# Encodings shared by every ingestion of the process, loaded on first use (see ``get_encoding``)
+_ENCODINGS: dict[str, tiktoken.Encoding] = {}
+_ENCODING_LOAD_SECONDS: dict[str, float] = {}
+_ENCODINGS_LOCK = threading.Lock()
+
+
+def get_encoding(name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    """Return the ``tiktoken`` encoding ``name``, loading it once per process on first use.
+
+    ``tiktoken`` itself is only imported here, so importing ``gitingest`` does not pay for it, and loading an
+    encoding (which may download its BPE file) happens once rather than on every ingestion. Concurrent first calls
+    wait for a single load. Failed loads are not cached, so a later call tries again.
+
+    Parameters
+    ----------
+    name : str
+        The name of the encoding (default: ``"o200k_base"``).
+
+    Returns
+    -------
+    tiktoken.Encoding
+        The loaded encoding.
+
+    Raises
+    ------
+    EncodingLoadError
+        If the encoding is unknown or its BPE file cannot be downloaded or read.
+
+    """
+    encoding = _ENCODINGS.get(name)
+    if encoding is not None:
+        return encoding
+
+    with _ENCODINGS_LOCK:
+        encoding = _ENCODINGS.get(name)
+        if encoding is None:
+            encoding = _load_encoding(name)
+            _ENCODINGS[name] = encoding
+    return encoding
+
+
+def warm_up_encoding(name: str = DEFAULT_ENCODING) -> float | None:
+    """Load the encoding ``name`` ahead of time, e.g. at server startup, so that no ingestion waits for it.
+
+    Parameters
+    ----------
+    name : str
+        The name of the encoding (default: ``"o200k_base"``).
+
+    Returns
+    -------
+    float | None
+        The number of seconds it took to load the encoding, or ``None`` if it could not be loaded.
+
+    """
+    try:
+        get_encoding(name)
+    except EncodingLoadError as exc:
+        logger.warning("Failed to pre-load tiktoken encoding", extra={"encoding": name, "error": str(exc)})
+        return None
+    return encoding_load_seconds(name)
+
+
+def encoding_load_seconds(name: str = DEFAULT_ENCODING) -> float | None:
+    """Return how long loading the encoding ``name`` took, or ``None`` if it has not been loaded in this process.
+
+    Parameters
+    ----------
+    name : str
+        The name of the encoding (default: ``"o200k_base"``).
+
+    Returns
+    -------
+    float | None
+        The load time in seconds, including the import of ``tiktoken`` and the download of the BPE file, if any.
+
+    """
+    return _ENCODING_LOAD_SECONDS.get(name)
+
+
+def _load_encoding(name: str) -> tiktoken.Encoding:
+    """Import ``tiktoken`` and load the encoding ``name``, recording the time it took."""
+    start = time.perf_counter()
+
+    # Imported lazily: ``tiktoken`` (and ``requests``, used to download BPE files) is only needed to count tokens
+    import requests.exceptions  # noqa: PLC0415
+    import tiktoken  # noqa: PLC0415
+
+    try:
+        encoding = tiktoken.get_encoding(name)
+    except (requests.exceptions.RequestException, ssl.SSLError, OSError, ValueError) as exc:
+        msg = f"Failed to load tiktoken encoding {name!r}: {exc}"
+        raise EncodingLoadError(msg) from exc
+
+    _ENCODING_LOAD_SECONDS[name] = elapsed = time.perf_counter() - start
+    logger.debug("Loaded tiktoken encoding", extra={"encoding": name, "seconds": round(elapsed, 3)})
+    return encoding
+
+
+class TokenCounter:  # pylint: disable=too-many-instance-attributes
+    """Incrementally count the tokens of a digest while it is being written.
+
+    Every file is encoded on its own rather than as part of the whole digest: the separators between files are token
+    boundaries, so the sum of the per-file counts is the token count of the digest, and the digest never has to be
+    held in memory to be counted.
+
+    Texts are queued and encoded in file-aligned batches of about ``batch_size`` characters with
+    ``Encoding.encode_batch``, which releases the GIL and encodes the batch on ``threads`` threads. Once the digest has
+    grown past ``process_threshold`` characters, further batches are handed to a pool of ``threads`` worker processes
+    instead and counted while the digest is still being written. Either way, the counts are the same as those of the
+    serial path.
+
+    With a ``cache``, the counts of texts that have been counted before (typically unchanged files of a repository
+    that is ingested again) are looked up by content hash, and only the remaining texts are encoded.
+
+    If the encoding cannot be loaded or a text cannot be encoded, a warning is logged once and counting stops; the
+    total is then ``None``.
+
+    Attributes
+    ----------
+    encoding_name : str
+        The name of the ``tiktoken`` encoding used to count tokens.
+    threads : int
+        The number of threads (or worker processes) used to encode a batch. With a single thread, texts are encoded
+        serially in the calling thread.
+    batch_size : int
+        The number of characters queued before a batch is encoded.
+    process_threshold : int
+        The number of characters after which batches are encoded in worker processes.
+    cache : TokenCountCache | None
+        The persistent cache of token counts consulted before encoding a batch, if any.
+
+    """
+
+    def __init__(
+        self,
+        encoding_name: str = DEFAULT_ENCODING,
+        *,
+        threads: int = DEFAULT_TOKEN_THREADS,
+        batch_size: int = TOKEN_BATCH_SIZE,
+        process_threshold: int = TOKEN_PROCESS_POOL_THRESHOLD,
+        cache: TokenCountCache | None = None,
+    ) -> None:
+        self.encoding_name = encoding_name
+        self.threads = threads
+        self.batch_size = batch_size
+        self.process_threshold = process_threshold
+        self.cache = cache
+
+        self._total: int | None = 0
+        self._file_counts: dict[str, int] = {}
+        self._encoding: tiktoken.Encoding | None = None
+
+        self._batch_nodes: list[FileSystemNode | None] = []
+        self._batch_texts: list[str] = []
+        self._batch_chars = 0
+        self._seen_chars = 0
+
+        self._pool: ProcessPoolExecutor | None = None
+        self._processes_failed = False
+        self._in_flight: deque[tuple[_Batch, list[str], list[bytes] | None, Future[list[int]]]] = deque()
+
+    @property
+    def total(self) -> int | None:
+        """Return the number of tokens counted so far, or ``None`` if counting failed."""
+        self.flush()
+        return self._total
+
+    @property
+    def file_counts(self) -> dict[str, int]:
+        """Return the number of tokens of every counted file, keyed by its path relative to the repository root."""
+        self.flush()
+        return self._file_counts
+
+    def add(self, text: str) -> None:
+        """Queue ``text`` to be counted towards the total.
+
+        Parameters
+        ----------
+        text : str
+            The text to count, e.g. the directory structure or a separator.
+
+        """
+        self._queue(None, text)
+
+    def add_file(self, node: FileSystemNode, text: str) -> None:
+        """Queue the digest entry of ``node`` to be counted and recorded as the node's token count.
+
+        Parameters
+        ----------
+        node : FileSystemNode
+            The file or symlink node the text belongs to.
+        text : str
+            The ``content_string`` of the node.
+
+        """
+        self._queue(node, text)
+
+    def flush(self) -> None:
+        """Count every queued text and wait for the batches being counted in worker processes."""
+        self._submit_batch()
+        while self._in_flight:
+            self._collect_oldest()
+        self.close()
+
+    def close(self) -> None:
+        """Shut the worker processes down, dropping the batches they have not counted yet.
+
+        Called once the digest has been written, or has failed to be. The counts recorded so far remain available.
+        """
+        for *_, future in self._in_flight:
+            future.cancel()
+        self._in_flight.clear()
+
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _queue(self, node: FileSystemNode | None, text: str) -> None:
+        """Add ``text`` to the current batch, encoding the batch once it is full."""
+        if self._total is None:
+            return
+
+        self._batch_nodes.append(node)
+        self._batch_texts.append(text)
+        self._batch_chars += len(text)
+        self._seen_chars += len(text)
+
+        if self._batch_chars >= self.batch_size:
+            self._submit_batch()
+
+    def _submit_batch(self) -> None:
+        """Encode the current batch, in this process or in the worker pool."""
+        nodes, texts = self._batch_nodes, self._batch_texts
+        self._batch_nodes, self._batch_texts, self._batch_chars = [], [], 0
+
+        if not texts or self._total is None:
+            return
+
+        digests: list[bytes] | None = None
+        if self.cache is not None:
+            nodes, texts, digests = self._record_cached(self.cache, nodes, texts)
+            if not texts:
+                return
+
+        encoding = self._get_encoding()
+        if encoding is None:
+            return
+
+        if self._use_processes:
+            if self._pool is None:
+                # Spawned rather than forked: the digest writer runs reader threads, which must not be forked
+                self._pool = ProcessPoolExecutor(self.threads, mp_context=multiprocessing.get_context("spawn"))
+                logger.debug("Counting tokens in worker processes", extra={"processes": self.threads})
+
+            self._in_flight.append((nodes, texts, digests, self._pool.submit(_count_batch, encoding, texts)))
+            while len(self._in_flight) > self.threads * _BATCHES_IN_FLIGHT_PER_PROCESS:
+                self._collect_oldest()
+            return
+
+        self._record(nodes, self._count_locally(encoding, texts), digests=digests)
+
+    def _collect_oldest(self) -> None:
+        """Wait for the oldest batch sent to the worker pool and record its counts."""
+        nodes, texts, digests, future = self._in_flight.popleft()
+        try:
+            counts: list[int] | None = future.result()
+        except (ValueError, UnicodeEncodeError) as exc:
+            logger.warning("Failed to estimate token size", extra={"error": str(exc)})
+            counts = None
+        except (BrokenProcessPool, OSError) as exc:
+            # If the worker processes die (e.g. out of memory), count the remaining batches in this process instead
+            if not self._processes_failed:
+                logger.warning("Token counting workers failed, counting locally", extra={"error": str(exc)})
+                self._processes_failed = True
+            counts = self._count_locally(self._encoding, texts) if self._encoding is not None else None
+        self._record(nodes, counts, digests=digests)
+
+    @property
+    def _use_processes(self) -> bool:
+        """Return ``True`` if the digest is large enough for batches to be encoded in worker processes."""
+        return self.threads > 1 and not self._processes_failed and self._seen_chars >= self.process_threshold
+
+    def _count_locally(self, encoding: tiktoken.Encoding, texts: list[str]) -> list[int] | None:
+        """Return the token count of every text, encoded on ``threads`` threads, or ``None`` if an error occurs."""
+        try:
+            if self.threads > 1 and len(texts) > 1:
+                token_lists = encoding.encode_batch(texts, num_threads=self.threads, disallowed_special=())
+                return [len(tokens) for tokens in token_lists]
+            return _count_batch(encoding, texts)
+        except (ValueError, UnicodeEncodeError) as exc:
+            logger.warning("Failed to estimate token size", extra={"error": str(exc)})
+            return None
+
+    def _record_cached(
+        self,
+        cache: TokenCountCache,
+        nodes: _Batch,
+        texts: list[str],
+    ) -> tuple[_Batch, list[str], list[bytes]]:
+        """Record the counts of the texts found in ``cache`` and return the nodes, texts and digests left to encode."""
+        digests = [cache.digest(text) for text in texts]
+        cached = cache.get_many(self.encoding_name, digests)
+        if not cached:
+            return nodes, texts, digests
+
+        misses = [i for i, digest in enumerate(digests) if digest not in cached]
+        hits = [i for i, digest in enumerate(digests) if digest in cached]
+        self._record([nodes[i] for i in hits], [cached[digests[i]] for i in hits])
+        return [nodes[i] for i in misses], [texts[i] for i in misses], [digests[i] for i in misses]
+
+    def _record(self, nodes: _Batch, counts: list[int] | None, *, digests: list[bytes] | None = None) -> None:
+        """Add the counts of a batch to the total and per-file counts, and cache them under ``digests``."""
+        if self._total is None:
+            return
+
+        if counts is None:
+            self._total = None
+            return
+
+        if self.cache is not None and digests is not None:
+            self.cache.put_many(self.encoding_name, dict(zip(digests, counts)))
+
+        for node, count in zip(nodes, counts):
+            self._total += count
+            if node is not None:
+                node.token_count = count
+                self._file_counts[node.path_str] = count
+
+    def _get_encoding(self) -> tiktoken.Encoding | None:
+        """Return the encoding, loading it on first use, or ``None`` (and stop counting) if it cannot be loaded."""
+        if self._encoding is None:
+            try:
+                self._encoding = get_encoding(self.encoding_name)
+            except EncodingLoadError as exc:
+                # If the encoding cannot be loaded (e.g. network errors), skip token count estimation
+                logger.warning("Failed to load tiktoken encoding", extra={"error": str(exc)})
+                self._total = None
+        return self._encoding
+
+
+def _count_batch(encoding: tiktoken.Encoding, texts: list[str]) -> list[int]:
+    """Return the token count of every text, encoded serially.
+
+    This runs in the worker processes as well, so only the counts (not the tokens) are sent back.
+
+    Parameters
+    ----------
+    encoding : tiktoken.Encoding
+        The encoding used to count tokens. Registered encodings are pickled by name and loaded in the worker.
+    texts : list[str]
+        The texts to count.
+
+    Returns
+    -------
+    list[int]
+        The number of tokens in each text.
+
+    """
+    return [len(encoding.encode(text, disallowed_special=())) for text in texts]
+
+
+def format_token_count(total_tokens: int) -> str:
+    """Return a human-readable token-count string (e.g. 1.2k, 1.2 M).
+
+    Parameters
+    ----------
+    total_tokens : int
+        The number of tokens.
+
+    Returns
+    -------
+    str
+        The formatted number of tokens as a string (e.g., ``"1.2k"``, ``"1.2M"``).
+
+    """
+    for threshold, suffix in _TOKEN_THRESHOLDS:
+        if total_tokens >= threshold:
+            return f"{total_tokens / threshold:.1f}{suffix}"
+
+    return str(total_tokens)
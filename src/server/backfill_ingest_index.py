@@ -0,0 +1,27 @@
+"""Index the digests stored in S3 before the ingest ID index existed: ``python -m server.backfill_ingest_index``."""
+
+from __future__ import annotations
+
+import click
+
+# Import logging configuration first to intercept all logging
+from gitingest.utils.logging_config import get_logger
+from server.s3_utils import backfill_ingest_id_index
+
+logger = get_logger(__name__)
+
+
+@click.command()
+@click.option("--dry-run", is_flag=True, help="Count the digests to index without indexing them.")
+def main(*, dry_run: bool) -> None:
+    """Index every digest in the S3 bucket by its ingest ID, so that the download endpoint can find it.
+
+    Uses the S3 configuration of the server (``S3_*`` environment variables). Safe to run while the server is up,
+    and to run again: digests already indexed are skipped.
+    """
+    indexed = backfill_ingest_id_index(dry_run=dry_run)
+    click.echo(f"{'Would index' if dry_run else 'Indexed'} {indexed} digest(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Content encodings of the digests sent to clients and stored in S3 (gzip, and zstd if ``zstandard`` is installed)."""
+
+from __future__ import annotations
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Optional: zstd is only offered if ``zstandard`` is installed
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+
+def supported_encodings() -> tuple[str, ...]:
+    """Return the content encodings available, in order of preference."""
+    return (ZSTD, GZIP) if zstandard is not None else (GZIP,)
+
+
+class Compressor:
+    """Incremental compressor producing a ``Content-Encoding`` of ``encoding``.
+
+    Attributes
+    ----------
+    encoding : str
+        ``"gzip"`` or ``"zstd"``.
+
+    """
+
+    def __init__(self, encoding: str) -> None:
+        if encoding not in supported_encodings():
+            msg = f"Unsupported content encoding: {encoding!r} (expected one of {supported_encodings()})"
+            raise ValueError(msg)
+
+        self.encoding = encoding
+        if encoding == ZSTD:
+            self._compressor = zstandard.ZstdCompressor().compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        else:
+            self._compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)  # gzip container
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress ``data``, returning the compressed bytes available so far (possibly none)."""
+        return self._compressor.compress(data)
+
+    def flush_block(self) -> bytes:
+        """Return the rest of the data compressed so far, for the receiver to decode everything it got."""
+        return self._compressor.flush(self._flush_mode)
+
+    def finish(self) -> bytes:
+        """Return the end of the compressed stream. The compressor cannot be used afterwards."""
+        return self._compressor.flush()
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Return the content encoding to respond with, given the ``Accept-Encoding`` header of the request.
+
+    ``zstd`` (if ``zstandard`` is installed) is preferred over ``gzip``. Codings refused with ``q=0`` are skipped.
+
+    Parameters
+    ----------
+    accept_encoding : str | None
+        The value of the ``Accept-Encoding`` header.
+
+    Returns
+    -------
+    str | None
+        ``"zstd"``, ``"gzip"``, or ``None`` to respond uncompressed.
+
+    """
+    accepted: set[str] = set()
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+
+    for encoding in supported_encodings():
+        if encoding in accepted:
+            return encoding
+    return GZIP if "*" in accepted else None
@@ -0,0 +1,446 @@
+"""Caches of ingestion digests, keyed by repository, commit, subpath and patterns, stored on S3 or on local disk."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import suppress
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from prometheus_client import Counter
+
+from gitingest.utils.logging_config import get_logger
+from gitingest.utils.progress import report_progress
+from server.models import S3Metadata
+from server.s3_utils import (
+    _build_s3_url,
+    check_s3_object_exists,
+    get_metadata_from_s3,
+    is_s3_enabled,
+    upload_file_to_s3,
+    upload_metadata_to_s3,
+)
+from server.server_config import DIGEST_CACHE_ENABLED, DIGEST_CACHE_MAX_BYTES, DIGEST_CACHE_PATH
+
+if TYPE_CHECKING:
+    from pathlib import Path
+    from uuid import UUID
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+_local_digest_cache_counter = Counter(
+    "gitingest_local_digest_cache_lookups_total",
+    "Number of local digest cache lookups",
+    ["result"],
+)
+
+_SQLITE_TIMEOUT = 30  # Seconds to wait for another process holding the database lock
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    key TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    file_name TEXT NOT NULL,
+    ingest_id TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used);
+CREATE TABLE IF NOT EXISTS ingests (
+    ingest_id TEXT PRIMARY KEY,
+    key TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    file_name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ingests_key ON ingests (key);
+-- Digests stored before ingests had their own table
+INSERT OR IGNORE INTO ingests (ingest_id, key, content_hash, size, file_name)
+    SELECT ingest_id, key, content_hash, size, file_name FROM digests;
+"""
+
+
+@dataclass(frozen=True)
+class CachedDigest:
+    """A digest found in a cache.
+
+    Attributes
+    ----------
+    url : str
+        The URL from which the full digest can be downloaded.
+    metadata : S3Metadata | None
+        The summary, tree and displayed content of the digest, if they were stored along with it.
+
+    """
+
+    url: str
+    metadata: S3Metadata | None
+
+
+class DigestCache(ABC):
+    """Storage of digests, from which identical queries are served without cloning the repository again.
+
+    Keys follow the naming of ``generate_s3_file_path``: the host, owner, repository, commit, subpath and patterns of
+    the query.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> CachedDigest | None:
+        """Return the digest stored under ``key``, or ``None`` if there is none.
+
+        Parameters
+        ----------
+        key : str
+            The key of the digest.
+
+        Returns
+        -------
+        CachedDigest | None
+            The cached digest, or ``None`` on a cache miss.
+
+        """
+
+    @abstractmethod
+    def put(self, key: str, digest_file: Path, metadata: S3Metadata, ingest_id: UUID) -> str:
+        """Store the digest written to ``digest_file`` under ``key``.
+
+        The cache takes ownership of ``digest_file``: it is moved into the cache or deleted once stored.
+
+        Parameters
+        ----------
+        key : str
+            The key of the digest.
+        digest_file : Path
+            The file holding the full digest.
+        metadata : S3Metadata
+            The summary, tree and displayed content of the digest.
+        ingest_id : UUID
+            The ID of the ingest that produced the digest.
+
+        Returns
+        -------
+        str
+            The URL from which the full digest can be downloaded.
+
+        """
+
+
+class S3DigestCache(DigestCache):
+    """Digests stored in the S3 bucket configured through the environment, along with their metadata as JSON."""
+
+    def get(self, key: str) -> CachedDigest | None:
+        """Return the digest stored at the S3 path ``key``, or ``None`` if there is none."""
+        if not check_s3_object_exists(key):
+            return None
+        return CachedDigest(url=_build_s3_url(key), metadata=get_metadata_from_s3(key))
+
+    def put(self, key: str, digest_file: Path, metadata: S3Metadata, ingest_id: UUID) -> str:
+        """Upload the digest and its metadata to the S3 path ``key`` and return the public URL of the digest."""
+        try:
+            report_progress("store", "Uploading digest to S3", force=True, bytes=digest_file.stat().st_size)
+            s3_url = upload_file_to_s3(digest_file, s3_file_path=key, ingest_id=ingest_id)
+        finally:
+            digest_file.unlink(missing_ok=True)
+
+        try:
+            upload_metadata_to_s3(metadata=metadata, s3_file_path=key, ingest_id=ingest_id)
+            logger.info("Successfully uploaded metadata to S3")
+        except Exception as metadata_exc:
+            # Log the error but don't fail the entire request
+            logger.warning("Failed to upload metadata to S3", extra={"error": str(metadata_exc)})
+
+        return s3_url
+
+
+class LocalDigestCache(DigestCache):
+    """Digests stored on local disk, for deployments without S3.
+
+    Digest files are content-addressed: they are named after the SHA-256 of their content, so keys producing the
+    same digest share one file. A SQLite index maps every key to its file, its metadata and the latest ingest that
+    produced it, and every ingest to its file, which the download endpoint looks digests up by: the download URL
+    returned for an ingest keeps working when the same key is stored again. When the files exceed ``max_bytes``, the
+    least recently used keys are evicted with their ingests, along with the files no other ingest refers to.
+
+    The cache is safe to share between threads and processes. A cache whose index cannot be opened or written logs a
+    warning once and then behaves as an empty cache that stores nothing, leaving the digests where they were written.
+
+    Attributes
+    ----------
+    root : Path
+        The directory holding the index and the digest files.
+    max_bytes : int
+        The disk budget of the digest files.
+
+    """
+
+    def __init__(self, root: Path, max_bytes: int = DIGEST_CACHE_MAX_BYTES) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._disabled = False
+
+    def get(self, key: str) -> CachedDigest | None:
+        """Return the digest stored under ``key`` and mark it as recently used, or ``None`` if there is none."""
+        row = self._lookup("SELECT key, content_hash, ingest_id, metadata FROM digests WHERE key = ?", key)
+        _local_digest_cache_counter.labels(result="hit" if row else "miss").inc()
+        if row is None:
+            return None
+
+        _, ingest_id, metadata = row
+        return CachedDigest(
+            url=f"/api/download/file/{ingest_id}",
+            metadata=S3Metadata.model_validate_json(metadata),
+        )
+
+    def get_file(self, ingest_id: UUID) -> tuple[Path, str] | None:
+        """Return the digest file produced by the ingest ``ingest_id`` and its download name.
+
+        Parameters
+        ----------
+        ingest_id : UUID
+            The ID of the ingest that produced the digest.
+
+        Returns
+        -------
+        tuple[Path, str] | None
+            The path to the digest file and the name to download it as, or ``None`` if the digest is not cached.
+
+        """
+        row = self._lookup("SELECT key, content_hash, file_name FROM ingests WHERE ingest_id = ?", str(ingest_id))
+        if row is None:
+            return None
+
+        content_hash, file_name = row
+        return self._blob_path(content_hash), file_name
+
+    def put(self, key: str, digest_file: Path, metadata: S3Metadata, ingest_id: UUID) -> str:
+        """Move the digest into the cache under ``key`` and return its download URL.
+
+        If the cache is unavailable, the digest is left in ``digest_file``, from which the download endpoint serves
+        it as well.
+        """
+        url = f"/api/download/file/{ingest_id}"
+        content_hash, size = _hash_file(digest_file)
+        blob = self._blob_path(content_hash)
+        report_progress("store", "Storing digest", force=True, bytes=size)
+
+        row = (key, content_hash, size, digest_file.name, str(ingest_id), metadata.model_dump_json(), time.time())
+        ingest = (str(ingest_id), key, content_hash, size, digest_file.name)
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return url
+
+            moved = False
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO digests "
+                        "(key, content_hash, size, file_name, ingest_id, metadata, last_used) VALUES (?,?,?,?,?,?,?)",
+                        row,
+                    )
+                    conn.execute(
+                        "INSERT OR REPLACE INTO ingests "
+                        "(ingest_id, key, content_hash, size, file_name) VALUES (?,?,?,?,?)",
+                        ingest,
+                    )
+                    # Within the transaction, so that the key is not indexed if the file cannot be moved
+                    moved = _move_into(digest_file, blob)
+                    evicted = self._evict(conn, keep=key)
+            except (OSError, sqlite3.Error) as exc:
+                if moved:
+                    self._restore(conn, content_hash, digest_file)
+                self._disable(exc)
+                return url
+
+            # Only once the index no longer refers to them, in case the transaction is rolled back
+            for evicted_hash in evicted:
+                with suppress(FileNotFoundError):
+                    self._blob_path(evicted_hash).unlink()
+
+        logger.info("Stored digest in local cache", extra={"key": key, "content_hash": content_hash, "size": size})
+        return url
+
+    def close(self) -> None:
+        """Close the index. The cache reopens it on next use."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _lookup(self, query: str, value: str) -> tuple[str, ...] | None:
+        """Run ``query``, selecting the key and hash of a digest then other columns, and return all but the key.
+
+        The key of the digest is marked as recently used. A digest whose file is gone is dropped from the index.
+        """
+        with self._lock:
+            conn = self._connect()
+            if conn is None:
+                return None
+
+            try:
+                row = conn.execute(query, (value,)).fetchone()
+                if row is None:
+                    return None
+
+                key, content_hash = row[:2]
+                with conn:
+                    if not self._blob_path(content_hash).exists():
+                        # Deleted behind the cache's back (e.g. by a cleanup of the temporary directory)
+                        conn.execute("DELETE FROM digests WHERE content_hash = ?", (content_hash,))
+                        conn.execute("DELETE FROM ingests WHERE content_hash = ?", (content_hash,))
+                        return None
+                    conn.execute("UPDATE digests SET last_used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error as exc:
+                self._disable(exc)
+                return None
+
+        return row[1:]
+
+    def _evict(self, conn: sqlite3.Connection, keep: str) -> list[str]:
+        """Delete the least recently used keys but ``keep`` until the digest files fit in ``max_bytes``.
+
+        Returns the hashes of the files no ingest refers to anymore, to be deleted once the transaction is committed.
+        """
+        ingests = conn.execute("SELECT content_hash, size FROM ingests").fetchall()
+        sizes = dict(ingests)
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return []
+
+        # Every file is freed when the last ingest referring to it goes
+        references: dict[str, int] = {}
+        for content_hash, _ in ingests:
+            references[content_hash] = references.get(content_hash, 0) + 1
+
+        evicted: list[str] = []
+        keys = [key for (key,) in conn.execute("SELECT key FROM digests ORDER BY last_used")]
+        for key in keys:
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            hashes = conn.execute("SELECT content_hash FROM ingests WHERE key = ?", (key,)).fetchall()
+            conn.execute("DELETE FROM digests WHERE key = ?", (key,))
+            conn.execute("DELETE FROM ingests WHERE key = ?", (key,))
+            for (content_hash,) in hashes:
+                references[content_hash] -= 1
+                if references[content_hash]:
+                    continue
+                evicted.append(content_hash)
+                total -= sizes[content_hash]
+                logger.info("Evicted digest from local cache", extra={"key": key, "size": sizes[content_hash]})
+        return evicted
+
+    def _restore(self, conn: sqlite3.Connection, content_hash: str, digest_file: Path) -> None:
+        """Move the file of a digest that could not be indexed back to ``digest_file``, from which it is served too.
+
+        The file is copied instead if another ingest refers to it, e.g. one stored by another process meanwhile.
+        """
+        blob = self._blob_path(content_hash)
+        try:
+            query = "SELECT 1 FROM ingests WHERE content_hash = ? LIMIT 1"
+            referenced = conn.execute(query, (content_hash,)).fetchone() is not None
+        except sqlite3.Error:
+            referenced = True  # Keep the file when in doubt
+
+        try:
+            if referenced:
+                shutil.copyfile(blob, digest_file)
+            else:
+                shutil.move(str(blob), digest_file)
+        except OSError as exc:
+            logger.warning("Failed to restore digest file", extra={"path": str(digest_file), "error": str(exc)})
+
+    def _blob_path(self, content_hash: str) -> Path:
+        return self.root / "objects" / content_hash[:2] / f"{content_hash}.txt"
+
+    def _connect(self) -> sqlite3.Connection | None:
+        """Return the index connection, opening the index and creating its schema on first use."""
+        if self._conn is None and not self._disabled:
+            try:
+                self.root.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(self.root / "index.sqlite3", timeout=_SQLITE_TIMEOUT, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+            except (OSError, sqlite3.Error) as exc:
+                self._disable(exc)
+            else:
+                self._conn = conn
+        return self._conn
+
+    def _disable(self, exc: Exception) -> None:
+        """Stop using the cache after an error."""
+        logger.warning("Local digest cache unavailable", extra={"root": str(self.root), "error": str(exc)})
+        self._disabled = True
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _hash_file(path: Path) -> tuple[str, int]:
+    """Return the SHA-256 hex digest and the size of the file at ``path``."""
+    sha256 = hashlib.sha256()
+    size = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+            size += len(chunk)
+    return sha256.hexdigest(), size
+
+
+def _move_into(source: Path, target: Path) -> bool:
+    """Move ``source`` to ``target``, or delete it if ``target`` already exists (both have the same content).
+
+    Returns ``True`` if ``source`` was moved, ``False`` if it was deleted.
+    """
+    if target.exists():
+        source.unlink()
+        return False
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    temp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    shutil.move(str(source), temp)  # A rename, unless the cache is on another file system
+    temp.replace(target)
+    return True
+
+
+@lru_cache(maxsize=1)
+def default_local_digest_cache() -> LocalDigestCache:
+    """Return the local digest cache shared by all requests of this process, stored at ``DIGEST_CACHE_PATH``.
+
+    Returns
+    -------
+    LocalDigestCache
+        The shared local digest cache.
+
+    """
+    return LocalDigestCache(DIGEST_CACHE_PATH)
+
+
+def get_digest_cache() -> DigestCache | None:
+    """Return the digest cache configured for this deployment.
+
+    Returns
+    -------
+    DigestCache | None
+        The S3 cache if S3 is enabled, else the local cache if it is enabled, else ``None``.
+
+    """
+    if is_s3_enabled():
+        return S3DigestCache()
+    if DIGEST_CACHE_ENABLED:
+        return default_local_digest_cache()
+    return None
@@ -0,0 +1,193 @@
+"""Digests streamed to the client straight from the ingestion pipeline, optionally compressed."""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Callable
+
+from prometheus_client import Counter, Histogram
+
+from gitingest.ingestion import stream_ingest_query
+from gitingest.utils.logging_config import get_logger
+from server.compression import Compressor
+from server.server_config import DIGEST_STREAM_CHUNK_SIZE
+from server.worker_pool import ingest_pool, io_pool
+
+if TYPE_CHECKING:
+    from gitingest.schemas.ingestion import IngestionQuery
+    from server.worker_pool import WorkerPool
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+digest_stream_first_chunk_histogram = Histogram(
+    "gitingest_digest_stream_first_chunk_seconds",
+    "Time from the start of a streamed ingestion to its first chunk of digest",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+digest_stream_bytes_counter = Counter(
+    "gitingest_digest_stream_bytes_total",
+    "Number of bytes of digest streamed to clients, after compression",
+    ["encoding"],
+)
+
+# Polling interval of a producer waiting for room in the queue, to notice that the client went away
+_HAND_OVER_POLL_INTERVAL = 0.1
+
+
+class _StreamClosedError(Exception):
+    """Raised in the producer when the consumer stopped reading the stream."""
+
+
+class DigestStream:
+    """The digest of a cloned repository, produced by the ingestion while it is iterated over.
+
+    Iterating starts the ingestion in a worker thread, which writes the digest (the directory structure, a newline,
+    then the content of every file, as served by the download endpoint) to a bounded queue in chunks of about
+    ``chunk_size`` characters: a slow client slows the ingestion down instead of the digest piling up in memory.
+    The clone is removed once the stream ends, is closed or fails.
+
+    Attributes
+    ----------
+    query : IngestionQuery
+        The query of the cloned repository.
+    cleanup : Callable[[], None]
+        Removes the clone, called in the I/O pool once the stream is over.
+    chunk_size : int
+        The number of characters handed over to the event loop at once.
+    max_pending : int
+        The number of chunks produced ahead of the client.
+    summary : str | None
+        The summary of the digest, once the stream is over.
+
+    """
+
+    def __init__(
+        self,
+        query: IngestionQuery,
+        cleanup: Callable[[], None],
+        *,
+        chunk_size: int = DIGEST_STREAM_CHUNK_SIZE,
+        max_pending: int = 8,
+    ) -> None:
+        self.query = query
+        self.cleanup = cleanup
+        self.chunk_size = chunk_size
+        self.max_pending = max_pending
+        self.summary: str | None = None
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        """Run the ingestion and return the chunks of the digest as they are produced."""
+        return self._chunks()
+
+    async def _chunks(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[str] = asyncio.Queue(maxsize=self.max_pending)
+        closed = threading.Event()
+        started = time.perf_counter()
+        worker = asyncio.ensure_future(_stream_pool().run(self._produce, loop, queue, closed))
+        get: asyncio.Future[str] | None = None
+
+        try:
+            first = True
+            while True:
+                get = asyncio.ensure_future(queue.get())
+                await asyncio.wait({get, worker}, return_when=asyncio.FIRST_COMPLETED)
+                if not get.done():
+                    # The ingestion is over: pass on what it left in the queue, then its error, if any
+                    get.cancel()
+                    while not queue.empty():
+                        yield queue.get_nowait()
+                    worker.result()
+                    return
+
+                if first:
+                    digest_stream_first_chunk_histogram.observe(time.perf_counter() - started)
+                    first = False
+                yield get.result()
+        finally:
+            if get is not None:
+                get.cancel()
+            closed.set()
+            await asyncio.gather(worker, return_exceptions=True)
+            await io_pool().run(self.cleanup)
+
+    def _produce(self, loop: asyncio.AbstractEventLoop, queue: asyncio.Queue[str], closed: threading.Event) -> None:
+        """Run the ingestion, handing the digest over to ``queue`` in chunks of about ``chunk_size`` characters."""
+        buffer: list[str] = []
+        buffered = 0
+
+        def hand_over() -> None:
+            nonlocal buffered
+            if not buffer:
+                return
+            future = asyncio.run_coroutine_threadsafe(queue.put("".join(buffer)), loop)
+            buffer.clear()
+            buffered = 0
+            while not concurrent.futures.wait([future], timeout=_HAND_OVER_POLL_INTERVAL).done:
+                if closed.is_set():
+                    future.cancel()
+                    raise _StreamClosedError
+            future.result()
+
+        def sink(chunk: str) -> None:
+            nonlocal buffered
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= self.chunk_size:
+                hand_over()
+
+        try:
+            self.summary, _ = stream_ingest_query(self.query, sink=sink)
+            hand_over()
+        except _StreamClosedError:
+            logger.info("Digest stream closed by the client", extra={"ingest_id": str(self.query.id)})
+
+
+def _stream_pool() -> WorkerPool:
+    """Return the pool running the streamed ingestions: the ingestion pool, unless its workers are processes.
+
+    The digest is handed over chunk by chunk to the event loop, which a worker process cannot do, so streamed
+    ingestions then run in the I/O threads.
+    """
+    pool = ingest_pool()
+    return pool if pool.kind == "thread" else io_pool()
+
+
+async def encode_chunks(chunks: AsyncIterator[str], encoding: str | None) -> AsyncIterator[bytes]:
+    """Encode ``chunks`` in UTF-8, then compress them with ``encoding``.
+
+    The compressor is flushed after every chunk, so that the client can decode each chunk as soon as it arrives,
+    at the cost of a slightly lower compression ratio.
+
+    Parameters
+    ----------
+    chunks : AsyncIterator[str]
+        The chunks of the digest.
+    encoding : str | None
+        ``"zstd"``, ``"gzip"``, or ``None`` for no compression.
+
+    Yields
+    ------
+    bytes
+        The encoded chunks.
+
+    """
+    label = encoding or "identity"
+    compressor = Compressor(encoding) if encoding else None
+
+    async for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if compressor is not None:
+            data = compressor.compress(data) + compressor.flush_block()
+        if data:
+            digest_stream_bytes_counter.labels(encoding=label).inc(len(data))
+            yield data
+
+    if compressor is not None:
+        data = compressor.finish()
+        digest_stream_bytes_counter.labels(encoding=label).inc(len(data))
+        yield data
@@ -0,0 +1,321 @@
+"""Ingest jobs, queued by the job API and run by a fixed number of workers, independently of HTTP requests."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from uuid import UUID, uuid4
+
+from prometheus_client import Counter, Gauge
+
+from gitingest.utils.logging_config import get_logger
+from gitingest.utils.progress import ProgressEvent, ProgressReporter
+from server.models import IngestErrorResponse, IngestJobResponse, IngestRequest, IngestSuccessResponse, JobStatus
+from server.progress import DONE_STAGE, ProgressBroker
+from server.query_processor import process_query
+from server.server_config import JOB_QUEUE_SIZE, JOB_RESULT_TTL, JOB_WORKERS
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+jobs_counter = Counter("gitingest_jobs_total", "Number of ingest jobs, by final status", ["status"])
+jobs_queued_gauge = Gauge("gitingest_jobs_queued", "Number of ingest jobs waiting for a worker")
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when a job is submitted while the job queue is full."""
+
+
+@dataclass
+class IngestJob:
+    """An ingestion requested through the job API, with its state.
+
+    Attributes
+    ----------
+    request : IngestRequest
+        The parameters of the ingestion, including the token, which is never returned to clients.
+    id : UUID
+        The identifier of the job.
+    status : JobStatus
+        The state of the job.
+    created_at : float
+        When the job was submitted (Unix timestamp).
+    started_at : float | None
+        When the job started running (Unix timestamp).
+    finished_at : float | None
+        When the job finished (Unix timestamp).
+    result : IngestSuccessResponse | None
+        The result of the ingestion, once the job succeeded.
+    error : str | None
+        Error message describing what went wrong, once the job failed.
+
+    """
+
+    request: IngestRequest
+    id: UUID = field(default_factory=uuid4)
+    status: JobStatus = JobStatus.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    result: IngestSuccessResponse | None = None
+    error: str | None = None
+
+    def to_response(self, queue_position: int | None = None) -> IngestJobResponse:
+        """Return the API representation of the job.
+
+        Parameters
+        ----------
+        queue_position : int | None
+            The number of jobs ahead of this one in the queue, if it is queued.
+
+        Returns
+        -------
+        IngestJobResponse
+            The state of the job, without its request.
+
+        """
+        return IngestJobResponse(
+            job_id=str(self.id),
+            status=self.status,
+            queue_position=queue_position,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at,
+            result=self.result,
+            error=self.error,
+        )
+
+
+class JobBackend(ABC):
+    """Storage and queue of ingest jobs, shared by the API that submits them and the workers that run them."""
+
+    @abstractmethod
+    async def submit(self, job: IngestJob) -> None:
+        """Store ``job`` and queue it.
+
+        Raises
+        ------
+        JobQueueFullError
+            If the queue cannot take another job.
+
+        """
+
+    @abstractmethod
+    async def next_job(self) -> IngestJob:
+        """Wait for a queued job and take it off the queue."""
+
+    @abstractmethod
+    async def get(self, job_id: UUID) -> IngestJob | None:
+        """Return the job ``job_id``, or ``None`` if it does not exist (anymore)."""
+
+    @abstractmethod
+    async def save(self, job: IngestJob) -> None:
+        """Store the new state of ``job``."""
+
+    @abstractmethod
+    async def queue_position(self, job_id: UUID) -> int | None:
+        """Return the number of jobs ahead of ``job_id`` in the queue, or ``None`` if it is not queued."""
+
+
+class InMemoryJobBackend(JobBackend):
+    """Jobs kept in the memory of the server process, for a single-process deployment.
+
+    At most ``max_queue`` jobs wait for a worker. Finished jobs are kept for ``result_ttl`` seconds, for their results
+    to be polled, and then forgotten.
+
+    Attributes
+    ----------
+    max_queue : int
+        The number of jobs waiting for a worker, beyond which new jobs are rejected.
+    result_ttl : float
+        How long finished jobs are kept, in seconds.
+
+    """
+
+    def __init__(self, max_queue: int = JOB_QUEUE_SIZE, result_ttl: float = JOB_RESULT_TTL) -> None:
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._jobs: dict[UUID, IngestJob] = {}
+        self._queue: deque[UUID] = deque()
+        self._conditions: dict[asyncio.AbstractEventLoop, asyncio.Condition] = {}
+
+    async def submit(self, job: IngestJob) -> None:
+        """Store ``job`` and queue it, unless ``max_queue`` jobs are already queued."""
+        self._expire()
+        if len(self._queue) >= self.max_queue:
+            msg = "The server is busy (job queue is full), please try again later"
+            raise JobQueueFullError(msg)
+
+        self._jobs[job.id] = job
+        condition = self._condition()
+        async with condition:
+            self._queue.append(job.id)
+            jobs_queued_gauge.set(len(self._queue))
+            condition.notify()
+
+    async def next_job(self) -> IngestJob:
+        """Wait for a queued job and take it off the queue."""
+        condition = self._condition()
+        async with condition:
+            await condition.wait_for(lambda: bool(self._queue))
+            job_id = self._queue.popleft()
+            jobs_queued_gauge.set(len(self._queue))
+        return self._jobs[job_id]
+
+    async def get(self, job_id: UUID) -> IngestJob | None:
+        """Return the job ``job_id``, or ``None`` if it does not exist or expired."""
+        self._expire()
+        return self._jobs.get(job_id)
+
+    async def save(self, job: IngestJob) -> None:
+        """Store the new state of ``job`` (a no-op, as the backend holds the job object itself)."""
+        self._jobs[job.id] = job
+
+    async def queue_position(self, job_id: UUID) -> int | None:
+        """Return the number of jobs ahead of ``job_id`` in the queue, or ``None`` if it is not queued."""
+        try:
+            return self._queue.index(job_id)
+        except ValueError:
+            return None
+
+    def _condition(self) -> asyncio.Condition:
+        """Return the condition notifying the workers of new jobs, for the running event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._conditions:
+            self._conditions = {loop: asyncio.Condition()}  # Drop the conditions of closed loops
+        return self._conditions[loop]
+
+    def _expire(self) -> None:
+        """Forget the jobs that finished more than ``result_ttl`` seconds ago."""
+        deadline = time.time() - self.result_ttl
+        expired = [job.id for job in self._jobs.values() if job.finished_at is not None and job.finished_at < deadline]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class JobRunner:
+    """Runs the queued ingest jobs with ``workers`` concurrent workers, through ``process_query``.
+
+    The number of workers bounds the number of concurrent ingestions started through the job API, regardless of the
+    number of clients polling for results. The progress of every job (clone steps, files walked and written, digest
+    storage) is published to ``progress``, for clients to stream.
+
+    Attributes
+    ----------
+    backend : JobBackend
+        The storage and queue of the jobs.
+    workers : int
+        The number of jobs running at once.
+    progress : ProgressBroker
+        The broker the progress events of the jobs are published to.
+
+    """
+
+    def __init__(
+        self,
+        backend: JobBackend,
+        workers: int = JOB_WORKERS,
+        progress: ProgressBroker | None = None,
+    ) -> None:
+        self.backend = backend
+        self.workers = workers
+        self.progress = progress or ProgressBroker()
+        self._tasks: list[asyncio.Task[None]] = []
+        self._reporters: dict[UUID, ProgressReporter] = {}
+
+    def start(self) -> None:
+        """Start the workers on the running event loop."""
+        if not self._tasks:
+            self._tasks = [asyncio.ensure_future(self._work()) for _ in range(self.workers)]
+            logger.info("Started ingest job workers", extra={"workers": self.workers})
+
+    async def stop(self) -> None:
+        """Stop the workers, cancelling the jobs they are running."""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def submit(self, request: IngestRequest) -> IngestJob:
+        """Queue an ingestion of ``request``.
+
+        Parameters
+        ----------
+        request : IngestRequest
+            The parameters of the ingestion.
+
+        Returns
+        -------
+        IngestJob
+            The queued job.
+
+        Raises
+        ------
+        JobQueueFullError
+            If the queue cannot take another job.
+
+        """
+        job = IngestJob(request=request)
+        await self.backend.submit(job)
+        self._reporters[job.id] = self.progress.open(str(job.id))
+        self.progress.publish(str(job.id), ProgressEvent(stage="queued"))
+        logger.info("Queued ingest job", extra={"job_id": str(job.id), "input_text": request.input_text})
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job = await self.backend.next_job()
+            await self._run(job)
+
+    async def _run(self, job: IngestJob) -> None:
+        """Run ``job`` and store its result or error."""
+        job.status = JobStatus.RUNNING
+        job.started_at = time.time()
+        await self.backend.save(job)
+
+        request = job.request
+        reporter = self._reporters.pop(job.id, None) or self.progress.open(str(job.id))
+        try:
+            with reporter.activate():
+                response = await process_query(
+                    input_text=request.input_text,
+                    max_file_size=request.max_file_size,
+                    pattern_type=request.pattern_type,
+                    pattern=request.pattern,
+                    token=request.token,
+                )
+        except Exception as exc:
+            logger.exception("Ingest job failed", extra={"job_id": str(job.id)})
+            response = IngestErrorResponse(error=str(exc))
+
+        if isinstance(response, IngestSuccessResponse):
+            job.status, job.result = JobStatus.SUCCEEDED, response
+        else:
+            job.status, job.error = JobStatus.FAILED, response.error
+        job.finished_at = time.time()
+        await self.backend.save(job)
+        # Handed over like the events reported from worker threads, so that it is the last one streamed
+        reporter.callback(ProgressEvent(stage=DONE_STAGE, message=job.status.value))
+
+        jobs_counter.labels(status=job.status.value).inc()
+        logger.info(
+            "Ingest job finished",
+            extra={"job_id": str(job.id), "status": job.status.value, "duration": job.finished_at - job.started_at},
+        )
+
+
+@lru_cache(maxsize=1)
+def default_job_runner() -> JobRunner:
+    """Return the job runner of this process, with an in-memory backend configured with ``GITINGEST_JOB_*``.
+
+    Returns
+    -------
+    JobRunner
+        The shared job runner.
+
+    """
+    return JobRunner(InMemoryJobBackend(), workers=JOB_WORKERS)
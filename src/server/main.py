@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import os
 import threading
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import AsyncIterator
 
 import sentry_sdk
 from dotenv import load_dotenv
@@ -16,10 +18,11 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 
 # Import logging configuration first to intercept all logging
 from gitingest.utils.logging_config import get_logger
+from server.jobs import default_job_runner
 from server.metrics_server import start_metrics_server
-from server.routers import dynamic, index, ingest
+from server.routers import dynamic, index, ingest, jobs
 from server.server_config import get_version_info, templates
-from server.server_utils import limiter, rate_limit_exception_handler
+from server.server_utils import limiter, rate_limit_exception_handler, warm_up_tokenizer
 
 # Load environment variables from .env file
 load_dotenv()
@@ -55,8 +58,20 @@ if os.getenv("GITINGEST_SENTRY_ENABLED") is not None:
             environment=sentry_environment,
         )
 
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Run the ingest job workers for as long as the application is up."""
+    job_runner = default_job_runner()
+    job_runner.start()
+    try:
+        yield
+    finally:
+        await job_runner.stop()
+
+
 # Initialize the FastAPI application
-app = FastAPI(docs_url=None, redoc_url=None)
+app = FastAPI(docs_url=None, redoc_url=None, lifespan=lifespan)
 app.state.limiter = limiter
 
 # Register the custom exception handler for rate limits
@@ -73,6 +88,9 @@ if os.getenv("GITINGEST_METRICS_ENABLED") is not None:
     )
     metrics_thread.start()
 
+# Load the tokenizer in the background, so that neither startup nor the first ingestion waits for it
+threading.Thread(target=warm_up_tokenizer, name="tokenizer-warm-up", daemon=True).start()
+
 
 # Mount static files dynamically to serve CSS, JS, and other static assets
 static_dir = Path(__file__).parent.parent / "static"
@@ -209,5 +227,6 @@ def openapi_json() -> JSONResponse:
 
 # Include routers for modular endpoints
 app.include_router(index)
+app.include_router(jobs)
 app.include_router(ingest)
 app.include_router(dynamic)
@@ -116,6 +116,49 @@ class IngestErrorResponse(BaseModel):
 IngestResponse = Union[IngestSuccessResponse, IngestErrorResponse]
 
 
+class JobStatus(str, Enum):
+    """Enumeration for the states of an ingest job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class IngestJobResponse(BaseModel):
+    """Response model for the /api/jobs endpoints.
+
+    Attributes
+    ----------
+    job_id : str
+        The identifier of the job, to poll its status with.
+    status : JobStatus
+        The state of the job.
+    queue_position : int | None
+        The number of jobs ahead of this one in the queue, while it is queued.
+    created_at : float
+        When the job was submitted (Unix timestamp).
+    started_at : float | None
+        When the job started running (Unix timestamp).
+    finished_at : float | None
+        When the job finished (Unix timestamp).
+    result : IngestSuccessResponse | None
+        The result of the ingestion, once the job succeeded.
+    error : str | None
+        Error message describing what went wrong, once the job failed.
+
+    """
+
+    job_id: str = Field(..., description="Job identifier")
+    status: JobStatus = Field(..., description="Job status")
+    queue_position: int | None = Field(default=None, description="Number of jobs ahead in the queue")
+    created_at: float = Field(..., description="Submission time (Unix timestamp)")
+    started_at: float | None = Field(default=None, description="Start time (Unix timestamp)")
+    finished_at: float | None = Field(default=None, description="End time (Unix timestamp)")
+    result: IngestSuccessResponse | None = Field(default=None, description="Ingestion result")
+    error: str | None = Field(default=None, description="Error message")
+
+
 class S3Metadata(BaseModel):
     """Model for S3 metadata structure.
 
@@ -0,0 +1,130 @@
+"""Fan-out of the progress events of ingest jobs to the clients streaming them (Server-Sent Events)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import AsyncIterator
+
+from gitingest.utils.progress import ProgressEvent, ProgressReporter
+from server.server_config import JOB_RESULT_TTL
+
+DONE_STAGE = "done"  # Stage of the last event of a job
+
+
+@dataclass
+class _Channel:
+    """The events of one job: the latest ones for late subscribers, and the queues of the current subscribers."""
+
+    events: deque[ProgressEvent]
+    subscribers: set[asyncio.Queue[ProgressEvent]] = field(default_factory=set)
+    closed_at: float | None = None
+
+
+class ProgressBroker:
+    """Collects the progress events of every job and streams them to the clients subscribed to the job.
+
+    Events may be reported from worker threads, so they are handed over to the event loop that opened the job's
+    channel. A subscriber first receives the last ``history`` events of the job, so that a client connecting late
+    still sees where the job is, then every new event until the job is done. Channels of finished jobs are dropped
+    after ``ttl`` seconds.
+
+    Attributes
+    ----------
+    history : int
+        The number of past events replayed to new subscribers.
+    ttl : float
+        How long the channel of a finished job is kept, in seconds.
+
+    """
+
+    def __init__(self, history: int = 50, ttl: float = JOB_RESULT_TTL) -> None:
+        self.history = history
+        self.ttl = ttl
+        self._channels: dict[str, _Channel] = {}
+
+    def open(self, job_id: str) -> ProgressReporter:
+        """Open the channel of ``job_id`` and return the reporter publishing to it.
+
+        Must be called from the event loop, which the reporter hands the events over to.
+
+        Parameters
+        ----------
+        job_id : str
+            The identifier of the job.
+
+        Returns
+        -------
+        ProgressReporter
+            The reporter to activate while the job runs.
+
+        """
+        self._expire()
+        self._channels[job_id] = _Channel(events=deque(maxlen=self.history))
+        loop = asyncio.get_running_loop()
+        return ProgressReporter(lambda event: loop.call_soon_threadsafe(self.publish, job_id, event))
+
+    def publish(self, job_id: str, event: ProgressEvent) -> None:
+        """Pass ``event`` on to the subscribers of ``job_id``, and close the channel if it is the last one."""
+        channel = self._channels.get(job_id)
+        if channel is None or channel.closed_at is not None:
+            return
+
+        channel.events.append(event)
+        for queue in channel.subscribers:
+            queue.put_nowait(event)
+        if event.stage == DONE_STAGE:
+            channel.closed_at = time.time()
+
+    def subscribe(self, job_id: str) -> AsyncIterator[ProgressEvent] | None:
+        """Return the events of ``job_id``, past and future, up to the last one, or ``None`` for an unknown job."""
+        self._expire()
+        channel = self._channels.get(job_id)
+        if channel is None:
+            return None
+        return self._stream(channel)
+
+    async def _stream(self, channel: _Channel) -> AsyncIterator[ProgressEvent]:
+        queue: asyncio.Queue[ProgressEvent] = asyncio.Queue()
+        for event in channel.events:
+            queue.put_nowait(event)
+        if channel.closed_at is None:
+            channel.subscribers.add(queue)
+
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event.stage == DONE_STAGE:
+                    return
+        finally:
+            channel.subscribers.discard(queue)
+
+    def _expire(self) -> None:
+        """Drop the channels of the jobs that finished more than ``ttl`` seconds ago."""
+        deadline = time.time() - self.ttl
+        for job_id, channel in list(self._channels.items()):
+            if channel.closed_at is not None and channel.closed_at < deadline:
+                del self._channels[job_id]
+
+
+def format_sse(event: ProgressEvent) -> str:
+    """Format ``event`` as a Server-Sent Event, named after its stage for the last one and ``progress`` otherwise.
+
+    Parameters
+    ----------
+    event : ProgressEvent
+        The event to send.
+
+    Returns
+    -------
+    str
+        The ``event:`` and ``data:`` (JSON) lines of the event, followed by a blank line.
+
+    """
+    name = DONE_STAGE if event.stage == DONE_STAGE else "progress"
+    data = json.dumps(asdict(event), separators=(",", ":"))
+    return f"event: {name}\ndata: {data}\n\n"
@@ -2,31 +2,38 @@
 
 from __future__ import annotations
 
+import hashlib
 import shutil
+from functools import partial
 from pathlib import Path
 from typing import TYPE_CHECKING, cast
 
 from gitingest.clone import clone_repo
-from gitingest.ingestion import ingest_query
+from gitingest.ingestion import stream_ingest_query
 from gitingest.query_parser import parse_remote_repo
 from gitingest.utils.git_utils import resolve_commit, validate_github_token
 from gitingest.utils.logging_config import get_logger
+from gitingest.utils.mirror_cache import default_mirror_cache
 from gitingest.utils.pattern_utils import process_patterns
+from server.digest_cache import get_digest_cache
+from server.digest_stream import DigestStream
 from server.models import IngestErrorResponse, IngestResponse, IngestSuccessResponse, PatternType, S3Metadata
-from server.s3_utils import (
-    _build_s3_url,
-    check_s3_object_exists,
-    generate_s3_file_path,
-    get_metadata_from_s3,
-    is_s3_enabled,
-    upload_metadata_to_s3,
-    upload_to_s3,
+from server.s3_utils import generate_s3_file_path, is_s3_enabled
+from server.server_config import (
+    FILTER_LARGE_BLOBS,
+    INGEST_FROM_GIT_OBJECTS,
+    MAX_DISPLAY_SIZE,
+    MIRROR_CACHE_ENABLED,
 )
-from server.server_config import MAX_DISPLAY_SIZE
+from server.single_flight import SingleFlight
+from server.worker_pool import WorkerPoolFullError, ingest_pool, io_pool
 
 # Initialize logger for this module
 logger = get_logger(__name__)
 
+# Identical ingests requested while one is running await its result instead of cloning the repository again
+_ingest_flights: SingleFlight[tuple[str, str, str, str] | IngestErrorResponse] = SingleFlight("ingest")
+
 if TYPE_CHECKING:
     from gitingest.schemas.cloning import CloneConfig
     from gitingest.schemas.ingestion import IngestionQuery
@@ -43,7 +50,7 @@ def _cleanup_repository(clone_config: CloneConfig) -> None:
         logger.exception("Could not delete repository", extra={"local_path": str(clone_config.local_path)})
 
 
-async def _check_s3_cache(
+async def _check_digest_cache(
     query: IngestionQuery,
     input_text: str,
     max_file_size: int,
@@ -51,7 +58,7 @@ async def _check_s3_cache(
     pattern: str,
     token: str | None,
 ) -> IngestSuccessResponse | None:
-    """Check if digest already exists on S3 and return response if found.
+    """Check if the digest already exists in the digest cache (S3 or local) and return a response if found.
 
     Parameters
     ----------
@@ -71,57 +78,42 @@ async def _check_s3_cache(
     Returns
     -------
     IngestSuccessResponse | None
-        Response if file exists on S3, None otherwise.
+        Response if the digest is cached, None otherwise.
 
     """
-    if not is_s3_enabled():
+    digest_cache = get_digest_cache()
+    if digest_cache is None:
         return None
 
     try:
         # Use git ls-remote to get commit SHA without cloning
         clone_config = query.extract_clone_config()
-        logger.info("Resolving commit for S3 cache check", extra={"repo_url": query.url})
+        logger.info("Resolving commit for digest cache check", extra={"repo_url": query.url})
         query.commit = await resolve_commit(clone_config, token=token)
         logger.info("Commit resolved successfully", extra={"repo_url": query.url, "commit": query.commit})
 
-        # Generate S3 file path using the resolved commit
-        s3_file_path = generate_s3_file_path(
-            source=query.url,
-            user_name=cast("str", query.user_name),
-            repo_name=cast("str", query.repo_name),
-            commit=query.commit,
-            subpath=query.subpath,
-            include_patterns=query.include_patterns,
-            ignore_patterns=query.ignore_patterns,
-        )
-
-        # Check if file exists on S3
-        if check_s3_object_exists(s3_file_path):
-            # File exists on S3, serve it directly without cloning
-            s3_url = _build_s3_url(s3_file_path)
-            query.s3_url = s3_url
-
-            short_repo_url = f"{query.user_name}/{query.repo_name}"
-
-            # Try to get cached metadata
-            metadata = get_metadata_from_s3(s3_file_path)
-
-            if metadata:
+        cached = await io_pool().run(digest_cache.get, _digest_cache_key(query))
+        if cached:
+            # Digest is cached, serve it directly without cloning
+            if is_s3_enabled():
+                query.s3_url = cached.url
+
+            if cached.metadata:
                 # Use cached metadata if available
-                summary = metadata.summary
-                tree = metadata.tree
-                content = metadata.content
+                summary = cached.metadata.summary
+                tree = cached.metadata.tree
+                content = cached.metadata.content
             else:
                 # Fallback to placeholder messages if metadata not available
-                summary = "Digest served from cache (S3). Download the full digest to see content details."
+                summary = "Digest served from cache. Download the full digest to see content details."
                 tree = "Digest served from cache. Download the full digest to see the file tree."
                 content = "Digest served from cache. Download the full digest to see the content."
 
             return IngestSuccessResponse(
                 repo_url=input_text,
-                short_repo_url=short_repo_url,
+                short_repo_url=f"{query.user_name}/{query.repo_name}",
                 summary=summary,
-                digest_url=s3_url,
+                digest_url=cached.url,
                 tree=tree,
                 content=content,
                 default_max_file_size=max_file_size,
@@ -130,21 +122,45 @@ async def _check_s3_cache(
             )
     except Exception as exc:
         # Log the exception but don't fail the entire request
-        logger.warning("S3 cache check failed, falling back to normal cloning", extra={"error": str(exc)})
+        logger.warning("Digest cache check failed, falling back to normal cloning", extra={"error": str(exc)})
 
-    logger.info("Digest not found in S3 cache, proceeding with normal cloning", extra={"repo_url": query.url})
+    logger.info("Digest not found in cache, proceeding with normal cloning", extra={"repo_url": query.url})
     return None
 
 
-def _store_digest_content(
-    query: IngestionQuery,
-    clone_config: CloneConfig,
-    digest_content: str,
-    summary: str,
-    tree: str,
-    content: str,
-) -> None:
-    """Store digest content either to S3 or locally based on configuration.
+def _digest_cache_key(query: IngestionQuery) -> str:
+    """Return the key of the digest of ``query`` in the digest cache, which is also its S3 file path.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object, with the commit resolved.
+
+    Returns
+    -------
+    str
+        The key, covering the host, owner, repository, commit, subpath and patterns of the query.
+
+    """
+    return generate_s3_file_path(
+        source=cast("str", query.url),
+        user_name=cast("str", query.user_name),
+        repo_name=cast("str", query.repo_name),
+        commit=cast("str", query.commit),
+        subpath=query.subpath,
+        include_patterns=query.include_patterns,
+        ignore_patterns=query.ignore_patterns,
+    )
+
+
+def _ingest_and_store_digest(query: IngestionQuery, clone_config: CloneConfig) -> tuple[str, str, str, str]:
+    """Ingest the cloned repository and store the digest in the digest cache (S3 or local), or next to the clone.
+
+    The digest is streamed from the ingestion pipeline to a file instead of being assembled from the summary, tree
+    and content strings. Only the beginning of the file contents is read back, for display.
+
+    This function blocks for as long as the ingestion takes, so it runs in the ingestion worker pool, possibly in
+    another process: everything it produces is returned rather than set on ``query``.
 
     Parameters
     ----------
@@ -152,78 +168,53 @@ def _store_digest_content(
         The query object containing repository information.
     clone_config : CloneConfig
         The clone configuration object.
-    digest_content : str
-        The complete digest content to store.
-    summary : str
-        The summary content for metadata.
-    tree : str
-        The tree content for metadata.
-    content : str
-        The file content for metadata.
+
+    Returns
+    -------
+    tuple[str, str, str, str]
+        A tuple containing the summary, the tree, the (possibly cropped) file contents to display and the URL of the
+        full digest.
 
     """
-    if is_s3_enabled():
-        # Upload to S3 instead of storing locally
-        s3_file_path = generate_s3_file_path(
-            source=query.url,
-            user_name=cast("str", query.user_name),
-            repo_name=cast("str", query.repo_name),
-            commit=query.commit,
-            subpath=query.subpath,
-            include_patterns=query.include_patterns,
-            ignore_patterns=query.ignore_patterns,
-        )
-        s3_url = upload_to_s3(content=digest_content, s3_file_path=s3_file_path, ingest_id=query.id)
-
-        # Also upload metadata JSON for caching
-        metadata = S3Metadata(
-            summary=summary,
-            tree=tree,
-            content=content,
-        )
-        try:
-            upload_metadata_to_s3(metadata=metadata, s3_file_path=s3_file_path, ingest_id=query.id)
-            logger.info("Successfully uploaded metadata to S3")
-        except Exception as metadata_exc:
-            # Log the error but don't fail the entire request
-            logger.warning("Failed to upload metadata to S3", extra={"error": str(metadata_exc)})
+    local_txt_file = Path(clone_config.local_path).with_suffix(".txt")
+    with local_txt_file.open("w", encoding="utf-8") as f:
+        summary, tree = stream_ingest_query(query, sink=f.write)
 
-        # Store S3 URL in query for later use
-        query.s3_url = s3_url
-    else:
-        # Store locally
-        local_txt_file = Path(clone_config.local_path).with_suffix(".txt")
-        with local_txt_file.open("w", encoding="utf-8") as f:
-            f.write(digest_content)
+    # Skip the tree and the newline that separates it from the file contents
+    with local_txt_file.open(encoding="utf-8") as f:
+        f.read(len(tree) + 1)
+        content = _crop_content(f.read(MAX_DISPLAY_SIZE + 1))
 
+    digest_url = f"/api/download/file/{query.id}"
+    digest_cache = get_digest_cache()
+    if digest_cache is not None:
+        metadata = S3Metadata(summary=summary, tree=tree, content=content)
+        digest_url = digest_cache.put(_digest_cache_key(query), local_txt_file, metadata=metadata, ingest_id=query.id)
 
-def _generate_digest_url(query: IngestionQuery) -> str:
-    """Generate the digest URL based on S3 configuration.
+    return summary, tree, content, digest_url
+
+
+def _crop_content(content: str) -> str:
+    """Crop ``content`` to ``MAX_DISPLAY_SIZE`` characters, prefixed with a notice if it was cropped.
 
     Parameters
     ----------
-    query : IngestionQuery
-        The query object containing repository information.
+    content : str
+        The file contents, or at least their first ``MAX_DISPLAY_SIZE + 1`` characters.
 
     Returns
     -------
     str
-        The digest URL.
-
-    Raises
-    ------
-    RuntimeError
-        If S3 is enabled but no S3 URL was generated.
+        The content to display.
 
     """
-    if is_s3_enabled():
-        digest_url = getattr(query, "s3_url", None)
-        if not digest_url:
-            # This should not happen if S3 upload was successful
-            msg = "S3 is enabled but no S3 URL was generated"
-            raise RuntimeError(msg)
-        return digest_url
-    return f"/api/download/file/{query.id}"
+    if len(content) <= MAX_DISPLAY_SIZE:
+        return content
+
+    return (
+        f"(Files content cropped to {int(MAX_DISPLAY_SIZE / 1_000)}k characters, "
+        "download full ingest to see more)\n" + content[:MAX_DISPLAY_SIZE]
+    )
 
 
 async def process_query(
@@ -260,6 +251,86 @@ async def process_query(
     ------
     RuntimeError
         If the commit hash is not found (should never happen).
+    WorkerPoolFullError
+        If the server is too busy to take the ingestion.
+
+    """
+    query = await _prepare_query(input_text, max_file_size, pattern_type=pattern_type, pattern=pattern, token=token)
+    if isinstance(query, IngestErrorResponse):
+        return query
+
+    # Check if digest already exists in the digest cache before cloning
+    cached_response = await _check_digest_cache(
+        query=query,
+        input_text=input_text,
+        max_file_size=max_file_size,
+        pattern_type=pattern_type.value,
+        pattern=pattern,
+        token=token,
+    )
+    if cached_response:
+        return cached_response
+
+    if not query.commit:
+        # Resolved up front, for the single-flight key (the clone then skips its own resolution)
+        query.commit = await _resolve_commit_or_none(query, token=token)
+
+    key = _single_flight_key(query, token=token)
+    ingest = partial(_clone_and_ingest, query, token=token, pattern_type=pattern_type, pattern=pattern)
+    result = await (ingest() if key is None else _ingest_flights.run(key, ingest))
+    if isinstance(result, IngestErrorResponse):
+        return result
+
+    summary, tree, content, digest_url = result
+
+    _print_success(
+        url=query.url,
+        max_file_size=max_file_size,
+        pattern_type=pattern_type,
+        pattern=pattern,
+        summary=summary,
+    )
+
+    return IngestSuccessResponse(
+        repo_url=input_text,
+        short_repo_url=f"{query.user_name}/{query.repo_name}",
+        summary=summary,
+        digest_url=digest_url,
+        tree=tree,
+        content=content,
+        default_max_file_size=max_file_size,
+        pattern_type=pattern_type,
+        pattern=pattern,
+    )
+
+
+async def _prepare_query(
+    input_text: str,
+    max_file_size: int,
+    *,
+    pattern_type: PatternType,
+    pattern: str,
+    token: str | None,
+) -> IngestionQuery | IngestErrorResponse:
+    """Parse the input into a query carrying the ingestion parameters and server settings.
+
+    Parameters
+    ----------
+    input_text : str
+        Input text provided by the user, typically a Git repository URL or slug.
+    max_file_size : int
+        Max file size in KB to be include in the digest.
+    pattern_type : PatternType
+        Type of pattern to use (either "include" or "exclude")
+    pattern : str
+        Pattern to include or exclude in the query, depending on the pattern type.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    IngestionQuery | IngestErrorResponse
+        The query, or the error response if the input could not be parsed.
 
     """
     if token:
@@ -277,23 +348,143 @@ async def process_query(
         exclude_patterns=pattern if pattern_type == PatternType.EXCLUDE else None,
         include_patterns=pattern if pattern_type == PatternType.INCLUDE else None,
     )
+    query.from_git_objects = INGEST_FROM_GIT_OBJECTS
+    query.filter_large_blobs = FILTER_LARGE_BLOBS
 
-    # Check if digest already exists on S3 before cloning
-    s3_response = await _check_s3_cache(
-        query=query,
-        input_text=input_text,
-        max_file_size=max_file_size,
-        pattern_type=pattern_type.value,
-        pattern=pattern,
-        token=token,
-    )
-    if s3_response:
-        return s3_response
+    return query
+
+
+async def stream_query(
+    input_text: str,
+    max_file_size: int,
+    pattern_type: PatternType,
+    pattern: str,
+    token: str | None = None,
+) -> DigestStream | IngestErrorResponse:
+    """Clone the repository of a query and return its digest, to be produced while it is streamed to the client.
+
+    Unlike ``process_query``, the digest is neither stored nor looked up in the digest cache: it is handed to the
+    client chunk by chunk as the ingestion writes it.
+
+    Parameters
+    ----------
+    input_text : str
+        Input text provided by the user, typically a Git repository URL or slug.
+    max_file_size : int
+        Max file size in KB to be include in the digest.
+    pattern_type : PatternType
+        Type of pattern to use (either "include" or "exclude")
+    pattern : str
+        Pattern to include or exclude in the query, depending on the pattern type.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    DigestStream | IngestErrorResponse
+        The digest stream, which removes the clone once it is over, or the error response if the input could not be
+        parsed.
+
+    Raises
+    ------
+    WorkerPoolFullError
+        If the server is too busy to take the ingestion.
+
+    """
+    query = await _prepare_query(input_text, max_file_size, pattern_type=pattern_type, pattern=pattern, token=token)
+    if isinstance(query, IngestErrorResponse):
+        return query
+
+    if ingest_pool().full():
+        # Reject the request before cloning rather than after
+        msg = "The server is busy, please try again later"
+        raise WorkerPoolFullError(msg)
 
     clone_config = query.extract_clone_config()
-    await clone_repo(clone_config, token=token)
+    mirror_cache = default_mirror_cache() if MIRROR_CACHE_ENABLED else None
+    await clone_repo(clone_config, token=token, mirror_cache=mirror_cache)
+
+    return DigestStream(query, cleanup=partial(_cleanup_repository, clone_config))
+
+
+async def _resolve_commit_or_none(query: IngestionQuery, token: str | None) -> str | None:
+    """Resolve the commit of ``query``, or return ``None`` and leave reporting the failure to the clone."""
+    try:
+        return await resolve_commit(query.extract_clone_config(), token=token)
+    except Exception as exc:
+        logger.debug("Could not resolve commit before cloning", extra={"repo_url": query.url, "error": str(exc)})
+        return None
+
+
+def _single_flight_key(query: IngestionQuery, token: str | None) -> tuple[str, int, str] | None:
+    """Return the key identifying the ingests whose results are interchangeable, or ``None`` if it is unknown.
+
+    The key is the digest cache key (the S3 file path of the digest), which covers the host, owner, repository,
+    commit, subpath and patterns, along with the maximum file size and the token (private repositories are only
+    shared between requests made with the same token).
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+
+    Returns
+    -------
+    tuple[str, int, str] | None
+        The key, or ``None`` if the commit is not resolved.
+
+    """
+    if not query.commit:
+        return None
+
+    token_hash = hashlib.sha256(token.encode()).hexdigest() if token else ""
+    return _digest_cache_key(query), query.max_file_size, token_hash
+
+
+async def _clone_and_ingest(
+    query: IngestionQuery,
+    *,
+    token: str | None,
+    pattern_type: PatternType,
+    pattern: str,
+) -> tuple[str, str, str, str] | IngestErrorResponse:
+    """Clone the repository, ingest it, store the digest and clean up.
+
+    Parameters
+    ----------
+    query : IngestionQuery
+        The parsed query object, with the commit resolved.
+    token : str | None
+        GitHub personal access token (PAT) for accessing private repositories.
+    pattern_type : PatternType
+        Type of pattern to use (either "include" or "exclude"), for logging.
+    pattern : str
+        Pattern to include or exclude in the query, for logging.
+
+    Returns
+    -------
+    tuple[str, str, str, str] | IngestErrorResponse
+        The summary, the tree, the (possibly cropped) file contents to display and the digest URL, or the error
+        response if the ingestion failed.
+
+    Raises
+    ------
+    RuntimeError
+        If the commit hash is not found (should never happen).
+    WorkerPoolFullError
+        If the ingestion worker pool cannot take another job.
+
+    """
+    if ingest_pool().full():
+        # Reject the request before cloning rather than after
+        msg = "The server is busy, please try again later"
+        raise WorkerPoolFullError(msg)
 
-    short_repo_url = f"{query.user_name}/{query.repo_name}"
+    clone_config = query.extract_clone_config()
+    mirror_cache = default_mirror_cache() if MIRROR_CACHE_ENABLED else None
+    await clone_repo(clone_config, token=token, mirror_cache=mirror_cache)
 
     # The commit hash should always be available at this point
     if not query.commit:
@@ -301,45 +492,24 @@ async def process_query(
         raise RuntimeError(msg)
 
     try:
-        summary, tree, content = ingest_query(query)
-        digest_content = tree + "\n" + content
-        _store_digest_content(query, clone_config, digest_content, summary, tree, content)
+        summary, tree, content, digest_url = await ingest_pool().run(_ingest_and_store_digest, query, clone_config)
+    except WorkerPoolFullError:
+        await io_pool().run(_cleanup_repository, clone_config)
+        raise
     except Exception as exc:
-        _print_error(query.url, exc, max_file_size, pattern_type, pattern)
+        _print_error(cast("str", query.url), exc, query.max_file_size // 1024, pattern_type, pattern)
         # Clean up repository even if processing failed
-        _cleanup_repository(clone_config)
+        await io_pool().run(_cleanup_repository, clone_config)
         return IngestErrorResponse(error=str(exc))
 
-    if len(content) > MAX_DISPLAY_SIZE:
-        content = (
-            f"(Files content cropped to {int(MAX_DISPLAY_SIZE / 1_000)}k characters, "
-            "download full ingest to see more)\n" + content[:MAX_DISPLAY_SIZE]
-        )
-
-    _print_success(
-        url=query.url,
-        max_file_size=max_file_size,
-        pattern_type=pattern_type,
-        pattern=pattern,
-        summary=summary,
-    )
-
-    digest_url = _generate_digest_url(query)
+    if is_s3_enabled():
+        # Store S3 URL in query for later use
+        query.s3_url = digest_url
 
     # Clean up the repository after successful processing
-    _cleanup_repository(clone_config)
+    await io_pool().run(_cleanup_repository, clone_config)
 
-    return IngestSuccessResponse(
-        repo_url=input_text,
-        short_repo_url=short_repo_url,
-        summary=summary,
-        digest_url=digest_url,
-        tree=tree,
-        content=content,
-        default_max_file_size=max_file_size,
-        pattern_type=pattern_type,
-        pattern=pattern,
-    )
+    return summary, tree, content, digest_url
 
 
 def _print_query(url: str, max_file_size: int, pattern_type: str, pattern: str) -> None:
@@ -4,18 +4,25 @@ from typing import Union
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, Request, status
-from fastapi.responses import FileResponse, JSONResponse, RedirectResponse
+from fastapi.responses import FileResponse, JSONResponse, RedirectResponse, StreamingResponse
 from prometheus_client import Counter
 
 from gitingest.config import TMP_BASE_PATH
+from server.digest_cache import LocalDigestCache, get_digest_cache
 from server.models import IngestRequest
-from server.routers_utils import COMMON_INGEST_RESPONSES, _perform_ingestion
-from server.s3_utils import is_s3_enabled
+from server.routers_utils import COMMON_INGEST_RESPONSES, _perform_ingestion, _perform_streaming_ingestion
+from server.s3_utils import get_s3_url_for_ingest_id, is_s3_enabled
 from server.server_config import DEFAULT_FILE_SIZE_KB
 from server.server_utils import limiter
+from server.worker_pool import io_pool
 
 ingest_counter = Counter("gitingest_ingest_total", "Number of ingests", ["status", "url"])
 
+STREAM_INGEST_RESPONSES = {
+    **COMMON_INGEST_RESPONSES,
+    status.HTTP_200_OK: {"content": {"text/plain": {}}, "description": "The digest, streamed as it is produced"},
+}
+
 router = APIRouter()
 
 
@@ -52,6 +59,42 @@ async def api_ingest(
     return response
 
 
+@router.post("/api/ingest/stream", responses=STREAM_INGEST_RESPONSES, response_model=None)
+@limiter.limit("10/minute")
+async def api_ingest_stream(
+    request: Request,
+    ingest_request: IngestRequest,
+) -> Union[StreamingResponse, JSONResponse]:  # noqa: FA100 (future-rewritable-type-annotation) (pydantic)
+    """Ingest a Git repository and stream the full digest as it is produced.
+
+    **This endpoint streams the digest as plain text** (the directory structure, then the content of every file),
+    without cropping it, as the ingestion produces it, instead of returning it in a JSON body once the whole
+    repository is processed. The response is compressed with ``zstd`` or ``gzip`` if the client accepts it
+    (``Accept-Encoding``). The digest is not cached.
+
+    **Parameters**
+
+    - **ingest_request** (`IngestRequest`): Pydantic model containing ingestion parameters
+
+    **Returns**
+
+    - **StreamingResponse**: The digest (``text/plain``, chunked), or an error response with the status codes of
+      ``/api/ingest`` if the ingestion fails before the digest starts
+
+    """
+    response = await _perform_streaming_ingestion(
+        input_text=ingest_request.input_text,
+        max_file_size=ingest_request.max_file_size,
+        pattern_type=ingest_request.pattern_type.value,
+        pattern=ingest_request.pattern,
+        token=ingest_request.token,
+        accept_encoding=request.headers.get("accept-encoding"),
+    )
+    # limit URL to 255 characters
+    ingest_counter.labels(status=response.status_code, url=ingest_request.input_text[:255]).inc()
+    return response
+
+
 @router.get("/api/{user}/{repository}", responses=COMMON_INGEST_RESPONSES)
 @limiter.limit("10/minute")
 async def api_ingest_get(
@@ -101,8 +144,8 @@ async def download_ingest(
     """Download the first text file produced for an ingest ID.
 
     **This endpoint retrieves the first ``*.txt`` file produced during the ingestion process**
-    and returns it as a downloadable file. When S3 is enabled, this endpoint is disabled
-    and clients should use the S3 URL provided in the ingest response instead.
+    (or the digest kept for it in the local digest cache) and returns it as a downloadable file.
+    When S3 is enabled, this endpoint redirects to the S3 URL of the digest instead.
 
     **Parameters**
 
@@ -111,21 +154,30 @@ async def download_ingest(
     **Returns**
 
     - **FileResponse**: Streamed response with media type ``text/plain`` for local files
+    - **RedirectResponse**: Redirect to the digest in S3, when S3 is enabled
 
     **Raises**
 
-    - **HTTPException**: **503** - endpoint is disabled when S3 is enabled
-    - **HTTPException**: **404** - digest directory is missing or contains no ``*.txt`` file
+    - **HTTPException**: **404** - digest is not in S3, or digest directory is missing or contains no ``*.txt`` file
     - **HTTPException**: **403** - the process lacks permission to read the directory or file
 
     """
-    # Disable download endpoint when S3 is enabled
+    # Redirect to the digest in S3 when S3 is enabled (a single lookup in the ingest ID index)
     if is_s3_enabled():
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Download endpoint is disabled when S3 is enabled. "
-            "Use the S3 URL provided in the ingest response instead.",
-        )
+        s3_url = await io_pool().run(get_s3_url_for_ingest_id, ingest_id)
+        if s3_url is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Digest {ingest_id!r} not found")
+        if "://" not in s3_url:
+            s3_url = f"//{s3_url}"  # Alias host without a scheme: keep the scheme of the request
+        return RedirectResponse(url=s3_url)
+
+    # Serve the digest from the local digest cache if it holds it
+    digest_cache = get_digest_cache()
+    if isinstance(digest_cache, LocalDigestCache):
+        cached = digest_cache.get_file(ingest_id)
+        if cached:
+            cached_file, file_name = cached
+            return FileResponse(path=cached_file, media_type="text/plain", filename=file_name)
 
     # Fall back to local file serving
     # Normalize and validate the directory path
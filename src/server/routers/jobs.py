@@ -0,0 +1,149 @@
+"""Job endpoints for the API: queue an ingestion, then poll for its result or stream its progress."""
+
+import asyncio
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from gitingest.utils.progress import ProgressEvent
+from server.jobs import JobQueueFullError, default_job_runner
+from server.models import IngestErrorResponse, IngestJobResponse, IngestRequest
+from server.progress import DONE_STAGE, format_sse
+from server.server_utils import limiter
+
+SSE_KEEPALIVE_INTERVAL = 15  # Seconds without events after which a comment is sent, for proxies not to time out
+
+router = APIRouter()
+
+JOB_RESPONSES = {
+    status.HTTP_202_ACCEPTED: {"model": IngestJobResponse, "description": "Job queued"},
+    status.HTTP_503_SERVICE_UNAVAILABLE: {"model": IngestErrorResponse, "description": "Job queue full"},
+}
+
+
+@router.post("/api/jobs", status_code=status.HTTP_202_ACCEPTED, responses=JOB_RESPONSES)
+@limiter.limit("10/minute")
+async def create_job(
+    request: Request,  # noqa: ARG001 (unused-function-argument) # pylint: disable=unused-argument
+    ingest_request: IngestRequest,
+) -> JSONResponse:
+    """Queue the ingestion of a Git repository and return the job to poll.
+
+    **This endpoint returns as soon as the ingestion is queued**, instead of holding the connection open for
+    the whole clone and ingestion like ``/api/ingest``. Poll ``/api/jobs/{job_id}`` for its status and result.
+
+    **Parameters**
+
+    - **ingest_request** (`IngestRequest`): Pydantic model containing ingestion parameters
+
+    **Returns**
+
+    - **JSONResponse**: The queued job (**202**), or an error response (**503**) if the job queue is full
+
+    """
+    runner = default_job_runner()
+    try:
+        job = await runner.submit(ingest_request)
+    except JobQueueFullError as exc:
+        error_response = IngestErrorResponse(error=str(exc))
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=error_response.model_dump())
+
+    position = await runner.backend.queue_position(job.id)
+    response = job.to_response(queue_position=position)
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content=response.model_dump(mode="json"),
+        headers={"Location": f"/api/jobs/{job.id}"},
+    )
+
+
+@router.get("/api/jobs/{job_id:uuid}")
+async def get_job(job_id: UUID) -> IngestJobResponse:
+    """Return the status of an ingest job, and its result once it finished.
+
+    **Parameters**
+
+    - **job_id** (`UUID`): Identifier returned when the job was queued
+
+    **Returns**
+
+    - **IngestJobResponse**: The status, queue position, and result or error of the job
+
+    **Raises**
+
+    - **HTTPException**: **404** - the job does not exist or its result expired
+
+    """
+    backend = default_job_runner().backend
+    job = await backend.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id!s} not found")
+    return job.to_response(queue_position=await backend.queue_position(job_id))
+
+
+@router.get("/api/jobs/{job_id:uuid}/events")
+async def stream_job_events(job_id: UUID) -> StreamingResponse:
+    """Stream the progress of an ingest job as Server-Sent Events, until it finishes.
+
+    Each ``progress`` event carries the stage of the ingestion (``queued``, ``clone``, ``walk``, ``format``,
+    ``store``), a message and counters, e.g. the files and bytes walked so far and their limits. The stream ends with
+    a ``done`` event whose message is the final status of the job; its result is then available at
+    ``/api/jobs/{job_id}``.
+
+    **Parameters**
+
+    - **job_id** (`UUID`): Identifier returned when the job was queued
+
+    **Returns**
+
+    - **StreamingResponse**: The ``text/event-stream`` of the job's progress
+
+    **Raises**
+
+    - **HTTPException**: **404** - the job does not exist or its result expired
+
+    """
+    runner = default_job_runner()
+    job = await runner.backend.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id!s} not found")
+
+    events = runner.progress.subscribe(str(job_id))
+    if events is None:
+        # The events of the job are gone, only its outcome is left
+        events = _single_event(ProgressEvent(stage=DONE_STAGE, message=job.status.value))
+
+    return StreamingResponse(
+        _sse(events),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _single_event(event: ProgressEvent) -> AsyncIterator[ProgressEvent]:
+    yield event
+
+
+async def _sse(events: AsyncIterator[ProgressEvent]) -> AsyncIterator[str]:
+    """Format ``events`` as Server-Sent Events, with keep-alive comments while none comes."""
+    iterator = events.__aiter__()
+    pending: Optional[asyncio.Future[ProgressEvent]] = None  # noqa: FA100 (future-rewritable-type-annotation)
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(iterator.__anext__())
+            done, _ = await asyncio.wait({pending}, timeout=SSE_KEEPALIVE_INTERVAL)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                event = pending.result()
+            except StopAsyncIteration:
+                return
+            pending = None
+            yield format_sse(event)
+    finally:
+        if pending is not None:
+            pending.cancel()
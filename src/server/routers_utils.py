@@ -2,18 +2,22 @@
 
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, AsyncIterator
 
 from fastapi import status
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from server.compression import negotiate_encoding
+from server.digest_stream import encode_chunks
 from server.models import IngestErrorResponse, IngestSuccessResponse, PatternType
-from server.query_processor import process_query
+from server.query_processor import process_query, stream_query
+from server.worker_pool import WorkerPoolFullError
 
 COMMON_INGEST_RESPONSES: dict[int | str, dict[str, Any]] = {
     status.HTTP_200_OK: {"model": IngestSuccessResponse, "description": "Successful ingestion"},
     status.HTTP_400_BAD_REQUEST: {"model": IngestErrorResponse, "description": "Bad request or processing error"},
     status.HTTP_500_INTERNAL_SERVER_ERROR: {"model": IngestErrorResponse, "description": "Internal server error"},
+    status.HTTP_503_SERVICE_UNAVAILABLE: {"model": IngestErrorResponse, "description": "Server too busy"},
 }
 
 
@@ -46,12 +50,82 @@ async def _perform_ingestion(
         # Return structured success response with 200 status code
         return JSONResponse(status_code=status.HTTP_200_OK, content=result.model_dump())
 
-    except ValueError as ve:
+    except Exception as exc:
+        return _error_response(exc)
+
+
+async def _perform_streaming_ingestion(
+    input_text: str,
+    max_file_size: int,
+    pattern_type: str,
+    pattern: str,
+    token: str | None,
+    accept_encoding: str | None,
+) -> StreamingResponse | JSONResponse:
+    """Run ``stream_query`` and stream the digest in a ``StreamingResponse``, compressed if the client accepts it.
+
+    The response starts once the first chunk of digest (the directory structure) is produced, so that failures of
+    the clone or of the walk are still reported with the status codes of the ``/api/ingest`` endpoint. Failures
+    after that abort the response.
+    """
+    try:
+        pattern_type = PatternType(pattern_type)
+
+        result = await stream_query(
+            input_text=input_text,
+            max_file_size=max_file_size,
+            pattern_type=pattern_type,
+            pattern=pattern,
+            token=token,
+        )
+        if isinstance(result, IngestErrorResponse):
+            return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=result.model_dump())
+
+        chunks = result.__aiter__()
+        try:
+            first = await chunks.__anext__()
+        except StopAsyncIteration:
+            first = ""
+        except BaseException:
+            await chunks.aclose()
+            raise
+
+    except Exception as exc:
+        return _error_response(exc)
+
+    encoding = negotiate_encoding(accept_encoding)
+    headers = {"Vary": "Accept-Encoding", "X-Accel-Buffering": "no"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        encode_chunks(_prepend(first, chunks), encoding),
+        media_type="text/plain; charset=utf-8",
+        headers=headers,
+    )
+
+
+async def _prepend(first: str, chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Yield ``first`` then the rest of ``chunks``, closing ``chunks`` once the response is over."""
+    try:
+        yield first
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await chunks.aclose()
+
+
+def _error_response(exc: Exception) -> JSONResponse:
+    """Return the error response of an ingestion that raised ``exc``."""
+    if isinstance(exc, WorkerPoolFullError):
+        # Shed load with 503 status code, so that clients retry later
+        error_response = IngestErrorResponse(error=str(exc))
+        return JSONResponse(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, content=error_response.model_dump())
+
+    if isinstance(exc, ValueError):
         # Handle validation errors with 400 status code
-        error_response = IngestErrorResponse(error=f"Validation error: {ve!s}")
+        error_response = IngestErrorResponse(error=f"Validation error: {exc!s}")
         return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=error_response.model_dump())
 
-    except Exception as exc:
-        # Handle unexpected errors with 500 status code
-        error_response = IngestErrorResponse(error=f"Internal server error: {exc!s}")
-        return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=error_response.model_dump())
+    # Handle unexpected errors with 500 status code
+    error_response = IngestErrorResponse(error=f"Internal server error: {exc!s}")
+    return JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=error_response.model_dump())
@@ -4,19 +4,28 @@ from __future__ import annotations
 
 import hashlib
 import os
-from typing import TYPE_CHECKING
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Iterator
 from urllib.parse import urlparse
 from uuid import UUID  # noqa: TC003 (typing-only-standard-library-import) needed for type checking (pydantic)
 
 import boto3
-from botocore.exceptions import ClientError
-from prometheus_client import Counter
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from prometheus_client import Counter, Histogram
 
 from gitingest.utils.logging_config import get_logger
+from server.compression import Compressor
 from server.models import S3Metadata
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from botocore.client import BaseClient
+    from typing_extensions import Self
 
 
 # Initialize logger for this module
@@ -25,6 +34,38 @@ logger = get_logger(__name__)
 _s3_ingest_lookup_counter = Counter("gitingest_s3_ingest_lookup", "Number of S3 ingest file lookups")
 _s3_ingest_hit_counter = Counter("gitingest_s3_ingest_hit", "Number of S3 ingest file cache hits")
 _s3_ingest_miss_counter = Counter("gitingest_s3_ingest_miss", "Number of S3 ingest file cache misses")
+_s3_upload_bytes_counter = Counter(
+    "gitingest_s3_upload_bytes",
+    "Number of bytes of digests uploaded to S3, after compression",
+    ["encoding"],
+)
+_s3_upload_throughput_histogram = Histogram(
+    "gitingest_s3_upload_throughput_bytes_per_second",
+    "Throughput of the digest uploads to S3, in bytes of digest (before compression) per second",
+    ["encoding"],
+    buckets=(1e5, 5e5, 1e6, 5e6, 1e7, 2.5e7, 5e7, 1e8, 2.5e8, 5e8, 1e9),
+)
+_s3_upload_part_retry_counter = Counter("gitingest_s3_upload_part_retry", "Number of retried S3 part uploads")
+_s3_ingest_id_lookup_counter = Counter(
+    "gitingest_s3_ingest_id_lookup",
+    "Number of S3 digest lookups by ingest ID, by outcome (index hit, scan hit or miss)",
+    ["result"],
+)
+_s3_client_created_counter = Counter("gitingest_s3_client_created", "Number of S3 clients created")
+_s3_client_creation_histogram = Histogram(
+    "gitingest_s3_client_creation_seconds",
+    "Time taken to create an S3 client (credential and endpoint resolution)",
+)
+
+
+# Minimum size of the parts of a multipart upload, but the last one (an S3 limit)
+MIN_PART_SIZE = 5 * 1024 * 1024
+# Number of characters read at once from a digest file being uploaded
+_FILE_READ_SIZE = 1024 * 1024
+# Prefix of the index entries mapping ingest IDs to the S3 keys of their digests
+_INGEST_ID_INDEX_PREFIX = "ingest/ids/"
+# Delay before the first retry of a failed part upload, in seconds, doubled for every further retry
+_PART_RETRY_BACKOFF = 0.5
 
 
 class S3UploadError(Exception):
@@ -119,19 +160,54 @@ def generate_s3_file_path(
     file_name = f"{user_name}-{repo_name}-{subpath_hash}.txt"
     base_path = f"ingest/{hostname}/{user_name}/{repo_name}/{commit}/{patterns_hash}/{file_name}"
 
+    return _with_directory_prefix(base_path)
+
+
+def _with_directory_prefix(path: str) -> str:
+    """Prefix ``path`` with ``S3_DIRECTORY_PREFIX``, if set."""
     # Check for S3_DIRECTORY_PREFIX environment variable
     s3_directory_prefix = os.getenv("S3_DIRECTORY_PREFIX")
 
     if not s3_directory_prefix:
-        return base_path
+        return path
 
     # Remove trailing slash if present and add the prefix
     s3_directory_prefix = s3_directory_prefix.rstrip("/")
-    return f"{s3_directory_prefix}/{base_path}"
+    return f"{s3_directory_prefix}/{path}"
+
+
+def _ingest_id_index_key(ingest_id: UUID | str) -> str:
+    """Return the S3 key of the index entry of ``ingest_id``, which holds the S3 key of its digest."""
+    return _with_directory_prefix(f"{_INGEST_ID_INDEX_PREFIX}{ingest_id}")
+
+
+def get_s3_max_pool_connections() -> int:
+    """Get the maximum number of connections kept open by the S3 client from environment variables."""
+    return int(os.getenv("S3_MAX_POOL_CONNECTIONS", "32"))
+
+
+def get_s3_upload_part_size() -> int:
+    """Get the size of the parts of S3 uploads, in bytes, from environment variables."""
+    return int(os.getenv("S3_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+
+
+def get_s3_upload_concurrency() -> int:
+    """Get the number of parts of an S3 upload sent at once from environment variables."""
+    return int(os.getenv("S3_UPLOAD_CONCURRENCY", "4"))
+
+
+def get_s3_content_encoding() -> str | None:
+    """Get the content encoding of the digests stored in S3 (``gzip`` or ``zstd``) from environment variables."""
+    return os.getenv("S3_CONTENT_ENCODING") or None
 
 
 def create_s3_client() -> BaseClient:
-    """Create and return an S3 client with configuration from environment."""
+    """Create and return an S3 client with configuration from environment.
+
+    The client keeps up to ``S3_MAX_POOL_CONNECTIONS`` connections open, enough for every worker thread of the
+    server to talk to S3 at once without waiting for a connection. Prefer ``get_s3_client``, which reuses one
+    client per process.
+    """
     config = get_s3_config()
     # Log S3 client creation (excluding sensitive info)
     log_config = config.copy()
@@ -143,14 +219,72 @@ def create_s3_client() -> BaseClient:
             "has_credentials": has_credentials,
         },
     )
-    return boto3.client("s3", **config)
+    client_config = Config(
+        max_pool_connections=get_s3_max_pool_connections(),
+        retries={"mode": "standard"},
+        tcp_keepalive=True,
+    )
+    start = time.perf_counter()
+    # A session per client: sessions are not thread-safe, unlike the clients created from them
+    client = boto3.session.Session().client("s3", config=client_config, **config)
+    _s3_client_creation_histogram.observe(time.perf_counter() - start)
+    _s3_client_created_counter.inc()
+    return client
+
+
+class S3ClientManager:
+    """Process-wide S3 client, created on first use and shared by every thread.
+
+    boto3 clients are thread-safe, and creating one resolves the credentials and the endpoint and opens a new
+    connection pool, so one client per process is reused instead of one per call. A process forked after the
+    client was created gets its own, as connections cannot be shared across processes.
+    """
+
+    def __init__(self) -> None:
+        self._client: BaseClient | None = None
+        self._pid: int | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> BaseClient:
+        """Return the S3 client of this process, creating it if needed.
+
+        Returns
+        -------
+        BaseClient
+            The shared S3 client.
+
+        """
+        client, pid = self._client, os.getpid()
+        if client is not None and self._pid == pid:
+            return client
+
+        with self._lock:
+            if self._client is None or self._pid != pid:
+                self._client = create_s3_client()
+                self._pid = pid
+            return self._client
+
+    def reset(self) -> None:
+        """Drop the shared client, for the next one to pick up a new configuration."""
+        with self._lock:
+            self._client = None
+            self._pid = None
+
+
+_s3_clients = S3ClientManager()
+
+
+def get_s3_client() -> BaseClient:
+    """Return the S3 client shared by the whole process."""
+    return _s3_clients.get()
 
 
 def upload_to_s3(content: str, s3_file_path: str, ingest_id: UUID) -> str:
     """Upload content to S3 and return the public URL.
 
     This function uploads the provided content to an S3 bucket and returns the public URL for the uploaded file.
-    The ingest ID is stored as an S3 object tag.
+    The ingest ID is stored as an S3 object tag. The content is encoded and uploaded part by part (see
+    ``S3MultipartUpload``), rather than encoded as a whole.
 
     Parameters
     ----------
@@ -174,73 +308,306 @@ def upload_to_s3(content: str, s3_file_path: str, ingest_id: UUID) -> str:
         If the upload to S3 fails.
 
     """
-    if not is_s3_enabled():
-        msg = "S3 is not enabled"
-        logger.error(msg)
-        raise ValueError(msg)
+    with S3MultipartUpload(s3_file_path, ingest_id=ingest_id) as upload:
+        step = upload.part_size
+        for start in range(0, len(content), step):
+            upload.write(content[start : start + step])
+        return upload.close()
 
-    s3_client = create_s3_client()
-    bucket_name = get_s3_bucket_name()
 
-    extra_fields = {
-        "bucket_name": bucket_name,
-        "s3_file_path": s3_file_path,
-        "ingest_id": str(ingest_id),
-        "content_size": len(content),
-    }
+def upload_file_to_s3(path: Path, s3_file_path: str, ingest_id: UUID) -> str:
+    """Upload the digest in the text file ``path`` to S3, reading it chunk by chunk, and return the public URL.
 
-    # Log upload attempt
-    logger.info("Starting S3 upload", extra=extra_fields)
+    Parameters
+    ----------
+    path : Path
+        The digest file.
+    s3_file_path : str
+        The S3 file path where the content will be stored.
+    ingest_id : UUID
+        The ingest ID to store as an S3 object tag.
 
-    try:
-        # Upload the content with ingest_id as tag
-        s3_client.put_object(
-            Bucket=bucket_name,
-            Key=s3_file_path,
-            Body=content.encode("utf-8"),
-            ContentType="text/plain",
-            Tagging=f"ingest_id={ingest_id!s}",
-        )
-    except ClientError as err:
-        # Log upload failure
-        logger.exception(
-            "S3 upload failed",
+    Returns
+    -------
+    str
+        Public URL to access the uploaded file.
+
+    Raises
+    ------
+    ValueError
+        If S3 is not enabled.
+    S3UploadError
+        If the upload to S3 fails.
+
+    """
+    with S3MultipartUpload(s3_file_path, ingest_id=ingest_id) as upload, path.open(encoding="utf-8") as f:
+        for chunk in iter(partial(f.read, _FILE_READ_SIZE), ""):
+            upload.write(chunk)
+        return upload.close()
+
+
+class S3MultipartUpload:
+    """Streaming upload of a digest to S3, fed chunk by chunk (e.g. as the ``sink`` of the digest pipeline).
+
+    The chunks are encoded, optionally compressed (``S3_CONTENT_ENCODING``: ``gzip`` or ``zstd``, stored with the
+    matching ``Content-Encoding``), and cut into parts of ``part_size`` bytes, which are uploaded concurrently in the
+    S3 upload threads while the next ones are produced. At most ``max_concurrency`` parts of an upload are in flight:
+    ``write`` blocks beyond that, which bounds the memory of an upload to about ``(max_concurrency + 1) * part_size``.
+    Each part is retried up to ``max_attempts`` times. Digests smaller than one part are uploaded with a single
+    ``put_object``.
+
+    Use it as a context manager, which aborts the upload if ``close`` is not reached or fails.
+
+    Attributes
+    ----------
+    s3_file_path : str
+        The S3 file path where the content will be stored.
+    ingest_id : UUID
+        The ingest ID to store as an S3 object tag.
+    content_type : str
+        The ``Content-Type`` of the object.
+    encoding : str | None
+        The ``Content-Encoding`` of the object, or ``None`` to store it uncompressed.
+    part_size : int
+        The size of the parts, in bytes (at least the 5 MiB required by S3).
+    max_concurrency : int
+        The number of parts of this upload sent at once.
+    max_attempts : int
+        The number of attempts at uploading a part.
+
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments
+        self,
+        s3_file_path: str,
+        ingest_id: UUID,
+        *,
+        content_type: str = "text/plain",
+        encoding: str | None = None,
+        part_size: int | None = None,
+        max_concurrency: int | None = None,
+        max_attempts: int = 3,
+    ) -> None:
+        if not is_s3_enabled():
+            msg = "S3 is not enabled"
+            logger.error(msg)
+            raise ValueError(msg)
+
+        self.s3_file_path = s3_file_path
+        self.ingest_id = ingest_id
+        self.content_type = content_type
+        self.encoding = encoding if encoding is not None else get_s3_content_encoding()
+        self.part_size = max(part_size or get_s3_upload_part_size(), MIN_PART_SIZE)
+        self.max_concurrency = max_concurrency or get_s3_upload_concurrency()
+        self.max_attempts = max_attempts
+
+        self._client = get_s3_client()
+        self._bucket_name = get_s3_bucket_name()
+        self._compressor = Compressor(self.encoding) if self.encoding else None
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[Future[dict[str, str | int]]] = []
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._bytes_in = 0
+        self._bytes_out = 0
+        self._started = time.perf_counter()
+
+    def __enter__(self) -> Self:
+        """Return the upload."""
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *_: object) -> None:
+        """Abort the upload if the block raised."""
+        if exc_type is not None:
+            self.abort()
+
+    def write(self, chunk: str) -> None:
+        """Add ``chunk`` to the object, uploading the parts it completes.
+
+        Raises
+        ------
+        S3UploadError
+            If the upload cannot be started.
+
+        """
+        data = chunk.encode("utf-8")
+        self._bytes_in += len(data)
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        self._buffer += data
+
+        while len(self._buffer) >= self.part_size:
+            self._submit_part(bytes(self._buffer[: self.part_size]))
+            del self._buffer[: self.part_size]
+
+    def close(self) -> str:
+        """Upload the rest of the object, complete the upload and return the public URL of the object.
+
+        Returns
+        -------
+        str
+            Public URL to access the uploaded file.
+
+        Raises
+        ------
+        S3UploadError
+            If the upload fails.
+
+        """
+        if self._compressor is not None:
+            self._buffer += self._compressor.finish()
+
+        extra_fields = {
+            "bucket_name": self._bucket_name,
+            "s3_file_path": self.s3_file_path,
+            "ingest_id": str(self.ingest_id),
+            "content_size": self._bytes_in,
+            "content_encoding": self.encoding,
+        }
+        try:
+            if self._upload_id is None:
+                # Smaller than a part: a single request
+                self._client.put_object(
+                    Bucket=self._bucket_name,
+                    Key=self.s3_file_path,
+                    Body=bytes(self._buffer),
+                    Tagging=f"ingest_id={self.ingest_id!s}",
+                    **self._object_fields(),
+                )
+                self._bytes_out = len(self._buffer)
+            else:
+                if self._buffer:
+                    self._submit_part(bytes(self._buffer))
+                parts = [part.result() for part in self._parts]
+                self._client.complete_multipart_upload(
+                    Bucket=self._bucket_name,
+                    Key=self.s3_file_path,
+                    UploadId=self._upload_id,
+                    MultipartUpload={"Parts": parts},
+                )
+        except (ClientError, BotoCoreError) as err:
+            logger.exception("S3 upload failed", extra={**extra_fields, "error_message": str(err)})
+            msg = f"Failed to upload to S3: {err}"
+            raise S3UploadError(msg) from err
+        self._buffer.clear()
+
+        try:
+            index_ingest_id(self.s3_file_path, ingest_id=self.ingest_id)
+        except S3UploadError:
+            # The digest is stored: only its lookup by ingest ID is affected
+            logger.warning("Failed to index S3 digest by ingest ID", extra=extra_fields)
+
+        elapsed = time.perf_counter() - self._started
+        label = self.encoding or "identity"
+        _s3_upload_bytes_counter.labels(encoding=label).inc(self._bytes_out)
+        _s3_upload_throughput_histogram.labels(encoding=label).observe(self._bytes_in / max(elapsed, 1e-6))
+        public_url = _build_s3_url(self.s3_file_path)
+        logger.info(
+            "S3 upload completed successfully",
             extra={
-                "bucket_name": bucket_name,
-                "s3_file_path": s3_file_path,
-                "ingest_id": str(ingest_id),
-                "error_code": err.response.get("Error", {}).get("Code"),
-                "error_message": str(err),
+                **extra_fields,
+                "stored_size": self._bytes_out,
+                "parts": len(self._parts),
+                "duration": elapsed,
+                "public_url": public_url,
             },
         )
-        msg = f"Failed to upload to S3: {err}"
-        raise S3UploadError(msg) from err
+        return public_url
+
+    def abort(self) -> None:
+        """Abort the upload, dropping the parts uploaded so far."""
+        for part in self._parts:
+            part.cancel()
+        wait(self._parts)
+        if self._upload_id is None:
+            return
+
+        try:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket_name,
+                Key=self.s3_file_path,
+                UploadId=self._upload_id,
+            )
+        except (ClientError, BotoCoreError) as err:
+            # The parts are left to the bucket's lifecycle rules
+            logger.warning("Failed to abort S3 multipart upload", extra={"error": str(err)})
+        self._upload_id = None
+
+    def _object_fields(self) -> dict[str, str]:
+        fields = {"ContentType": self.content_type}
+        if self.encoding:
+            fields["ContentEncoding"] = self.encoding
+        return fields
+
+    def _submit_part(self, body: bytes) -> None:
+        """Upload ``body`` as the next part in the background, once fewer than ``max_concurrency`` are in flight."""
+        if self._upload_id is None:
+            try:
+                response = self._client.create_multipart_upload(
+                    Bucket=self._bucket_name,
+                    Key=self.s3_file_path,
+                    Tagging=f"ingest_id={self.ingest_id!s}",
+                    **self._object_fields(),
+                )
+            except (ClientError, BotoCoreError) as err:
+                msg = f"Failed to start upload to S3: {err}"
+                raise S3UploadError(msg) from err
+            self._upload_id = response["UploadId"]
+            logger.info(
+                "Starting S3 multipart upload",
+                extra={"s3_file_path": self.s3_file_path, "ingest_id": str(self.ingest_id)},
+            )
 
-    # Generate public URL
-    alias_host = get_s3_alias_host()
-    if alias_host:
-        # Use alias host if configured
-        public_url = f"{alias_host.rstrip('/')}/{s3_file_path}"
-    else:
-        # Fallback to direct S3 URL
-        endpoint = get_s3_config().get("endpoint_url")
-        if endpoint:
-            public_url = f"{endpoint.rstrip('/')}/{bucket_name}/{s3_file_path}"
-        else:
-            public_url = f"https://{bucket_name}.s3.{get_s3_config()['region_name']}.amazonaws.com/{s3_file_path}"
+        # Fail early rather than uploading the rest of the digest in vain
+        for part in self._parts:
+            if part.done() and part.exception() is not None:
+                raise S3UploadError(str(part.exception())) from part.exception()
+
+        self._slots.acquire()
+        part_number = len(self._parts) + 1
+        self._bytes_out += len(body)
+        future = _s3_upload_executor().submit(self._upload_part, part_number, body)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._parts.append(future)
+
+    def _upload_part(self, part_number: int, body: bytes) -> dict[str, str | int]:
+        """Upload part ``part_number``, retrying with an exponential backoff, and return its entry for completion."""
+        for attempt in range(1, self.max_attempts):
+            result = self._try_upload_part(part_number, body)
+            if not isinstance(result, Exception):
+                return {"ETag": result, "PartNumber": part_number}
+
+            _s3_upload_part_retry_counter.inc()
+            logger.warning(
+                "S3 part upload failed, retrying",
+                extra={"s3_file_path": self.s3_file_path, "part_number": part_number, "error": str(result)},
+            )
+            time.sleep(_PART_RETRY_BACKOFF * 2 ** (attempt - 1))
+
+        result = self._try_upload_part(part_number, body)
+        if isinstance(result, Exception):
+            raise result
+        return {"ETag": result, "PartNumber": part_number}
+
+    def _try_upload_part(self, part_number: int, body: bytes) -> str | Exception:
+        """Upload part ``part_number`` once, and return its ETag or the error."""
+        try:
+            response = self._client.upload_part(
+                Bucket=self._bucket_name,
+                Key=self.s3_file_path,
+                UploadId=self._upload_id,
+                PartNumber=part_number,
+                Body=body,
+            )
+        except (ClientError, BotoCoreError) as err:
+            return err
+        return response["ETag"]
 
-    # Log successful upload
-    logger.info(
-        "S3 upload completed successfully",
-        extra={
-            "bucket_name": bucket_name,
-            "s3_file_path": s3_file_path,
-            "ingest_id": str(ingest_id),
-            "public_url": public_url,
-        },
-    )
 
-    return public_url
+@lru_cache(maxsize=1)
+def _s3_upload_executor() -> ThreadPoolExecutor:
+    """Return the threads uploading the parts of every upload, one per connection of the S3 client."""
+    return ThreadPoolExecutor(max_workers=get_s3_max_pool_connections(), thread_name_prefix="s3-upload")
 
 
 def upload_metadata_to_s3(metadata: S3Metadata, s3_file_path: str, ingest_id: UUID) -> str:
@@ -276,7 +643,7 @@ def upload_metadata_to_s3(metadata: S3Metadata, s3_file_path: str, ingest_id: UU
     # Generate metadata file path by replacing .txt with .json
     metadata_file_path = s3_file_path.replace(".txt", ".json")
 
-    s3_client = create_s3_client()
+    s3_client = get_s3_client()
     bucket_name = get_s3_bucket_name()
 
     extra_fields = {
@@ -363,7 +730,7 @@ def get_metadata_from_s3(s3_file_path: str) -> S3Metadata | None:
     metadata_file_path = s3_file_path.replace(".txt", ".json")
 
     try:
-        s3_client = create_s3_client()
+        s3_client = get_s3_client()
         bucket_name = get_s3_bucket_name()
 
         # Get the metadata object
@@ -395,7 +762,7 @@ def _build_s3_url(key: str) -> str:
     bucket_name = get_s3_bucket_name()
     config = get_s3_config()
 
-    endpoint = config["endpoint_url"]
+    endpoint = config.get("endpoint_url")
     if endpoint:
         return f"{endpoint.rstrip('/')}/{bucket_name}/{key}"
 
@@ -404,12 +771,70 @@ def _build_s3_url(key: str) -> str:
 
 def _check_object_tags(s3_client: BaseClient, bucket_name: str, key: str, target_ingest_id: UUID) -> bool:
     """Check if an S3 object has the matching ingest_id tag."""
+    return _get_object_ingest_id(s3_client, bucket_name, key) == str(target_ingest_id)
+
+
+def _get_object_ingest_id(s3_client: BaseClient, bucket_name: str, key: str) -> str | None:
+    """Return the ingest_id tag of an S3 object, or ``None`` if it has none."""
     try:
         tags_response = s3_client.get_object_tagging(Bucket=bucket_name, Key=key)
-        tags = {tag["Key"]: tag["Value"] for tag in tags_response.get("TagSet", [])}
-        return tags.get("ingest_id") == str(target_ingest_id)
     except ClientError:
-        return False
+        return None
+    tags = {tag["Key"]: tag["Value"] for tag in tags_response.get("TagSet", [])}
+    return tags.get("ingest_id")
+
+
+def index_ingest_id(s3_file_path: str, ingest_id: UUID | str) -> None:
+    """Record that the digest of ``ingest_id`` is stored at ``s3_file_path``, for ``get_s3_url_for_ingest_id``.
+
+    The index entry is a small object (``ingest/ids/<ingest_id>``, under ``S3_DIRECTORY_PREFIX`` if set) holding
+    the S3 key of the digest, so that looking a digest up by ingest ID takes a single GET.
+
+    Parameters
+    ----------
+    s3_file_path : str
+        The S3 key of the digest.
+    ingest_id : UUID | str
+        The ingest ID of the digest.
+
+    Raises
+    ------
+    S3UploadError
+        If the index entry cannot be stored.
+
+    """
+    try:
+        get_s3_client().put_object(
+            Bucket=get_s3_bucket_name(),
+            Key=_ingest_id_index_key(ingest_id),
+            Body=s3_file_path.encode("utf-8"),
+            ContentType="text/plain",
+        )
+    except (ClientError, BotoCoreError) as err:
+        msg = f"Failed to index digest by ingest ID in S3: {err}"
+        raise S3UploadError(msg) from err
+
+
+def _lookup_ingest_id_index(s3_client: BaseClient, bucket_name: str, ingest_id: UUID | str) -> str | None:
+    """Return the S3 key of the digest of ``ingest_id`` from its index entry, or ``None`` if it has none."""
+    try:
+        response = s3_client.get_object(Bucket=bucket_name, Key=_ingest_id_index_key(ingest_id))
+    except ClientError as err:
+        if err.response.get("Error", {}).get("Code") in {"NoSuchKey", "404"}:
+            return None
+        raise
+    return response["Body"].read().decode("utf-8") or None
+
+
+def _iter_digest_keys(s3_client: BaseClient, bucket_name: str) -> Iterator[str]:
+    """Yield the S3 keys of the stored digests (``.txt`` objects under ``ingest/``, but the index entries)."""
+    index_prefix = _with_directory_prefix(_INGEST_ID_INDEX_PREFIX)
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket_name, Prefix=_with_directory_prefix("ingest/")):
+        for obj in page.get("Contents", []):
+            key = obj["Key"]
+            if key.endswith(".txt") and not key.startswith(index_prefix):
+                yield key
 
 
 def check_s3_object_exists(s3_file_path: str) -> bool:
@@ -438,7 +863,7 @@ def check_s3_object_exists(s3_file_path: str) -> bool:
     logger.info("Checking S3 object existence", extra={"s3_file_path": s3_file_path})
     _s3_ingest_lookup_counter.inc()
     try:
-        s3_client = create_s3_client()
+        s3_client = get_s3_client()
         bucket_name = get_s3_bucket_name()
 
         # Use head_object to check if the object exists without downloading it
@@ -486,7 +911,9 @@ def check_s3_object_exists(s3_file_path: str) -> bool:
 def get_s3_url_for_ingest_id(ingest_id: UUID) -> str | None:
     """Get S3 URL for a given ingest ID if it exists.
 
-    Search for files in S3 using object tags to find the matching ingest_id and returns the S3 URL if found.
+    Look the digest up in the ingest ID index (see ``index_ingest_id``), with a single GET. Digests uploaded before
+    the index existed are only found if ``S3_INGEST_ID_SCAN_FALLBACK`` is enabled, by searching the object tags of
+    every digest (then indexing the one found), until ``backfill_ingest_id_index`` has indexed them.
     Used by the download endpoint to redirect to S3 if available.
 
     Parameters
@@ -504,58 +931,91 @@ def get_s3_url_for_ingest_id(ingest_id: UUID) -> str | None:
         logger.debug("S3 not enabled, skipping URL lookup", extra={"ingest_id": str(ingest_id)})
         return None
 
-    logger.info("Starting S3 URL lookup for ingest ID", extra={"ingest_id": str(ingest_id)})
+    s3_client = get_s3_client()
+    bucket_name = get_s3_bucket_name()
 
     try:
-        s3_client = create_s3_client()
-        bucket_name = get_s3_bucket_name()
+        key = _lookup_ingest_id_index(s3_client, bucket_name, ingest_id)
+        result = "index_hit"
+        if key is None and is_ingest_id_scan_fallback_enabled():
+            key = _scan_for_ingest_id(s3_client, bucket_name, ingest_id)
+            result = "scan_hit"
+            if key is not None:
+                index_ingest_id(key, ingest_id=ingest_id)
+    except (ClientError, S3UploadError) as err:
+        logger.exception("Error during S3 URL lookup", extra={"ingest_id": str(ingest_id), "error": str(err)})
+        return None
 
-        # List all objects in the ingest/ prefix and check their tags
-        paginator = s3_client.get_paginator("list_objects_v2")
-        page_iterator = paginator.paginate(Bucket=bucket_name, Prefix="ingest/")
-
-        objects_checked = 0
-        for page in page_iterator:
-            if "Contents" not in page:
-                continue
-
-            for obj in page["Contents"]:
-                key = obj["Key"]
-                objects_checked += 1
-                if _check_object_tags(
-                    s3_client=s3_client,
-                    bucket_name=bucket_name,
-                    key=key,
-                    target_ingest_id=ingest_id,
-                ):
-                    s3_url = _build_s3_url(key)
-                    logger.info(
-                        "Found S3 object for ingest ID",
-                        extra={
-                            "ingest_id": str(ingest_id),
-                            "s3_key": key,
-                            "s3_url": s3_url,
-                            "objects_checked": objects_checked,
-                        },
-                    )
-                    return s3_url
+    if key is None:
+        _s3_ingest_id_lookup_counter.labels(result="miss").inc()
+        logger.info("No S3 object found for ingest ID", extra={"ingest_id": str(ingest_id)})
+        return None
 
-        logger.info(
-            "No S3 object found for ingest ID",
-            extra={
-                "ingest_id": str(ingest_id),
-                "objects_checked": objects_checked,
-            },
-        )
+    _s3_ingest_id_lookup_counter.labels(result=result).inc()
+    s3_url = _build_s3_url(key)
+    logger.info(
+        "Found S3 object for ingest ID",
+        extra={"ingest_id": str(ingest_id), "s3_key": key, "s3_url": s3_url, "result": result},
+    )
+    return s3_url
+
+
+def is_ingest_id_scan_fallback_enabled() -> bool:
+    """Check if digests missing from the ingest ID index are searched by their tags, via environment variables."""
+    return os.getenv("S3_INGEST_ID_SCAN_FALLBACK", "false").lower() == "true"
 
-    except ClientError as err:
-        logger.exception(
-            "Error during S3 URL lookup",
-            extra={
-                "ingest_id": str(ingest_id),
-                "error_code": err.response.get("Error", {}).get("Code"),
-                "error_message": str(err),
-            },
-        )
 
+def _scan_for_ingest_id(s3_client: BaseClient, bucket_name: str, ingest_id: UUID) -> str | None:
+    """Return the S3 key of the digest tagged with ``ingest_id``, checking the tags of every digest in turn."""
+    objects_checked = 0
+    for key in _iter_digest_keys(s3_client, bucket_name):
+        objects_checked += 1
+        if _check_object_tags(s3_client=s3_client, bucket_name=bucket_name, key=key, target_ingest_id=ingest_id):
+            return key
+
+    logger.info("Scanned S3 digests by tag", extra={"ingest_id": str(ingest_id), "objects_checked": objects_checked})
     return None
+
+
+def backfill_ingest_id_index(*, dry_run: bool = False) -> int:
+    """Index the digests uploaded before the ingest ID index existed (a one-off migration).
+
+    Every digest is listed, and those whose ``ingest_id`` tag has no index entry yet are indexed. Running it
+    again only indexes the digests it missed.
+
+    Parameters
+    ----------
+    dry_run : bool
+        Count the digests to index without indexing them.
+
+    Returns
+    -------
+    int
+        The number of digests indexed (or to index, with ``dry_run``).
+
+    Raises
+    ------
+    ValueError
+        If S3 is not enabled.
+
+    """
+    if not is_s3_enabled():
+        msg = "S3 is not enabled"
+        raise ValueError(msg)
+
+    s3_client = get_s3_client()
+    bucket_name = get_s3_bucket_name()
+    indexed = 0
+    for key in _iter_digest_keys(s3_client, bucket_name):
+        ingest_id = _get_object_ingest_id(s3_client, bucket_name, key)
+        if ingest_id is None or _lookup_ingest_id_index(s3_client, bucket_name, ingest_id) is not None:
+            continue
+        if not dry_run:
+            index_ingest_id(key, ingest_id=ingest_id)
+        indexed += 1
+        logger.info(
+            "Indexed S3 digest by ingest ID",
+            extra={"s3_key": key, "ingest_id": ingest_id, "dry_run": dry_run},
+        )
+
+    return indexed
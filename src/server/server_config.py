@@ -7,12 +7,45 @@ from pathlib import Path
 
 from fastapi.templating import Jinja2Templates
 
+from gitingest.config import TMP_BASE_PATH
+
 MAX_DISPLAY_SIZE: int = 300_000
 
 # Slider configuration (if updated, update the logSliderToSize function in src/static/js/utils.js)
 DEFAULT_FILE_SIZE_KB: int = 5 * 1024  # 5 mb
 MAX_FILE_SIZE_KB: int = 100 * 1024  # 100 mb
 
+# Clone public repositories from local mirrors (see gitingest.utils.mirror_cache) instead of from scratch
+MIRROR_CACHE_ENABLED: bool = os.getenv("GITINGEST_MIRROR_CACHE_ENABLED", "false").lower() == "true"
+
+# Read the files of the cloned commit from its git objects instead of checking them out and walking the work tree
+INGEST_FROM_GIT_OBJECTS: bool = os.getenv("GITINGEST_INGEST_FROM_GIT_OBJECTS", "false").lower() == "true"
+
+# Leave the files larger than the requested maximum file size out of the clone (``--filter=blob:limit``)
+FILTER_LARGE_BLOBS: bool = os.getenv("GITINGEST_FILTER_LARGE_BLOBS", "false").lower() == "true"
+
+# Keep the digests on local disk and serve identical queries from them, when S3 is not enabled
+DIGEST_CACHE_ENABLED: bool = os.getenv("GITINGEST_DIGEST_CACHE_ENABLED", "false").lower() == "true"
+DIGEST_CACHE_PATH: Path = Path(os.getenv("GITINGEST_DIGEST_CACHE_PATH", str(TMP_BASE_PATH / "digests")))
+DIGEST_CACHE_MAX_BYTES: int = int(os.getenv("GITINGEST_DIGEST_CACHE_MAX_BYTES", str(5 * 1024 * 1024 * 1024)))  # 5 GB
+
+# Pool running the ingestions (and the storage of their digests) off the event loop: "thread" or "process" workers,
+# how many run at once, and how many more may wait for a worker before new requests are rejected
+WORKER_POOL_KIND: str = os.getenv("GITINGEST_WORKER_POOL_KIND", "thread")
+WORKER_POOL_SIZE: int = int(os.getenv("GITINGEST_WORKER_POOL_SIZE", str(min(4, os.cpu_count() or 1))))
+WORKER_POOL_MAX_QUEUE: int = int(os.getenv("GITINGEST_WORKER_POOL_MAX_QUEUE", "16"))
+# Threads running short blocking I/O (digest cache lookups, repository cleanups) off the event loop
+IO_POOL_SIZE: int = int(os.getenv("GITINGEST_IO_POOL_SIZE", "8"))
+
+# Ingest jobs (/api/jobs): how many run at once, how many may wait in the queue, and how long (in seconds) the
+# results of finished jobs are kept
+JOB_WORKERS: int = int(os.getenv("GITINGEST_JOB_WORKERS", "4"))
+JOB_QUEUE_SIZE: int = int(os.getenv("GITINGEST_JOB_QUEUE_SIZE", "100"))
+JOB_RESULT_TTL: int = int(os.getenv("GITINGEST_JOB_RESULT_TTL", "3600"))
+
+# Number of characters of digest handed over at once to the client of a streamed ingestion (/api/ingest/stream)
+DIGEST_STREAM_CHUNK_SIZE: int = 64 * 1024
+
 EXAMPLE_REPOS: list[dict[str, str]] = [
     {"name": "Gitingest", "url": "https://github.com/coderamp-labs/gitingest"},
     {"name": "FastAPI", "url": "https://github.com/fastapi/fastapi"},
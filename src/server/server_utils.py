@@ -2,11 +2,13 @@
 
 from fastapi import Request
 from fastapi.responses import Response
+from prometheus_client import Gauge
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 
 from gitingest.utils.logging_config import get_logger
+from gitingest.utils.token_utils import DEFAULT_ENCODING, warm_up_encoding
 
 # Initialize logger for this module
 logger = get_logger(__name__)
@@ -14,6 +16,12 @@ logger = get_logger(__name__)
 # Initialize a rate limiter
 limiter = Limiter(key_func=get_remote_address)
 
+tokenizer_load_seconds = Gauge(
+    "gitingest_tokenizer_load_seconds",
+    "Time taken to load the tiktoken encoding",
+    ["encoding"],
+)
+
 
 async def rate_limit_exception_handler(request: Request, exc: Exception) -> Response:
     """Handle rate-limiting errors with a custom exception handler.
@@ -43,6 +51,20 @@ async def rate_limit_exception_handler(request: Request, exc: Exception) -> Resp
     raise exc
 
 
+def warm_up_tokenizer() -> None:
+    """Load the tiktoken encoding ahead of the first ingestion and report how long it took.
+
+    Meant to run in a background thread at startup. Set ``TIKTOKEN_CACHE_DIR`` to a directory holding the BPE files
+    (as the Docker image does) to load the encoding without downloading it.
+    """
+    seconds = warm_up_encoding(DEFAULT_ENCODING)
+    if seconds is None:
+        return
+
+    tokenizer_load_seconds.labels(encoding=DEFAULT_ENCODING).set(seconds)
+    logger.info("Tokenizer loaded", extra={"encoding": DEFAULT_ENCODING, "seconds": round(seconds, 3)})
+
+
 ## Color printing utility
 class Colors:
     """ANSI color codes."""
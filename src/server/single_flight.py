@@ -0,0 +1,86 @@
+"""Coalescing of identical concurrent calls, so that only one of them runs (single flight)."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+from gitingest.utils.logging_config import get_logger
+
+T = TypeVar("T")
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+single_flight_calls_counter = Counter(
+    "gitingest_single_flight_calls_total",
+    "Number of calls that ran, on behalf of themselves and of the identical calls coalesced with them",
+    ["operation"],
+)
+single_flight_coalesced_counter = Counter(
+    "gitingest_single_flight_coalesced_total",
+    "Number of calls that awaited the result of an identical in-flight call instead of running",
+    ["operation"],
+)
+single_flight_in_flight_gauge = Gauge(
+    "gitingest_single_flight_in_flight",
+    "Number of distinct calls currently running",
+    ["operation"],
+)
+
+
+class SingleFlight(Generic[T]):
+    """Run at most one call per key at a time, and share its result with the identical calls made meanwhile.
+
+    Once the call finishes, its key is released: nothing is cached, a later call with the same key runs again.
+    The call runs in its own task, so it completes even if the caller that started it is cancelled (e.g. because the
+    client disconnected), as long as other callers are waiting for it.
+    """
+
+    def __init__(self, operation: str) -> None:
+        self.operation = operation
+        self._calls: dict[Hashable, asyncio.Future[T]] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``func()``, or of the in-flight call with the same ``key`` if there is one.
+
+        Parameters
+        ----------
+        key : Hashable
+            Identifies the calls whose results are interchangeable.
+        func : Callable[[], Awaitable[T]]
+            Makes the call, if no call with the same ``key`` is in flight.
+
+        Returns
+        -------
+        T
+            The result of the call. If the call raises, every caller awaiting it gets the exception.
+
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda done: self._release(key, done))
+            single_flight_calls_counter.labels(operation=self.operation).inc()
+            single_flight_in_flight_gauge.labels(operation=self.operation).inc()
+        else:
+            logger.info("Coalescing with in-flight call", extra={"operation": self.operation, "key": str(key)})
+            single_flight_coalesced_counter.labels(operation=self.operation).inc()
+
+        return await asyncio.shield(call)
+
+    def in_flight(self) -> int:
+        """Return the number of distinct calls currently running."""
+        return len(self._calls)
+
+    def _release(self, key: Hashable, call: asyncio.Future[T]) -> None:
+        """Forget the finished ``call``, so that the next call with ``key`` runs again."""
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        single_flight_in_flight_gauge.labels(operation=self.operation).dec()
+        # Mark the exception as retrieved, in case every caller was cancelled before the call failed
+        if not call.cancelled():
+            call.exception()
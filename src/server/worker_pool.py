@@ -0,0 +1,168 @@
+"""Executors running the blocking parts of a request (ingestion, S3 and disk I/O) off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, TypeVar
+
+from prometheus_client import Counter, Gauge
+
+from gitingest.utils.logging_config import get_logger
+from server.server_config import IO_POOL_SIZE, WORKER_POOL_KIND, WORKER_POOL_MAX_QUEUE, WORKER_POOL_SIZE
+
+T = TypeVar("T")
+
+# Initialize logger for this module
+logger = get_logger(__name__)
+
+worker_pool_pending_gauge = Gauge(
+    "gitingest_worker_pool_pending",
+    "Number of jobs running or queued in the worker pool",
+    ["pool"],
+)
+worker_pool_rejected_counter = Counter(
+    "gitingest_worker_pool_rejected_total",
+    "Number of jobs rejected because the queue of the worker pool was full",
+    ["pool"],
+)
+
+
+class WorkerPoolFullError(RuntimeError):
+    """Raised when a job is submitted to a worker pool whose queue is full."""
+
+
+class WorkerPool:
+    """Thread or process pool running blocking jobs for the event loop, with a bounded queue.
+
+    At most ``max_workers`` jobs run at once, and at most ``max_queue`` more wait for a worker. Jobs submitted beyond
+    that are rejected with ``WorkerPoolFullError`` instead of piling up, so that an overloaded server sheds load
+    instead of answering every request late. The executor is created on first use.
+
+    With processes, the jobs and their arguments and results must be picklable, and the processes are started with
+    the ``spawn`` method, which is safe in a process running threads.
+
+    Attributes
+    ----------
+    name : str
+        The name of the pool, used in metrics and logs.
+    kind : str
+        ``"thread"`` or ``"process"``.
+    max_workers : int
+        The number of jobs running at once.
+    max_queue : int
+        The number of jobs waiting for a worker, beyond which new jobs are rejected.
+
+    """
+
+    def __init__(self, name: str, kind: str = "thread", max_workers: int = 4, max_queue: int = 16) -> None:
+        if kind not in {"thread", "process"}:
+            msg = f"Invalid worker pool kind: {kind!r} (expected 'thread' or 'process')"
+            raise ValueError(msg)
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def full(self) -> bool:
+        """Return ``True`` if a job submitted now would be rejected."""
+        return self._pending >= self.max_workers + self.max_queue
+
+    async def run(self, func: Callable[..., T], *args: object) -> T:
+        """Run ``func(*args)`` in the pool and return its result.
+
+        Parameters
+        ----------
+        func : Callable[..., T]
+            The blocking function to run.
+        *args : object
+            The arguments of ``func``.
+
+        Returns
+        -------
+        T
+            The result of ``func(*args)``.
+
+        Raises
+        ------
+        WorkerPoolFullError
+            If ``max_workers + max_queue`` jobs are already running or queued.
+
+        """
+        with self._lock:
+            if self.full():
+                worker_pool_rejected_counter.labels(pool=self.name).inc()
+                logger.warning("Worker pool full, rejecting job", extra={"pool": self.name, "pending": self._pending})
+                msg = f"The server is busy ({self.name} queue is full), please try again later"
+                raise WorkerPoolFullError(msg)
+            self._pending += 1
+            worker_pool_pending_gauge.labels(pool=self.name).inc()
+
+        call = partial(func, *args)
+        if self.kind == "thread":
+            # Run in a copy of the caller's context, for the progress reporter to reach the worker thread
+            call = partial(contextvars.copy_context().run, call)
+        try:
+            future = self._get_executor().submit(call)
+        except BaseException:
+            self._release()
+            raise
+        # Released when the job finishes, even if the awaiting request was cancelled before
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        """Shut the executor down, waiting for the running jobs. The pool creates a new executor on next use."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name)
+        return self._executor
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            worker_pool_pending_gauge.labels(pool=self.name).dec()
+
+
+@lru_cache(maxsize=1)
+def ingest_pool() -> WorkerPool:
+    """Return the pool running ingestions and the storage of their digests.
+
+    Returns
+    -------
+    WorkerPool
+        The shared ingestion pool, configured with ``GITINGEST_WORKER_POOL_*``.
+
+    """
+    return WorkerPool("ingest", kind=WORKER_POOL_KIND, max_workers=WORKER_POOL_SIZE, max_queue=WORKER_POOL_MAX_QUEUE)
+
+
+@lru_cache(maxsize=1)
+def io_pool() -> WorkerPool:
+    """Return the thread pool running short blocking I/O, such as digest cache lookups and repository cleanups.
+
+    Returns
+    -------
+    WorkerPool
+        The shared I/O pool.
+
+    """
+    return WorkerPool("io", kind="thread", max_workers=IO_POOL_SIZE, max_queue=IO_POOL_SIZE * 16)
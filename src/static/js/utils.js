@@ -106,6 +106,7 @@ function showLoading() {
     document.getElementById('results-loading').style.display = 'block';
     document.getElementById('results-section').style.display = 'none';
     document.getElementById('results-error').style.display = 'none';
+    showProgress(null);
 }
 function showResults() {
     document.getElementById('results-loading').style.display = 'none';
@@ -228,8 +229,8 @@ function handleSubmit(event, showLoadingSpinner = false) {
         setButtonLoadingState(submitButton, true);
     }
 
-    // Submit the form to /api/ingest as JSON
-    fetch('/api/ingest', {
+    // Queue the ingestion as a job, then follow its progress until its result is available
+    fetch('/api/jobs', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(json_data)
@@ -242,9 +243,9 @@ function handleSubmit(event, showLoadingSpinner = false) {
             } catch {
                 data = {};
             }
-            setButtonLoadingState(submitButton, false);
 
             if (!response.ok) {
+                setButtonLoadingState(submitButton, false);
                 // Show all error details if present
                 if (Array.isArray(data.detail)) {
                     const details = data.detail.map((d) => `<li>${d.msg || JSON.stringify(d)}</li>`).join('');
@@ -259,14 +260,54 @@ function handleSubmit(event, showLoadingSpinner = false) {
                 return;
             }
 
-            // Handle error in data
-            if (data.error) {
-                showError(`<div class='mb-6 p-4 bg-red-50 border border-red-200 rounded-lg text-red-700'>${data.error}</div>`);
+            followJob(data.job_id, submitButton);
+        })
+        .catch((error) => {
+            setButtonLoadingState(submitButton, false);
+            showError(`<div class='mb-6 p-4 bg-red-50 border border-red-200 rounded-lg text-red-700'>${error}</div>`);
+        });
+}
+
+// Stream the progress of a job, then show its result (falls back to polling without Server-Sent Events)
+function followJob(jobId, submitButton) {
+    if (!window.EventSource) {
+        pollJob(jobId, submitButton);
+
+        return;
+    }
+    const source = new EventSource(`/api/jobs/${jobId}/events`);
+
+    source.addEventListener('progress', (event) => showProgress(JSON.parse(event.data)));
+    source.addEventListener('done', () => {
+        source.close();
+        pollJob(jobId, submitButton);
+    });
+    source.onerror = () => {
+        source.close();
+        pollJob(jobId, submitButton);
+    };
+}
+
+function pollJob(jobId, submitButton) {
+    fetch(`/api/jobs/${jobId}`)
+        .then(async (response) => {
+            const job = await response.json();
+
+            if (!response.ok) {
+                throw new Error(job.detail || 'An error occurred.');
+            }
+            if (job.status === 'queued' || job.status === 'running') {
+                setTimeout(() => pollJob(jobId, submitButton), 1000);
 
                 return;
             }
+            setButtonLoadingState(submitButton, false);
+            if (job.status === 'failed') {
+                showError(`<div class='mb-6 p-4 bg-red-50 border border-red-200 rounded-lg text-red-700'>${job.error}</div>`);
 
-            handleSuccessfulResponse(data);
+                return;
+            }
+            handleSuccessfulResponse(job.result);
         })
         .catch((error) => {
             setButtonLoadingState(submitButton, false);
@@ -274,6 +315,28 @@ function handleSubmit(event, showLoadingSpinner = false) {
         });
 }
 
+// Describe a progress event of the job under the loading spinner
+function showProgress(event) {
+    const progress = document.getElementById('results-progress');
+
+    if (!progress) {return;}
+    if (!event) {
+        progress.textContent = '';
+
+        return;
+    }
+    const counters = event.counters || {};
+    const messages = {
+        queued: 'Waiting for a worker...',
+        clone: `Cloning repository: ${event.message}`,
+        walk: `Scanning files: ${counters.files} of at most ${counters.max_files} (${formatSize((counters.bytes || 0) / 1024)})`,
+        format: `Writing digest: ${counters.files} / ${counters.total_files} files`,
+        store: event.message
+    };
+
+    progress.textContent = messages[event.stage] || event.message;
+}
+
 function copyFullDigest() {
     const directoryStructure = document.getElementById('directory-structure-content').value;
     const filesContent = document.querySelector('.result-text').value;
@@ -14,10 +14,14 @@ from typing import TYPE_CHECKING, Any, Callable, Dict
 from unittest.mock import AsyncMock
 
 import pytest
+import tiktoken
 
 from gitingest.query_parser import IngestionQuery
+from gitingest.utils.token_cache import default_token_cache
 
 if TYPE_CHECKING:
+    from collections.abc import Iterator
+
     from pytest_mock import MockerFixture
 
 WriteNotebookFunc = Callable[[str, Dict[str, Any]], Path]
@@ -214,11 +218,49 @@ def run_command_mock(mocker: MockerFixture) -> AsyncMock:
     ``stdout`` / ``stderr`` bytes. Tests can still access / tweak the mock via the fixture argument.
     """
     mock = AsyncMock(side_effect=_fake_run_command)
+    mocker.patch("gitingest.utils.git_utils._git_installed", new=False)  # check git again, as tests count the calls
     mocker.patch("gitingest.utils.git_utils.run_command", mock)
     mocker.patch("gitingest.clone.run_command", mock)
     return mock
 
 
+@pytest.fixture(autouse=True)
+def isolated_token_cache(tmp_path: Path, mocker: MockerFixture) -> Iterator[Path]:
+    """Point the persistent token count cache at a per-test database instead of the shared one in ``TMP_BASE_PATH``.
+
+    Yields
+    ------
+    Path
+        The location of the per-test token count cache.
+
+    """
+    path = tmp_path / "token_counts.sqlite3"
+    mocker.patch("gitingest.utils.token_cache.TOKEN_CACHE_PATH", path)
+    default_token_cache.cache_clear()
+    yield path
+    default_token_cache().close()
+    default_token_cache.cache_clear()
+
+
+@pytest.fixture
+def byte_encoding(mocker: MockerFixture) -> tiktoken.Encoding:
+    """Patch ``tiktoken.get_encoding`` to return an offline encoding with one token per UTF-8 byte.
+
+    The real encodings are downloaded on first use, which is not possible in every test environment. With this
+    encoding, the token count of a text is simply the length of its UTF-8 encoding. Encodings already loaded by the
+    shared registry are hidden for the duration of the test.
+    """
+    encoding = tiktoken.Encoding(
+        name="test_bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    mocker.patch("tiktoken.get_encoding", return_value=encoding)
+    mocker.patch.dict("gitingest.utils.token_utils._ENCODINGS", clear=True)
+    return encoding
+
+
 async def _fake_run_command(*args: str) -> tuple[bytes, bytes]:
     if "ls-remote" in args:
         # single match: <sha> <tab>refs/heads/main
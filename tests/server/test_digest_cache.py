@@ -0,0 +1,208 @@
+"""Tests for the ``digest_cache`` module and the serving of identical queries from the local digest cache."""
+
+from __future__ import annotations
+
+import sqlite3
+import uuid
+from typing import TYPE_CHECKING, Callable
+
+import pytest
+
+from server import query_processor
+from server.digest_cache import LocalDigestCache
+from server.models import IngestSuccessResponse, PatternType, S3Metadata
+from tests.conftest import DEMO_COMMIT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from gitingest.schemas import IngestionQuery
+
+METADATA = S3Metadata(summary="summary", tree="tree", content="content")
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> Iterator[LocalDigestCache]:
+    """Provide a local digest cache in ``tmp_path`` with a budget of 100 bytes."""
+    cache = LocalDigestCache(tmp_path / "digests", max_bytes=100)
+    yield cache
+    cache.close()
+
+
+def _digest_file(tmp_path: Path, content: str, name: str = "owner-repo.txt") -> Path:
+    """Write ``content`` to a new digest file in ``tmp_path``."""
+    directory = tmp_path / str(uuid.uuid4())
+    directory.mkdir()
+    path = directory / name
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_local_digest_cache_round_trip(tmp_path: Path, cache: LocalDigestCache) -> None:
+    """Test that a stored digest is found by key and by ingest ID, and that identical digests share one file.
+
+    Given two keys whose digests have the same content:
+    When both digests are stored,
+    Then each key should return its own download URL and metadata, and both should be served from the same file.
+    """
+    first_id, second_id = uuid.uuid4(), uuid.uuid4()
+    first_file = _digest_file(tmp_path, "tree\ncontent")
+
+    url = cache.put("ingest/a.txt", first_file, metadata=METADATA, ingest_id=first_id)
+    cache.put("ingest/b.txt", _digest_file(tmp_path, "tree\ncontent", "other.txt"), METADATA, ingest_id=second_id)
+
+    assert url == f"/api/download/file/{first_id}"
+    assert not first_file.exists()
+    cached = cache.get("ingest/a.txt")
+    assert cached is not None
+    assert cached.url == url
+    assert cached.metadata == METADATA
+    assert cache.get("ingest/missing.txt") is None
+
+    first_path, first_name = cache.get_file(first_id)
+    second_path, second_name = cache.get_file(second_id)
+    assert first_path == second_path
+    assert first_path.read_text(encoding="utf-8") == "tree\ncontent"
+    assert (first_name, second_name) == ("owner-repo.txt", "other.txt")
+    assert cache.get_file(uuid.uuid4()) is None
+
+
+def test_local_digest_cache_keeps_every_ingest_of_a_key(tmp_path: Path, cache: LocalDigestCache) -> None:
+    """Test that storing a key again keeps the digest of the earlier ingest downloadable, until the key is evicted.
+
+    Given a key stored by two ingests, e.g. by two workers ingesting the same repository at once:
+    When both ingests are looked up, then the key is evicted by a third digest,
+    Then the key should point at the latest ingest, both ingests should be served until the eviction, and none after.
+    """
+    first_id, second_id = uuid.uuid4(), uuid.uuid4()
+    cache.put("ingest/a.txt", _digest_file(tmp_path, "a" * 40), METADATA, ingest_id=first_id)
+    cache.put("ingest/a.txt", _digest_file(tmp_path, "b" * 40), METADATA, ingest_id=second_id)
+
+    cached = cache.get("ingest/a.txt")
+    assert cached is not None
+    assert cached.url == f"/api/download/file/{second_id}"
+    first_path, _ = cache.get_file(first_id)
+    second_path, _ = cache.get_file(second_id)
+    assert first_path.read_text(encoding="utf-8") == "a" * 40
+    assert second_path.read_text(encoding="utf-8") == "b" * 40
+
+    cache.put("ingest/c.txt", _digest_file(tmp_path, "c" * 40), METADATA, ingest_id=uuid.uuid4())
+
+    assert cache.get_file(first_id) is None
+    assert cache.get_file(second_id) is None
+    assert not first_path.exists()
+    assert not second_path.exists()
+
+
+def test_local_digest_cache_evicts_least_recently_used(tmp_path: Path, cache: LocalDigestCache) -> None:
+    """Test that the least recently used digests are evicted once the files exceed the budget.
+
+    Given a cache with a budget of 100 bytes holding two 40-byte digests, the first of which was just read:
+    When a third 40-byte digest is stored,
+    Then the second digest should be evicted along with its file, and the other two should remain.
+    """
+    ids = [uuid.uuid4() for _ in range(3)]
+    for index, ingest_id in enumerate(ids[:2]):
+        cache.put(f"ingest/{index}.txt", _digest_file(tmp_path, str(index) * 40), METADATA, ingest_id=ingest_id)
+    evicted_path, _ = cache.get_file(ids[1])
+    assert cache.get("ingest/0.txt") is not None
+
+    cache.put("ingest/2.txt", _digest_file(tmp_path, "2" * 40), METADATA, ingest_id=ids[2])
+
+    assert cache.get("ingest/1.txt") is None
+    assert not evicted_path.exists()
+    assert cache.get("ingest/0.txt") is not None
+    assert cache.get("ingest/2.txt") is not None
+
+
+def test_local_digest_cache_keeps_files_when_commit_fails(
+    tmp_path: Path,
+    cache: LocalDigestCache,
+    mocker: MockerFixture,
+) -> None:
+    """Test that files are only evicted once the index is committed, and that a digest failing to be stored is kept.
+
+    Given a full cache whose transaction fails after choosing the digests to evict, e.g. because the index is busy:
+    When a new digest is stored,
+    Then the files of the digests still in the index should remain, and the new digest should stay in its file.
+    """
+    ids = [uuid.uuid4() for _ in range(2)]
+    for index, ingest_id in enumerate(ids):
+        cache.put(f"ingest/{index}.txt", _digest_file(tmp_path, str(index) * 40), METADATA, ingest_id=ingest_id)
+    paths = [cache.get_file(ingest_id)[0] for ingest_id in ids]
+    evict = LocalDigestCache._evict  # noqa: SLF001
+
+    def evict_then_fail(self: LocalDigestCache, *args: object, **kwargs: object) -> list[str]:
+        evict(self, *args, **kwargs)
+        msg = "database is locked"
+        raise sqlite3.OperationalError(msg)
+
+    mocker.patch.object(LocalDigestCache, "_evict", autospec=True, side_effect=evict_then_fail)
+    digest_file = _digest_file(tmp_path, "2" * 40)
+    url = cache.put("ingest/2.txt", digest_file, METADATA, ingest_id=uuid.uuid4())
+
+    assert url.startswith("/api/download/file/")
+    assert digest_file.read_text(encoding="utf-8") == "2" * 40
+    assert all(path.exists() for path in paths)
+    assert len(list((tmp_path / "digests" / "objects").rglob("*.txt"))) == len(paths)
+
+    reopened = LocalDigestCache(tmp_path / "digests", max_bytes=100)
+    assert reopened.get_file(ids[0]) is not None
+    assert reopened.get_file(ids[1]) is not None
+    reopened.close()
+
+
+def test_local_digest_cache_drops_missing_files(tmp_path: Path, cache: LocalDigestCache) -> None:
+    """Test that a digest whose file was deleted behind the cache's back is a cache miss."""
+    ingest_id = uuid.uuid4()
+    cache.put("ingest/a.txt", _digest_file(tmp_path, "content"), METADATA, ingest_id=ingest_id)
+    path, _ = cache.get_file(ingest_id)
+    path.unlink()
+
+    assert cache.get("ingest/a.txt") is None
+    assert cache.get_file(ingest_id) is None
+
+
+@pytest.mark.asyncio
+async def test_process_query_serves_repeat_queries_from_local_cache(
+    tmp_path: Path,
+    cache: LocalDigestCache,
+    mocker: MockerFixture,
+    sample_query: IngestionQuery,
+) -> None:
+    """Test that a query identical to a previous one is served from the local digest cache without cloning.
+
+    Given a deployment without S3 but with the local digest cache:
+    When the same repository is requested twice,
+    Then it should be cloned once, and both responses should point to the digest of the first ingest.
+    """
+    sample_query.url = "https://github.com/test_user/test_repo"
+    sample_query.host = "github.com"
+
+    def parse(*_: object, **__: object) -> IngestionQuery:
+        query = sample_query.model_copy(update={"id": uuid.uuid4()})
+        query.local_path = tmp_path / str(query.id) / "test_repo"
+        query.local_path.parent.mkdir()
+        return query
+
+    def stream_ingest(_: IngestionQuery, sink: Callable[[str], object]) -> tuple[str, str]:
+        sink("tree\ncontent")
+        return "Estimated tokens: 1", "tree"
+
+    mocker.patch.object(query_processor, "get_digest_cache", return_value=cache)
+    mocker.patch.object(query_processor, "parse_remote_repo", side_effect=parse)
+    mocker.patch.object(query_processor, "resolve_commit", return_value=DEMO_COMMIT)
+    mocker.patch.object(query_processor, "stream_ingest_query", side_effect=stream_ingest)
+    clone = mocker.patch.object(query_processor, "clone_repo")
+
+    first = await query_processor.process_query(sample_query.url, 50, PatternType.EXCLUDE, "*.md")
+    second = await query_processor.process_query(sample_query.url, 50, PatternType.EXCLUDE, "*.md")
+
+    assert isinstance(first, IngestSuccessResponse)
+    assert isinstance(second, IngestSuccessResponse)
+    assert clone.call_count == 1
+    assert second.digest_url == first.digest_url
+    assert (second.summary, second.tree, second.content) == (first.summary, "tree", "content")
@@ -0,0 +1,95 @@
+"""Tests for the digests streamed from the ingestion pipeline and the ``/api/ingest/stream`` endpoint."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from gitingest.ingestion import ingest_query
+from server import routers_utils
+from server.compression import negotiate_encoding
+from server.digest_stream import DigestStream
+from server.main import app
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from gitingest.schemas import IngestionQuery
+
+
+@pytest.fixture
+def local_query(temp_directory: Path, sample_query: IngestionQuery) -> IngestionQuery:
+    """Return a query of the temporary directory, as if it had been cloned."""
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    return sample_query
+
+
+@pytest.mark.asyncio
+async def test_digest_stream_matches_ingest_query(local_query: IngestionQuery, mocker: MockerFixture) -> None:
+    """Test that the streamed digest is the digest of ``ingest_query``, in chunks, and that the clone is removed.
+
+    Given a small chunk size:
+    When the digest stream is iterated over,
+    Then it should yield several chunks making up the directory structure and file contents, and call ``cleanup``.
+    """
+    _, tree, content = ingest_query(local_query)
+    cleanup = mocker.Mock()
+
+    stream = DigestStream(local_query, cleanup=cleanup, chunk_size=64, max_pending=1)
+    chunks = [chunk async for chunk in stream]
+
+    assert len(chunks) > 1
+    assert "".join(chunks) == f"{tree}\n{content}"
+    assert stream.summary is not None
+    assert "Files analyzed: 8" in stream.summary
+    cleanup.assert_called_once_with()
+
+
+@pytest.mark.asyncio
+async def test_digest_stream_closed_early_stops_ingestion(local_query: IngestionQuery, mocker: MockerFixture) -> None:
+    """Test that closing the stream after the first chunk stops the ingestion and still removes the clone."""
+    cleanup = mocker.Mock()
+
+    chunks = DigestStream(local_query, cleanup=cleanup, chunk_size=1, max_pending=1).__aiter__()
+    assert await chunks.__anext__()
+    await chunks.aclose()
+
+    cleanup.assert_called_once_with()
+
+
+def test_negotiate_encoding() -> None:
+    """Test that gzip is picked when accepted, unless refused with ``q=0``."""
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("br;q=1.0, gzip;q=0.5") == "gzip"
+    assert negotiate_encoding("gzip;q=0") is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding(None) is None
+
+
+def test_ingest_stream_endpoint(local_query: IngestionQuery, mocker: MockerFixture) -> None:
+    """Test that ``/api/ingest/stream`` streams the digest as gzip-compressed text, and reports early failures."""
+    _, tree, content = ingest_query(local_query)
+    stream_query = mocker.patch.object(routers_utils, "stream_query")
+    stream_query.return_value = DigestStream(local_query, cleanup=mocker.Mock(), chunk_size=64)
+    payload = {"input_text": "owner/repo", "max_file_size": 50}
+
+    with TestClient(app) as client:
+        client.headers.update({"Host": "localhost"})
+        response = client.post("/api/ingest/stream", json=payload, headers={"Accept-Encoding": "gzip"})
+
+        stream_query.side_effect = ValueError("Invalid repository")
+        error = client.post("/api/ingest/stream", json=payload)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "text/plain; charset=utf-8"
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == f"{tree}\n{content}"  # Decompressed by the client
+    assert error.status_code == status.HTTP_400_BAD_REQUEST
+    assert error.json()["error"] == "Validation error: Invalid repository"
@@ -0,0 +1,125 @@
+"""Tests for the ingest job queue, its workers and the ``/api/jobs`` endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from server import jobs, routers_utils
+from server.jobs import InMemoryJobBackend, JobQueueFullError, JobRunner
+from server.main import app
+from server.models import IngestErrorResponse, IngestRequest, IngestSuccessResponse, JobStatus
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+SUCCESS = IngestSuccessResponse(
+    repo_url="https://github.com/owner/repo",
+    short_repo_url="owner/repo",
+    summary="summary",
+    digest_url="/api/download/file/id",
+    tree="tree",
+    content="content",
+    default_max_file_size=50,
+    pattern_type="exclude",
+    pattern="",
+)
+
+
+def _request(input_text: str = "https://github.com/owner/repo") -> IngestRequest:
+    return IngestRequest(input_text=input_text, max_file_size=50)
+
+
+@pytest.mark.asyncio
+async def test_job_runner_runs_queued_jobs(mocker: MockerFixture) -> None:
+    """Test that jobs wait in the queue for a worker, and end with the result or the error of ``process_query``.
+
+    Given a runner with one worker and two jobs, the second of which fails:
+    When the jobs are submitted,
+    Then the second job should be queued behind the first, and both should finish with their outcome.
+    """
+    started = asyncio.Event()
+    proceed = asyncio.Event()
+
+    async def process_query(input_text: str, **_: object) -> IngestSuccessResponse | IngestErrorResponse:
+        started.set()
+        await proceed.wait()
+        return SUCCESS if input_text.endswith("repo") else IngestErrorResponse(error="Repository not found")
+
+    mocker.patch.object(jobs, "process_query", side_effect=process_query)
+    runner = JobRunner(InMemoryJobBackend(), workers=1)
+    runner.start()
+    try:
+        first = await runner.submit(_request())
+        second = await runner.submit(_request("https://github.com/owner/missing"))
+        await started.wait()
+
+        assert first.status == JobStatus.RUNNING
+        assert await runner.backend.queue_position(second.id) == 0
+
+        proceed.set()
+        for _ in range(100):
+            if second.finished_at is not None:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        await runner.stop()
+
+    assert (first.status, first.result) == (JobStatus.SUCCEEDED, SUCCESS)
+    assert (second.status, second.error) == (JobStatus.FAILED, "Repository not found")
+    assert await runner.backend.get(first.id) is first
+
+
+@pytest.mark.asyncio
+async def test_in_memory_backend_bounds_queue_and_expires_results() -> None:
+    """Test that the queue rejects jobs beyond its size, and that finished jobs are forgotten after their TTL."""
+    backend = InMemoryJobBackend(max_queue=1, result_ttl=60)
+    job = jobs.IngestJob(request=_request())
+    await backend.submit(job)
+
+    with pytest.raises(JobQueueFullError):
+        await backend.submit(jobs.IngestJob(request=_request()))
+
+    assert await backend.next_job() is job
+    job.finished_at = time.time() - 61
+    assert await backend.get(job.id) is None
+
+
+def test_jobs_api(mocker: MockerFixture) -> None:
+    """Test that a job queued through ``POST /api/jobs`` can be polled until its result is available."""
+    mocker.patch.object(jobs, "process_query", return_value=SUCCESS)
+
+    with TestClient(app) as client:
+        client.headers.update({"Host": "localhost"})
+        response = client.post("/api/jobs", json={"input_text": "owner/repo", "max_file_size": 50, "token": "secret"})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["job_id"]
+        assert response.headers["Location"] == f"/api/jobs/{job_id}"
+
+        deadline = time.time() + 5
+        while (job := client.get(f"/api/jobs/{job_id}").json())["status"] != JobStatus.SUCCEEDED:
+            assert time.time() < deadline
+            time.sleep(0.01)
+
+        assert client.get(f"/api/jobs/{uuid.uuid4()}").status_code == status.HTTP_404_NOT_FOUND
+
+    assert job["result"] == SUCCESS.model_dump()
+    assert "secret" not in str(job)
+
+
+def test_jobs_routes_leave_repositories_of_jobs_owner_to_ingest(mocker: MockerFixture) -> None:
+    """Test that ``GET /api/jobs/<repository>`` ingests the repository of the ``jobs`` owner, not a job."""
+    process_query = mocker.patch.object(routers_utils, "process_query", return_value=SUCCESS)
+
+    with TestClient(app) as client:
+        client.headers.update({"Host": "localhost"})
+        response = client.get("/api/jobs/some-repo")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert process_query.call_args.kwargs["input_text"] == "jobs/some-repo"
@@ -0,0 +1,91 @@
+"""Tests for the progress broker and the ``/api/jobs/{job_id}/events`` stream."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from typing import TYPE_CHECKING
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from gitingest.utils.progress import ProgressEvent, report_progress
+from server import jobs
+from server.main import app
+from server.models import IngestSuccessResponse
+from server.progress import DONE_STAGE, ProgressBroker
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+@pytest.mark.asyncio
+async def test_progress_broker_replays_and_streams_events() -> None:
+    """Test that a subscriber receives the past events of a job, then the new ones from any thread, until done.
+
+    Given a job channel with an event already published:
+    When events are reported from a worker thread after subscribing,
+    Then the subscriber should receive all of them in order, and the stream should end with the done event.
+    """
+    broker = ProgressBroker()
+    reporter = broker.open("job")
+    broker.publish("job", ProgressEvent(stage="queued"))
+    events = broker.subscribe("job")
+    assert events is not None
+    assert broker.subscribe("unknown") is None
+
+    def work() -> None:
+        with reporter.activate():
+            report_progress("walk", files=1)
+            report_progress("walk", files=2, force=True)
+        reporter.callback(ProgressEvent(stage=DONE_STAGE, message="succeeded"))
+
+    await asyncio.to_thread(work)
+    received = [(event.stage, event.counters) async for event in events]
+
+    assert received == [("queued", {}), ("walk", {"files": 1}), ("walk", {"files": 2}), (DONE_STAGE, {})]
+    # Late subscribers still get the outcome
+    late = broker.subscribe("job")
+    assert late is not None
+    assert [event.stage async for event in late][-1] == DONE_STAGE
+
+
+def test_job_events_endpoint(mocker: MockerFixture) -> None:
+    """Test that the progress reported while a job runs is streamed as Server-Sent Events, ending with ``done``."""
+
+    async def process_query(**_: object) -> IngestSuccessResponse:
+        report_progress("clone", "Cloning repository", force=True)
+        report_progress("walk", force=True, files=3, max_files=10)
+        return IngestSuccessResponse(
+            repo_url="https://github.com/owner/repo",
+            short_repo_url="owner/repo",
+            summary="summary",
+            digest_url="/api/download/file/id",
+            tree="tree",
+            content="content",
+            default_max_file_size=50,
+            pattern_type="exclude",
+            pattern="",
+        )
+
+    mocker.patch.object(jobs, "process_query", side_effect=process_query)
+
+    with TestClient(app) as client:
+        client.headers.update({"Host": "localhost"})
+        job_id = client.post("/api/jobs", json={"input_text": "owner/repo", "max_file_size": 50}).json()["job_id"]
+
+        with client.stream("GET", f"/api/jobs/{job_id}/events") as response:
+            assert response.status_code == status.HTTP_200_OK
+            assert response.headers["content-type"].startswith("text/event-stream")
+            lines = [line for line in response.iter_lines() if line]
+
+        assert client.get(f"/api/jobs/{uuid.uuid4()}/events").status_code == status.HTTP_404_NOT_FOUND
+
+    names = [line.removeprefix("event: ") for line in lines if line.startswith("event: ")]
+    data = [json.loads(line.removeprefix("data: ")) for line in lines if line.startswith("data: ")]
+    assert names == ["progress", "progress", "progress", DONE_STAGE]
+    assert [event["stage"] for event in data] == ["queued", "clone", "walk", DONE_STAGE]
+    assert data[2]["counters"] == {"files": 3, "max_files": 10}
+    assert data[-1]["message"] == "succeeded"
@@ -0,0 +1,178 @@
+"""Tests for the S3 client shared by the server process and the multipart uploads of digests."""
+
+from __future__ import annotations
+
+import gzip
+import io
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import pytest
+from botocore.exceptions import ClientError
+
+from server import s3_utils
+from server.s3_utils import (
+    S3ClientManager,
+    S3MultipartUpload,
+    S3UploadError,
+    backfill_ingest_id_index,
+    create_s3_client,
+    get_s3_url_for_ingest_id,
+    upload_to_s3,
+)
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+
+def test_s3_client_manager_shares_one_client(mocker: MockerFixture) -> None:
+    """Test that concurrent callers share a single client, until it is reset.
+
+    Given a client manager:
+    When the client is requested from many threads at once,
+    Then it should be created once and returned to every caller, and created again only after ``reset``.
+    """
+    create = mocker.patch.object(s3_utils, "create_s3_client", side_effect=lambda: object())
+    manager = S3ClientManager()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(lambda _: manager.get(), range(64)))
+
+    assert all(client is clients[0] for client in clients)
+    assert create.call_count == 1
+
+    manager.reset()
+    assert manager.get() is not clients[0]
+    assert create.call_count == 2  # noqa: PLR2004
+
+
+def test_create_s3_client_pool_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the client keeps ``S3_MAX_POOL_CONNECTIONS`` connections open."""
+    monkeypatch.setenv("S3_ENDPOINT", "http://127.0.0.1:9000")
+    monkeypatch.setenv("S3_MAX_POOL_CONNECTIONS", "48")
+
+    client = create_s3_client()
+
+    assert client.meta.config.max_pool_connections == 48  # noqa: PLR2004
+    assert client.meta.endpoint_url == "http://127.0.0.1:9000"
+
+
+class _FakeS3Client:
+    """Stand-in for the S3 client, keeping the uploaded objects and parts in memory."""
+
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures  # Failed attempts of every part before it is stored
+        self.attempts: dict[int, int] = {}
+        self.parts: dict[int, bytes] = {}
+        self.objects: dict[str, tuple[bytes, dict[str, str]]] = {}
+        self.aborted = False
+        self.gets = 0
+
+    def put_object(self, Key: str, Body: bytes, **fields: str) -> None:  # noqa: N803 (boto3 argument names)
+        self.objects[Key] = (Body, fields)
+
+    def create_multipart_upload(self, **_: str) -> dict[str, str]:
+        return {"UploadId": "upload"}
+
+    def upload_part(self, PartNumber: int, Body: bytes, **_: object) -> dict[str, str]:  # noqa: N803
+        self.attempts[PartNumber] = self.attempts.get(PartNumber, 0) + 1
+        if self.attempts[PartNumber] <= self.failures:
+            raise ClientError({"Error": {"Code": "SlowDown"}}, "UploadPart")
+        self.parts[PartNumber] = Body
+        return {"ETag": f"etag-{PartNumber}"}
+
+    def complete_multipart_upload(self, Key: str, MultipartUpload: dict, **_: str) -> None:  # noqa: N803
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        self.objects[Key] = (b"".join(self.parts[number] for number in numbers), {})
+
+    def abort_multipart_upload(self, **_: str) -> None:
+        self.aborted = True
+
+    def get_object(self, Key: str, **_: str) -> dict[str, io.BytesIO]:  # noqa: N803
+        self.gets += 1
+        if Key not in self.objects:
+            raise ClientError({"Error": {"Code": "NoSuchKey"}}, "GetObject")
+        return {"Body": io.BytesIO(self.objects[Key][0])}
+
+    def get_object_tagging(self, Key: str, **_: str) -> dict[str, list[dict[str, str]]]:  # noqa: N803
+        tagging = self.objects[Key][1].get("Tagging", "")
+        tags = [dict(zip(("Key", "Value"), tag.split("=", 1))) for tag in tagging.split("&") if tag]
+        return {"TagSet": tags}
+
+    def get_paginator(self, _: str) -> _FakeS3Client:
+        return self
+
+    def paginate(self, Prefix: str, **_: str) -> list[dict[str, list[dict[str, str]]]]:  # noqa: N803
+        return [{"Contents": [{"Key": key} for key in sorted(self.objects) if key.startswith(Prefix)]}]
+
+
+@pytest.fixture
+def fake_s3(monkeypatch: pytest.MonkeyPatch, mocker: MockerFixture) -> _FakeS3Client:
+    """Enable S3 with a fake client, and parts of 1 KiB uploaded without backoff."""
+    client = _FakeS3Client()
+    monkeypatch.setenv("S3_ENABLED", "true")
+    monkeypatch.setenv("S3_ALIAS_HOST", "https://cdn.example.com")
+    monkeypatch.setattr(s3_utils, "MIN_PART_SIZE", 1024)
+    monkeypatch.setattr(s3_utils, "_PART_RETRY_BACKOFF", 0)
+    mocker.patch.object(s3_utils, "get_s3_client", return_value=client)
+    return client
+
+
+def test_multipart_upload_compresses_and_retries_parts(fake_s3: _FakeS3Client) -> None:
+    """Test that a digest larger than a part is uploaded in gzip-compressed parts, retrying failed parts.
+
+    Given an S3 client failing the first upload of every part:
+    When a digest of several parts is written chunk by chunk,
+    Then the parts should be retried, and the stored object should decompress to the digest.
+    """
+    fake_s3.failures = 1
+    digest = "".join(f"{i:08d} {uuid.uuid4()}\n" for i in range(2000))
+
+    with S3MultipartUpload("ingest/digest.txt", ingest_id=uuid.uuid4(), encoding="gzip", part_size=1024) as upload:
+        for start in range(0, len(digest), 100):
+            upload.write(digest[start : start + 100])
+        url = upload.close()
+
+    assert url == "https://cdn.example.com/ingest/digest.txt"
+    assert len(fake_s3.parts) > 1
+    assert gzip.decompress(fake_s3.objects["ingest/digest.txt"][0]).decode() == digest
+
+
+def test_small_upload_and_abort(fake_s3: _FakeS3Client, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a digest smaller than a part is stored with one request, and that a failed upload is aborted."""
+    monkeypatch.setenv("S3_UPLOAD_PART_SIZE", "1024")
+    url = upload_to_s3("small digest", s3_file_path="ingest/small.txt", ingest_id=uuid.uuid4())
+
+    body, fields = fake_s3.objects["ingest/small.txt"]
+    assert (url, body) == ("https://cdn.example.com/ingest/small.txt", b"small digest")
+    assert fields["ContentType"] == "text/plain"
+    assert "ContentEncoding" not in fields
+
+    fake_s3.failures = 3
+    with pytest.raises(S3UploadError):
+        upload_to_s3("x" * 4096, s3_file_path="ingest/big.txt", ingest_id=uuid.uuid4())
+    assert fake_s3.aborted
+
+
+def test_ingest_id_index_and_backfill(fake_s3: _FakeS3Client) -> None:
+    """Test that uploaded digests are found by ingest ID with a single GET, and that older digests are backfilled.
+
+    Given a digest uploaded through ``upload_to_s3`` and a digest uploaded before the ingest ID index existed:
+    When both are looked up by ingest ID, before and after the backfill,
+    Then the first should be found from its index entry, and the second only once the backfill indexed it.
+    """
+    new_id, old_id = uuid.uuid4(), uuid.uuid4()
+    upload_to_s3("new digest", s3_file_path="ingest/github.com/o/new/digest.txt", ingest_id=new_id)
+    fake_s3.put_object(Key="ingest/github.com/o/old/digest.txt", Body=b"old digest", Tagging=f"ingest_id={old_id}")
+    fake_s3.put_object(Key="ingest/github.com/o/old/digest.json", Body=b"{}", Tagging=f"ingest_id={old_id}")
+
+    fake_s3.gets = 0
+    assert get_s3_url_for_ingest_id(new_id) == "https://cdn.example.com/ingest/github.com/o/new/digest.txt"
+    assert fake_s3.gets == 1
+    assert get_s3_url_for_ingest_id(old_id) is None
+
+    assert backfill_ingest_id_index(dry_run=True) == 1
+    assert backfill_ingest_id_index() == 1
+    assert backfill_ingest_id_index() == 0
+    assert get_s3_url_for_ingest_id(old_id) == "https://cdn.example.com/ingest/github.com/o/old/digest.txt"
@@ -0,0 +1,110 @@
+"""Tests for the ``single_flight`` module and the coalescing of identical ingests in ``process_query``."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING
+
+import pytest
+from prometheus_client import REGISTRY
+
+from server import query_processor
+from server.models import IngestSuccessResponse, PatternType
+from server.single_flight import SingleFlight
+from tests.conftest import DEMO_COMMIT
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+    from gitingest.schemas import IngestionQuery
+
+
+def _coalesced(operation: str) -> float:
+    """Return the number of calls of ``operation`` coalesced so far."""
+    return REGISTRY.get_sample_value("gitingest_single_flight_coalesced_total", {"operation": operation}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_one_call() -> None:
+    """Test that concurrent calls with the same key share the result of a single call.
+
+    Given a slow call:
+    When it is requested three times concurrently with the same key, and once with another key,
+    Then it should run once per key, every caller should get its result, and two calls should be counted as coalesced.
+    """
+    flight: SingleFlight[str] = SingleFlight("test-share")
+    calls: list[str] = []
+
+    async def call(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return f"result-{key}"
+
+    results = await asyncio.gather(*(flight.run(key, lambda key=key: call(key)) for key in ("a", "a", "b", "a")))
+
+    assert results == ["result-a", "result-a", "result-b", "result-a"]
+    assert calls == ["a", "b"]
+    assert _coalesced("test-share") == 2  # noqa: PLR2004
+    assert flight.in_flight() == 0
+
+    # Finished calls are not cached
+    assert await flight.run("a", lambda: call("a")) == "result-a"
+    assert calls == ["a", "b", "a"]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exceptions_and_survives_cancellation() -> None:
+    """Test that the exception of a call reaches every caller, even if the caller that started it was cancelled."""
+    flight: SingleFlight[str] = SingleFlight("test-error")
+    started = asyncio.Event()
+
+    async def failing() -> str:
+        started.set()
+        await asyncio.sleep(0.01)
+        msg = "clone failed"
+        raise RuntimeError(msg)
+
+    first = asyncio.ensure_future(flight.run("key", failing))
+    await started.wait()
+    second = asyncio.ensure_future(flight.run("key", failing))
+    first.cancel()
+
+    with pytest.raises(RuntimeError, match="clone failed"):
+        await second
+    assert first.cancelled()
+    assert flight.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_process_query_coalesces_identical_requests(mocker: MockerFixture, sample_query: IngestionQuery) -> None:
+    """Test that identical concurrent requests clone and ingest the repository once.
+
+    Given three concurrent requests for the same repository, two of them with the same pattern:
+    When ``process_query`` handles them,
+    Then the repository should be cloned and ingested once per distinct pattern.
+    """
+    sample_query.url = "https://github.com/test_user/test_repo"
+    sample_query.host = "github.com"
+    mocker.patch.object(query_processor, "parse_remote_repo", side_effect=lambda *_, **__: sample_query.model_copy())
+    mocker.patch.object(query_processor, "_check_digest_cache", return_value=None)
+    mocker.patch.object(query_processor, "resolve_commit", return_value=DEMO_COMMIT)
+
+    async def slow_clone(*_: object, **__: object) -> None:
+        await asyncio.sleep(0.01)
+
+    clone = mocker.patch.object(query_processor, "clone_repo", side_effect=slow_clone)
+    digest = ("Estimated tokens: 1k", "tree", "content", "/api/download/file/id")
+    ingest = mocker.patch.object(query_processor, "_ingest_and_store_digest", return_value=digest)
+    mocker.patch.object(query_processor, "_cleanup_repository")
+
+    responses = await asyncio.gather(
+        *(
+            query_processor.process_query(sample_query.url, 50, PatternType.EXCLUDE, pattern)
+            for pattern in ("*.md", "*.md", "*.txt")
+        ),
+    )
+
+    assert all(isinstance(response, IngestSuccessResponse) for response in responses)
+    assert [response.pattern for response in responses] == ["*.md", "*.md", "*.txt"]
+    assert clone.call_count == 2  # noqa: PLR2004
+    assert ingest.call_count == 2  # noqa: PLR2004
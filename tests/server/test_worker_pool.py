@@ -0,0 +1,114 @@
+"""Tests for the ``worker_pool`` module, and a load test of the event loop during concurrent ingestions."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Callable
+
+import httpx
+import pytest
+
+from server import query_processor
+from server.main import app
+from server.models import IngestSuccessResponse, PatternType
+from server.worker_pool import WorkerPool, WorkerPoolFullError
+from tests.conftest import DEMO_COMMIT
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from gitingest.schemas import IngestionQuery
+
+INGEST_SECONDS = 0.5  # Duration of every simulated ingestion
+CONCURRENT_INGESTS = 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_worker_pool_runs_jobs_off_the_event_loop(kind: str) -> None:
+    """Test that jobs run in worker threads or processes and return their results."""
+    pool = WorkerPool("test", kind=kind, max_workers=1)
+    try:
+        worker = await pool.run(threading.get_ident if kind == "thread" else os.getpid)
+    finally:
+        pool.shutdown()
+
+    assert worker != (threading.get_ident() if kind == "thread" else os.getpid())
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_rejects_jobs_beyond_its_queue() -> None:
+    """Test that jobs beyond the workers and the queue are rejected, and accepted again once a job finishes.
+
+    Given a pool with one worker and a queue of one, running a job and holding another:
+    When a third job is submitted,
+    Then it should be rejected, and a job submitted after the first two finish should run.
+    """
+    pool = WorkerPool("test-full", max_workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        assert pool.full()
+        with pytest.raises(WorkerPoolFullError):
+            await pool.run(time.time)
+
+        release.set()
+        assert await asyncio.gather(*jobs) == [True, True]
+        assert not pool.full()
+        assert await pool.run(sum, [1, 2]) == 3  # noqa: PLR2004
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_health_latency_stays_flat_during_concurrent_ingestions(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    sample_query: IngestionQuery,
+) -> None:
+    """Load test: ``/health`` should answer promptly while large ingestions are running.
+
+    Given ingestions that each block for ``INGEST_SECONDS``:
+    When ``CONCURRENT_INGESTS`` of them run concurrently while ``/health`` is polled,
+    Then every health check should answer in a fraction of the duration of a single ingestion.
+    """
+    sample_query.url = "https://github.com/test_user/test_repo"
+    sample_query.host = "github.com"
+    sample_query.local_path = tmp_path / "test_repo"
+
+    def blocking_ingest(_: IngestionQuery, sink: Callable[[str], object]) -> tuple[str, str]:
+        time.sleep(INGEST_SECONDS)  # Stands for walking, reading and tokenizing a large repository
+        sink("tree\ncontent")
+        return "Estimated tokens: 1", "tree"
+
+    mocker.patch.object(query_processor, "parse_remote_repo", side_effect=lambda *_, **__: sample_query.model_copy())
+    mocker.patch.object(query_processor, "resolve_commit", return_value=DEMO_COMMIT)
+    mocker.patch.object(query_processor, "clone_repo")
+    mocker.patch.object(query_processor, "stream_ingest_query", side_effect=blocking_ingest)
+
+    ingests = [
+        asyncio.ensure_future(query_processor.process_query(sample_query.url, 50, PatternType.EXCLUDE, f"*.{index}"))
+        for index in range(CONCURRENT_INGESTS)
+    ]
+
+    latencies = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+        while not all(ingest.done() for ingest in ingests):
+            start = time.perf_counter()
+            response = await client.get("/health")
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200  # noqa: PLR2004
+            await asyncio.sleep(0.01)
+
+    assert all(isinstance(ingest.result(), IngestSuccessResponse) for ingest in ingests)
+    assert len(latencies) > CONCURRENT_INGESTS
+    assert max(latencies) < INGEST_SECONDS / 5
@@ -0,0 +1,257 @@
+"""Tests for the ``archive_utils`` module and the archive backend of ``clone_repo``.
+
+The archives are served by a local HTTP server standing in for the tarball endpoint of a git host.
+"""
+
+from __future__ import annotations
+
+import io
+import tarfile
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING
+
+import pytest
+
+from gitingest.clone import clone_repo
+from gitingest.schemas import CloneBackend, CloneConfig
+from gitingest.utils.archive_utils import extract_archive, get_archive_url
+from gitingest.utils.compat_func import removesuffix
+from tests.conftest import DEMO_COMMIT
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from pathlib import Path
+    from unittest.mock import AsyncMock
+
+    from pytest_mock import MockerFixture
+
+pytestmark = pytest.mark.usefixtures("repo_exists_true")
+
+
+def _make_tarball(members: dict[str, bytes | str | None], *, top: str = "owner-repo-deadbee") -> bytes:
+    """Build a gzipped tarball like the ones served by git hosts.
+
+    ``members`` maps paths to file contents (``bytes``), symlink targets (``str``) or directories (``None``).
+    """
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", format=tarfile.PAX_FORMAT) as tar:
+        root = tarfile.TarInfo(top)
+        root.type = tarfile.DIRTYPE
+        tar.addfile(root)
+        for name, content in members.items():
+            info = tarfile.TarInfo(name if name.startswith(("/", "..")) else f"{top}/{name}")
+            if content is None:
+                info.type = tarfile.DIRTYPE
+                tar.addfile(info)
+            elif isinstance(content, str):
+                info.type = tarfile.SYMTYPE
+                info.linkname = content
+                tar.addfile(info)
+            else:
+                info.size = len(content)
+                info.mode = 0o755 if name.endswith(".sh") else 0o644
+                tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+@dataclass
+class ArchiveServer:
+    """Local HTTP server standing in for the tarball endpoint of a git host."""
+
+    url: str  # URL of the repository whose archives are served
+    archives: dict[str, bytes] = field(default_factory=dict)  # Tarball of every commit; others are answered with 404
+
+
+@pytest.fixture
+def archive_server(mocker: MockerFixture) -> Iterator[ArchiveServer]:
+    """Serve tarballs from a local HTTP server registered as the archive endpoint of its own host.
+
+    Yields
+    ------
+    ArchiveServer
+        The server, to register the tarballs it serves.
+
+    """
+    archives: dict[str, bytes] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            body = archives.get(removesuffix(self.path.rsplit("/", 1)[-1], ".tar.gz"))
+            self.send_response(404 if body is None else 200)
+            self.end_headers()
+            self.wfile.write(body or b"")
+
+        def log_message(self, *_: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    host = f"127.0.0.1:{server.server_address[1]}"
+    mocker.patch.dict(
+        "gitingest.utils.archive_utils._ARCHIVE_URL_TEMPLATES",
+        {host: f"http://{host}/{{path}}/archive/{{commit}}.tar.gz"},
+    )
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield ArchiveServer(url=f"http://{host}/owner/repo", archives=archives)
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.asyncio
+async def test_clone_repo_with_archive_backend(
+    tmp_path: Path,
+    archive_server: ArchiveServer,
+    run_command_mock: AsyncMock,
+) -> None:
+    """Test that the archive backend extracts the tarball of the commit without running git.
+
+    Given a host serving the tarball of a commit:
+    When ``clone_repo`` is called with ``backend=CloneBackend.ARCHIVE``,
+    Then the files should be extracted without the top-level directory, with their executable bits and symlinks,
+    and no ``.git`` directory should be created.
+    """
+    archive_server.archives[DEMO_COMMIT] = _make_tarball(
+        {"src": None, "src/app.py": b"print('hi')", "run.sh": b"#!/bin/sh", "link": "src/app.py"},
+    )
+    local_path = tmp_path / "repo"
+    config = CloneConfig(
+        url=archive_server.url,
+        local_path=str(local_path),
+        commit=DEMO_COMMIT,
+        backend=CloneBackend.ARCHIVE,
+    )
+
+    await clone_repo(config)
+
+    assert sorted(path.name for path in local_path.iterdir()) == ["link", "run.sh", "src"]
+    assert (local_path / "src" / "app.py").read_text() == "print('hi')"
+    assert (local_path / "run.sh").stat().st_mode & 0o111
+    assert (local_path / "link").read_text() == "print('hi')"
+    assert all("clone" not in call.args and "fetch" not in call.args for call in run_command_mock.call_args_list)
+
+
+@pytest.mark.asyncio
+async def test_clone_repo_with_archive_backend_and_subpath(tmp_path: Path, archive_server: ArchiveServer) -> None:
+    """Test that only the requested subpath of the archive is extracted."""
+    archive_server.archives[DEMO_COMMIT] = _make_tarball(
+        {"src/app.py": b"app", "docs/index.md": b"docs", "README.md": b"r"},
+    )
+    local_path = tmp_path / "repo"
+    config = CloneConfig(
+        url=archive_server.url,
+        local_path=str(local_path),
+        commit=DEMO_COMMIT,
+        subpath="/src",
+        backend=CloneBackend.ARCHIVE,
+    )
+
+    await clone_repo(config)
+
+    assert [path.relative_to(local_path).as_posix() for path in sorted(local_path.rglob("*"))] == ["src", "src/app.py"]
+
+
+@pytest.mark.asyncio
+async def test_clone_repo_with_archive_backend_falls_back_to_git(
+    tmp_path: Path,
+    archive_server: ArchiveServer,
+    run_command_mock: AsyncMock,
+) -> None:
+    """Test that a failed archive download falls back to fetching the commit with git.
+
+    Given a host that answers the archive request with ``404``:
+    When ``clone_repo`` is called with ``backend=CloneBackend.ARCHIVE``,
+    Then the commit should be fetched with git instead.
+    """
+    local_path = tmp_path / "repo"
+    url = archive_server.url
+    config = CloneConfig(url=url, local_path=str(local_path), commit=DEMO_COMMIT, backend=CloneBackend.ARCHIVE)
+
+    await clone_repo(config)
+
+    run_command_mock.assert_any_call("git", "-C", str(local_path), "fetch", "--depth=1", "origin", DEMO_COMMIT)
+
+
+def test_extract_archive_skips_unsafe_members(tmp_path: Path) -> None:
+    """Test that members escaping the destination directory are never written.
+
+    Given a tarball with absolute and parent-relative paths, and a file below a symlink pointing outside:
+    When it is extracted,
+    Then only the safe members should be written.
+    """
+    outside = tmp_path / "outside"
+    outside.mkdir()
+    tarball = _make_tarball(
+        {
+            "/abs.txt": b"x",
+            "../escape.txt": b"x",
+            "ok.txt": b"ok",
+            "out": str(outside),
+            "out/evil.txt": b"x",
+        },
+    )
+    local_path = tmp_path / "repo"
+
+    with tarfile.open(fileobj=io.BytesIO(tarball), mode="r|gz") as tar:
+        extract_archive(tar, local_path)
+
+    assert (local_path / "ok.txt").read_text() == "ok"
+    assert not list(outside.iterdir())
+    assert not (tmp_path / "escape.txt").exists()
+    assert not (local_path / "escape.txt").exists()
+
+
+def test_extract_archive_does_not_write_through_symlink_member(tmp_path: Path) -> None:
+    """Test that a file member does not follow a symlink member extracted earlier at the same path.
+
+    Given a tarball with a symlink pointing outside, followed by a regular file of the same name:
+    When it is extracted,
+    Then the file outside should be left untouched, and the symlink replaced by the file.
+    """
+    outside = tmp_path / "outside.txt"
+    outside.write_text("untouched")
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz", format=tarfile.PAX_FORMAT) as tar:
+        link = tarfile.TarInfo("top/x")
+        link.type = tarfile.SYMTYPE
+        link.linkname = str(outside)
+        tar.addfile(link)
+        file = tarfile.TarInfo("top/x")
+        file.size = len(b"evil")
+        tar.addfile(file, io.BytesIO(b"evil"))
+    local_path = tmp_path / "repo"
+
+    with tarfile.open(fileobj=io.BytesIO(buffer.getvalue()), mode="r|gz") as tar:
+        extract_archive(tar, local_path)
+
+    assert outside.read_text() == "untouched"
+    assert not (local_path / "x").is_symlink()
+    assert (local_path / "x").read_text() == "evil"
+
+
+@pytest.mark.parametrize(
+    ("url", "token", "expected"),
+    [
+        (
+            "https://github.com/owner/repo",
+            None,
+            ("https://codeload.github.com/owner/repo/tar.gz/abc", {}),
+        ),
+        (
+            "https://github.com/owner/repo",
+            "token",
+            ("https://api.github.com/repos/owner/repo/tarball/abc", {"Authorization": "Bearer token"}),
+        ),
+        (
+            "https://gitlab.com/group/sub/repo",
+            None,
+            ("https://gitlab.com/group/sub/repo/-/archive/abc/repo-abc.tar.gz", {}),
+        ),
+        ("https://gitlab.com/group/repo", "token", None),
+        ("https://git.example.com/owner/repo", None, None),
+    ],
+)
+def test_get_archive_url(url: str, token: str | None, expected: tuple[str, dict[str, str]] | None) -> None:
+    """Test the archive endpoint chosen for every host."""
+    assert get_archive_url(url, "abc", token=token) == expected
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 from inspect import signature
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import pytest
 from click.testing import CliRunner, Result
@@ -11,6 +12,9 @@ from click.testing import CliRunner, Result
 from gitingest.__main__ import main
 from gitingest.config import MAX_FILE_SIZE, OUTPUT_FILE_NAME
 
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
 
 @pytest.mark.parametrize(
     ("cli_args", "expect_file"),
@@ -28,6 +32,8 @@ from gitingest.config import MAX_FILE_SIZE, OUTPUT_FILE_NAME
                 "--include-pattern",
                 "src/",
                 "--include-submodules",
+                "--read-workers",
+                "2",
             ],
             True,
             id="custom-options",
@@ -59,6 +65,30 @@ def test_cli_writes_file(
     assert sarif_file.exists() is expect_file, f"{OUTPUT_FILE_NAME} existence did not match expectation"
 
 
+def test_cli_streams_digest_to_file(tmp_path: Path, mocker: MockerFixture) -> None:
+    """Test that the CLI streams the digest to the output file instead of building it in memory.
+
+    Given a directory to ingest and a ``format_node`` that fails if called:
+    When the CLI writes the digest to a file,
+    Then the file should contain the directory structure and the content of every file.
+    """
+    mocker.patch("gitingest.ingestion.format_node", side_effect=AssertionError("digest built in memory"))
+    source = tmp_path / "source"
+    (source / "src").mkdir(parents=True)
+    (source / "README.md").write_text("hello", encoding="utf-8")
+    (source / "src" / "app.py").write_text("print(1)", encoding="utf-8")
+    output_file = tmp_path / "digest.txt"
+
+    result = _invoke_isolated_cli_runner([str(source), "--output", str(output_file)])
+
+    assert result.exit_code == 0, result.stderr
+    digest = output_file.read_text(encoding="utf-8")
+    assert digest.startswith("Directory structure:\n")
+    assert "README.md" in digest
+    assert "hello" in digest
+    assert "print(1)" in digest
+
+
 def test_cli_with_stdout_output() -> None:
     """Test CLI invocation with output directed to STDOUT."""
     output_file = Path(OUTPUT_FILE_NAME)
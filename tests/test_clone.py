@@ -42,7 +42,7 @@ async def test_clone_with_commit(repo_exists_true: AsyncMock, run_command_mock:
     When ``clone_repo`` is called,
     Then the repository should be cloned and checked out at that commit.
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 3  # ensure_git_installed + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + init + remote add + fetch + checkout
     commit_hash = "a" * 40  # Simulating a valid commit hash
     clone_config = CloneConfig(
         url=DEMO_URL,
@@ -66,7 +66,7 @@ async def test_clone_without_commit(repo_exists_true: AsyncMock, run_command_moc
     When ``clone_repo`` is called,
     Then only the clone_repo operation should be performed (no checkout).
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + resolve_commit + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5  # git check + ls-remote + init + remote add + fetch + checkout
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, commit=None, branch="main")
 
     await clone_repo(clone_config)
@@ -76,6 +76,22 @@ async def test_clone_without_commit(repo_exists_true: AsyncMock, run_command_moc
     assert run_command_mock.call_count == expected_call_count
 
 
+@pytest.mark.asyncio
+async def test_git_installed_check_runs_once(tmp_path: Path, run_command_mock: AsyncMock) -> None:
+    """Test that the git installation is only checked by the first clone of the process.
+
+    Given two clones in a row:
+    When ``clone_repo`` is called for each of them,
+    Then ``git --version`` should only run once.
+    """
+    for name in ("first", "second"):
+        await clone_repo(CloneConfig(url=DEMO_URL, local_path=str(tmp_path / name), commit=DEMO_COMMIT))
+
+    version_calls = [call for call in run_command_mock.call_args_list if call.args == ("git", "--version")]
+    assert len(version_calls) == 1
+    assert run_command_mock.call_count == GIT_INSTALLED_CALLS + 2 * 4  # init + remote add + fetch + checkout, twice
+
+
 @pytest.mark.asyncio
 async def test_clone_nonexistent_repository(repo_exists_true: AsyncMock) -> None:
     """Test cloning a nonexistent repository URL.
@@ -99,6 +115,26 @@ async def test_clone_nonexistent_repository(repo_exists_true: AsyncMock) -> None
     repo_exists_true.assert_any_call(clone_config.url, token=None)
 
 
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("run_command_mock")
+async def test_clone_reports_resolution_error_when_existence_check_fails(
+    repo_exists_true: AsyncMock,
+    mocker: MockerFixture,
+) -> None:
+    """Test that the commit resolution error is raised when the existence check fails as well.
+
+    Given an existence check and a commit resolution that both raise:
+    When ``clone_repo`` is called,
+    Then the error of the commit resolution should be raised.
+    """
+    repo_exists_true.side_effect = RuntimeError("Unexpected HTTP status code: 500")
+    mocker.patch("gitingest.clone.resolve_commit", side_effect=RuntimeError("git ls-remote failed"))
+    clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH)
+
+    with pytest.raises(RuntimeError, match="git ls-remote failed"):
+        await clone_repo(clone_config)
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize(
     ("status_code", "expected"),
@@ -129,7 +165,7 @@ async def test_clone_with_custom_branch(run_command_mock: AsyncMock) -> None:
     When ``clone_repo`` is called,
     Then the repository should be cloned shallowly to that branch.
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + resolve_commit + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5  # git check + ls-remote + init + remote add + fetch + checkout
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, branch="feature-branch")
 
     await clone_repo(clone_config)
@@ -162,7 +198,7 @@ async def test_clone_default_shallow_clone(run_command_mock: AsyncMock) -> None:
     When ``clone_repo`` is called,
     Then the repository should be cloned with ``--depth=1`` and ``--single-branch``.
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + resolve_commit + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5  # git check + ls-remote + init + remote add + fetch + checkout
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH)
 
     await clone_repo(clone_config)
@@ -179,7 +215,7 @@ async def test_clone_commit(run_command_mock: AsyncMock) -> None:
     When ``clone_repo`` is called,
     Then the repository should be cloned and checked out at that commit.
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 3  # ensure_git_installed + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + init + remote add + fetch + checkout
     commit_hash = "a" * 40  # Simulating a valid commit hash
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, commit=commit_hash)
 
@@ -234,7 +270,7 @@ async def test_clone_branch_with_slashes(tmp_path: Path, run_command_mock: Async
     """
     branch_name = "fix/in-operator"
     local_path = tmp_path / "gitingest"
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + resolve_commit + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5  # git check + ls-remote + init + remote add + fetch + checkout
     clone_config = CloneConfig(url=DEMO_URL, local_path=str(local_path), branch=branch_name)
 
     await clone_repo(clone_config)
@@ -251,7 +287,7 @@ async def test_clone_creates_parent_directory(tmp_path: Path, run_command_mock:
     When ``clone_repo`` is called,
     Then it should create the parent directories before attempting to clone.
     """
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + resolve_commit + clone + fetch + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5  # git check + ls-remote + init + remote add + fetch + checkout
     nested_path = tmp_path / "deep" / "nested" / "path" / "repo"
 
     clone_config = CloneConfig(url=DEMO_URL, local_path=str(nested_path))
@@ -271,9 +307,9 @@ async def test_clone_with_specific_subpath(run_command_mock: AsyncMock) -> None:
     When ``clone_repo`` is called,
     Then the repository should be cloned with sparse checkout enabled and the specified subpath.
     """
-    # ensure_git_installed + resolve_commit + clone + sparse-checkout + fetch + checkout
+    # ensure_git_installed + resolve_commit + init + remote add + fetch + sparse-checkout + checkout
     subpath = "src/docs"
-    expected_call_count = GIT_INSTALLED_CALLS + 5
+    expected_call_count = GIT_INSTALLED_CALLS + 6
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, subpath=subpath)
 
     await clone_repo(clone_config)
@@ -293,7 +329,8 @@ async def test_clone_with_commit_and_subpath(run_command_mock: AsyncMock) -> Non
     checked out at the specific commit, and only include the specified subpath.
     """
     subpath = "src/docs"
-    expected_call_count = GIT_INSTALLED_CALLS + 4  # ensure_git_installed + clone + sparse-checkout + fetch + checkout
+    # ensure_git_installed + init + remote add + fetch + sparse-checkout + checkout
+    expected_call_count = GIT_INSTALLED_CALLS + 5
     commit_hash = "a" * 40  # Simulating a valid commit hash
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, commit=commit_hash, subpath=subpath)
 
@@ -311,8 +348,8 @@ async def test_clone_with_include_submodules(run_command_mock: AsyncMock) -> Non
     When ``clone_repo`` is called,
     Then the repository should be cloned with ``--recurse-submodules`` in the git command.
     """
-    # ensure_git_installed + resolve_commit + clone + fetch + checkout + checkout submodules
-    expected_call_count = GIT_INSTALLED_CALLS + 5
+    # git check + ls-remote + init + remote add + fetch + checkout + checkout submodules
+    expected_call_count = GIT_INSTALLED_CALLS + 6
     clone_config = CloneConfig(url=DEMO_URL, local_path=LOCAL_REPO_PATH, branch="main", include_submodules=True)
 
     await clone_repo(clone_config)
@@ -322,19 +359,47 @@ async def test_clone_with_include_submodules(run_command_mock: AsyncMock) -> Non
     assert run_command_mock.call_count == expected_call_count
 
 
+@pytest.mark.asyncio
+async def test_clone_without_checkout(run_command_mock: AsyncMock) -> None:
+    """Test fetching a subpath of a repository without checking it out.
+
+    Given a subpath and ``checkout=False``:
+    When ``clone_repo`` is called,
+    Then every blob of the commit should be fetched and ``HEAD`` should point to the commit, without a checkout.
+    """
+    # ensure_git_installed + init + remote add + fetch + update-ref
+    expected_call_count = GIT_INSTALLED_CALLS + 4
+    clone_config = CloneConfig(
+        url=DEMO_URL,
+        local_path=LOCAL_REPO_PATH,
+        commit=DEMO_COMMIT,
+        subpath="src",
+        checkout=False,
+    )
+
+    await clone_repo(clone_config)
+
+    local_path = clone_config.local_path
+    run_command_mock.assert_any_call("git", "-C", local_path, "fetch", "--depth=1", "origin", DEMO_COMMIT)
+    run_command_mock.assert_any_call("git", "-C", local_path, "update-ref", "--no-deref", "HEAD", DEMO_COMMIT)
+    assert all("checkout" not in call.args for call in run_command_mock.call_args_list)
+    assert run_command_mock.call_count == expected_call_count
+
+
 def assert_standard_calls(mock: AsyncMock, cfg: CloneConfig, commit: str, *, partial_clone: bool = False) -> None:
     """Assert that the standard clone sequence of git commands was called."""
     mock.assert_any_call("git", "--version")
     if sys.platform == "win32":
         mock.assert_any_call("git", "config", "core.longpaths")
 
-    # Clone
-    clone_cmd = ["git", "clone", "--single-branch", "--no-checkout", "--depth=1"]
-    if partial_clone:
-        clone_cmd += ["--filter=blob:none", "--sparse"]
-    mock.assert_any_call(*clone_cmd, cfg.url, cfg.local_path)
+    # Empty repository with the remote, then a single fetch of the commit
+    mock.assert_any_call("git", "init", "--quiet", cfg.local_path)
+    mock.assert_any_call("git", "-C", cfg.local_path, "remote", "add", "origin", cfg.url)
 
-    mock.assert_any_call("git", "-C", cfg.local_path, "fetch", "--depth=1", "origin", commit)
+    fetch_cmd = ["git", "-C", cfg.local_path, "fetch", "--depth=1"]
+    if partial_clone:
+        fetch_cmd += ["--filter=blob:none"]
+    mock.assert_any_call(*fetch_cmd, "origin", commit)
     mock.assert_any_call("git", "-C", cfg.local_path, "checkout", commit)
 
 
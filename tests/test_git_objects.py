@@ -0,0 +1,210 @@
+"""Tests for the ``git_objects`` module and the ingestion of a commit from its git objects.
+
+Every test commits the sample directory to a local repository and checks that reading the files from the git objects
+gives the same digest as walking the work tree. The partial clone tests fetch that repository in place of a remote URL.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+from gitingest.clone import clone_repo
+from gitingest.ingestion import ingest_query
+from gitingest.schemas import CloneConfig
+from gitingest.utils.git_objects import GitObjectReader, list_tree
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+    from gitingest.schemas import IngestionQuery
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+REMOTE_URL = "https://github.com/owner/repo"
+
+
+def _git(cwd: Path, *args: str) -> str:
+    """Run a git command in ``cwd`` and return its output."""
+    env = {**os.environ, "GIT_AUTHOR_NAME": "a", "GIT_AUTHOR_EMAIL": "a@b", "GIT_COMMITTER_NAME": "a"}
+    env["GIT_COMMITTER_EMAIL"] = "a@b"
+    result = subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True)  # noqa: S603, S607
+    return result.stdout.strip()
+
+
+@pytest.fixture
+def git_repo(temp_directory: Path) -> Path:
+    """Commit the sample directory, with a notebook, a large file, a symlink and an ignored file, to a repository.
+
+    Returns
+    -------
+    Path
+        The path to the repository, whose work tree matches ``HEAD``.
+
+    """
+    notebook = {"cells": [{"cell_type": "code", "source": ["print('nb')"], "outputs": []}]}
+    (temp_directory / "src" / "notebook.ipynb").write_text(json.dumps(notebook))
+    (temp_directory / "big.txt").write_text("x" * 2048)
+    (temp_directory / "cache.pyc").write_bytes(b"\0")
+    if hasattr(os, "symlink"):
+        (temp_directory / "link.txt").symlink_to("file1.txt")
+    _git(temp_directory, "init", "--quiet")
+    _git(temp_directory, "add", ".")
+    _git(temp_directory, "commit", "--quiet", "-m", "initial")
+    return temp_directory
+
+
+@pytest.mark.parametrize("subpath", ["/", "/src"])
+def test_ingest_from_git_objects_matches_checkout(git_repo: Path, sample_query: IngestionQuery, subpath: str) -> None:
+    """Test that reading the files from the git objects gives the same digest as walking the work tree.
+
+    Given a repository whose work tree matches ``HEAD``:
+    When it is ingested with and without ``from_git_objects``,
+    Then the summary, the tree and the content should be identical.
+    """
+    sample_query.local_path = git_repo
+    sample_query.subpath = subpath
+    sample_query.type = None
+
+    expected = ingest_query(sample_query)
+    sample_query.from_git_objects = True
+
+    assert ingest_query(sample_query) == expected
+
+
+def test_ingest_single_file_from_git_objects(git_repo: Path, sample_query: IngestionQuery) -> None:
+    """Test that a single file is read from its blob."""
+    sample_query.local_path = git_repo
+    sample_query.subpath = "/src/subfile2.py"
+    sample_query.type = "blob"
+
+    expected = ingest_query(sample_query)
+    sample_query.from_git_objects = True
+
+    assert ingest_query(sample_query) == expected
+
+
+def test_ingest_from_git_objects_never_reads_large_blobs(
+    git_repo: Path,
+    sample_query: IngestionQuery,
+    mocker: MockerFixture,
+) -> None:
+    """Test that files larger than ``max_file_size`` are skipped on the size of the tree listing.
+
+    Given a repository with a file larger than ``max_file_size``:
+    When it is ingested from the git objects,
+    Then the blob of the file should never be read.
+    """
+    sample_query.local_path = git_repo
+    sample_query.subpath = "/"
+    sample_query.type = None
+    sample_query.max_file_size = 1024
+    sample_query.from_git_objects = True
+    big_blob = next(entry.object_id for entry in list_tree(git_repo, "HEAD") if entry.path == "big.txt")
+    read = mocker.spy(GitObjectReader, "read")
+
+    _, tree, content = ingest_query(sample_query)
+
+    assert "big.txt" not in tree
+    assert "FILE: file1.txt" in content
+    assert big_blob not in [call.args[1] for call in read.call_args_list]
+
+
+def test_git_object_reader_reads_blobs(git_repo: Path) -> None:
+    """Test that the reader returns the content of every blob and ``None`` for a missing object."""
+    entries = {entry.path: entry for entry in list_tree(git_repo, "HEAD", "src")}
+    reader = GitObjectReader(git_repo)
+    try:
+        assert reader.read(entries["src/subfile1.txt"].object_id) == b"Hello from src"
+        assert reader.read("0" * 40) is None
+        assert reader.read(entries["src/subdir/file_subdir.py"].object_id) == b"print('Hello from subdir')"
+    finally:
+        reader.close()
+
+    assert entries["src/subfile1.txt"].size == len("Hello from src")
+    assert "file1.txt" not in entries
+
+
+@pytest.fixture
+def remote_repo(git_repo: Path, monkeypatch: pytest.MonkeyPatch) -> str:
+    """Make git fetch ``git_repo`` in place of ``REMOTE_URL``, with partial clone filters enabled.
+
+    Returns
+    -------
+    str
+        The SHA of the commit of ``git_repo``.
+
+    """
+    _git(git_repo, "config", "uploadpack.allowFilter", "true")
+    _git(git_repo, "config", "uploadpack.allowAnySHA1InWant", "true")
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", f"url.{git_repo.as_uri()}.insteadOf")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", REMOTE_URL)
+    return _git(git_repo, "rev-parse", "HEAD")
+
+
+def _missing_objects(repo: Path, commit: str) -> set[str]:
+    """Return the objects of ``commit`` that are not in ``repo``, without fetching them."""
+    output = _git(repo, "rev-list", "--objects", "--missing=print", commit)
+    return {line[1:] for line in output.splitlines() if line.startswith("?")}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("repo_exists_true")
+async def test_clone_with_blob_size_limit(tmp_path: Path, git_repo: Path, remote_repo: str) -> None:
+    """Test that the files larger than ``blob_size_limit`` are neither fetched nor checked out.
+
+    Given a remote with a 2 KiB file:
+    When it is cloned with ``blob_size_limit=1024``,
+    Then only the blob of that file should be missing from the clone, and every other file should be checked out.
+    """
+    local_path = tmp_path / "clone"
+    big_blob = _git(git_repo, "rev-parse", "HEAD:big.txt")
+    config = CloneConfig(url=REMOTE_URL, local_path=str(local_path), commit=remote_repo, blob_size_limit=1024)
+
+    await clone_repo(config)
+
+    assert _missing_objects(local_path, remote_repo) == {big_blob}
+    assert not (local_path / "big.txt").exists()
+    assert (local_path / "src" / "subdir" / "file_subdir.py").read_text() == "print('Hello from subdir')"
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("repo_exists_true")
+@pytest.mark.parametrize("from_git_objects", [False, True])
+async def test_ingest_with_filter_large_blobs(
+    tmp_path: Path,
+    git_repo: Path,
+    remote_repo: str,
+    sample_query: IngestionQuery,
+    *,
+    from_git_objects: bool,
+) -> None:
+    """Test that leaving the large files out of the clone does not change the digest.
+
+    Given a remote with a file larger than ``max_file_size``:
+    When it is cloned and ingested with ``filter_large_blobs``,
+    Then the digest should be the one of the full repository, and the large blob should never be fetched.
+    """
+    sample_query.local_path = git_repo
+    sample_query.subpath = "/"
+    sample_query.type = None
+    sample_query.max_file_size = 1024
+    sample_query.commit = remote_repo
+    expected = ingest_query(sample_query)
+
+    sample_query.local_path = tmp_path / "clone" / git_repo.name
+    sample_query.url = REMOTE_URL
+    sample_query.filter_large_blobs = True
+    sample_query.from_git_objects = from_git_objects
+    await clone_repo(sample_query.extract_clone_config())
+
+    assert ingest_query(sample_query) == expected
+    assert _missing_objects(sample_query.local_path, remote_repo) == {_git(git_repo, "rev-parse", "HEAD:big.txt")}
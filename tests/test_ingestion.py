@@ -7,14 +7,17 @@ including filtering patterns and subpaths.
 from __future__ import annotations
 
 import re
+from collections import Counter
+from pathlib import Path
 from typing import TYPE_CHECKING, TypedDict
 
 import pytest
 
-from gitingest.ingestion import ingest_query
+from gitingest.ingestion import ingest_query, stream_ingest_query
+from gitingest.utils.ingestion_utils import PathMatcher
 
 if TYPE_CHECKING:
-    from pathlib import Path
+    from pytest_mock import MockerFixture
 
     from gitingest.query_parser import IngestionQuery
 
@@ -233,3 +236,198 @@ def test_include_ignore_patterns(
     # check non-presence of non-included directories in structure
     for expected_not_structure_item in pattern_scenario["expected_not_structure"]:
         assert expected_not_structure_item not in structure
+
+
+def test_path_matcher_reuses_compiled_specs(sample_query: IngestionQuery) -> None:
+    """Test that ``PathMatcher`` compiles each distinct pattern set only once.
+
+    Given two queries with the same ignore patterns:
+    When a ``PathMatcher`` is built for each of them,
+    Then both matchers should share the same compiled ``PathSpec``.
+    """
+    first = PathMatcher.from_query(sample_query)
+    second = PathMatcher.from_query(sample_query.model_copy(deep=True))
+
+    assert first.ignore_spec is second.ignore_spec
+    assert first.include_spec is None
+    assert first.is_excluded("src/__pycache__/module.pyc")
+    assert not first.is_excluded("src/module.py")
+
+
+def test_ingest_query_symlinks_and_large_files(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test that ``ingest_query`` lists symlinks and skips files above ``max_file_size``.
+
+    Given a directory containing a symlink and a file larger than ``max_file_size``:
+    When ``ingest_query`` is invoked,
+    Then the symlink should appear in the tree and the large file should be skipped.
+    """
+    (temp_directory / "link.txt").symlink_to(temp_directory / "file1.txt")
+    (temp_directory / "large.txt").write_text("x" * 2048)
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    sample_query.max_file_size = 1024
+
+    summary, structure, content = ingest_query(sample_query)
+
+    assert "Files analyzed: 9" in summary
+    assert "link.txt -> file1.txt" in structure
+    assert "SYMLINK: link.txt -> file1.txt" in content
+    assert "large.txt" not in structure
+
+
+@pytest.mark.parametrize(
+    ("ignore_patterns", "include_patterns", "rel_dir", "expected"),
+    [
+        ({"bin/"}, None, "bin", True),
+        ({"bin/"}, None, "src/bin", True),
+        ({"bin/", "!bin/keep.txt"}, None, "bin", False),
+        (set(), {"src/**/*.py"}, "docs", True),
+        (set(), {"src/**/*.py"}, "src/subdir", False),
+        (set(), {"*/file_dir2.txt"}, "dir2", False),
+        (set(), {"*/file_dir2.txt"}, "src/subdir", True),
+        (set(), {"*.py"}, "docs", False),
+        (set(), {"**/file_dir2.txt"}, "docs", False),
+    ],
+)
+def test_path_matcher_is_pruned(
+    ignore_patterns: set[str],
+    include_patterns: set[str] | None,
+    rel_dir: str,
+    *,
+    expected: bool,
+) -> None:
+    """Test that ``PathMatcher.is_pruned`` only prunes directories whose descendants can never match."""
+    matcher = PathMatcher.compile(ignore_patterns, include_patterns)
+
+    assert matcher.is_pruned(rel_dir) is expected
+
+
+@pytest.mark.parametrize("read_workers", [1, 4])
+def test_ingest_query_read_workers(temp_directory: Path, sample_query: IngestionQuery, read_workers: int) -> None:
+    """Test that ``ingest_query`` produces the same digest whether contents are prefetched or read lazily.
+
+    Given a directory with ``.txt`` and ``.py`` files:
+    When ``ingest_query`` is invoked with one or several read workers,
+    Then the file contents should appear in ``sort_children`` order.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    sample_query.read_workers = read_workers
+
+    _, _, content = ingest_query(sample_query)
+
+    headers = re.findall(r"^FILE: (.+)$", content, re.MULTILINE)
+    assert headers == [
+        "file1.txt",
+        "file2.py",
+        "dir1/file_dir1.txt",
+        "dir2/file_dir2.txt",
+        "src/subfile1.txt",
+        "src/subfile2.py",
+        "src/subdir/file_subdir.py",
+        "src/subdir/file_subdir.txt",
+    ]
+    assert "Hello from subdir" in content
+
+
+def test_ingest_query_opens_each_file_once(
+    temp_directory: Path,
+    sample_query: IngestionQuery,
+    mocker: MockerFixture,
+) -> None:
+    """Test that ``ingest_query`` opens every file exactly once.
+
+    Given a directory with ``.txt`` and ``.py`` files, one of which uses Windows line endings:
+    When ``ingest_query`` is invoked,
+    Then each file should be opened once, and its content decoded with universal newlines.
+    """
+    (temp_directory / "file1.txt").write_bytes(b"Hello\r\nWorld\r\n")
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    open_spy = mocker.spy(Path, "open")
+
+    _, _, content = ingest_query(sample_query)
+
+    opened = Counter(call.args[0] for call in open_spy.call_args_list)
+    assert set(opened) == {path for path in temp_directory.rglob("*") if path.is_file()}
+    assert set(opened.values()) == {1}
+    assert "Hello\nWorld\n" in content
+
+
+def test_ingest_query_single_file_opens_once(
+    temp_directory: Path,
+    sample_query: IngestionQuery,
+    mocker: MockerFixture,
+) -> None:
+    """Test that ingesting a single file opens it exactly once.
+
+    Given a query pointing at a single file:
+    When ``ingest_query`` is invoked,
+    Then the file should be opened once, even though its content is used for the check, line count and digest.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/file1.txt"
+    sample_query.type = "blob"
+    open_spy = mocker.spy(Path, "open")
+
+    summary, _, content = ingest_query(sample_query)
+
+    assert open_spy.call_count == 1
+    assert "Lines: 1" in summary
+    assert "Hello World" in content
+
+
+def test_stream_ingest_query_matches_ingest_query(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test that streaming the digest produces the same output as building it in memory.
+
+    Given a directory with several files:
+    When ``stream_ingest_query`` writes the digest to a sink,
+    Then the streamed chunks should join to the tree followed by the content returned by ``ingest_query``.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+
+    summary, tree, content = ingest_query(sample_query)
+    chunks: list[str] = []
+    streamed_summary, streamed_tree = stream_ingest_query(sample_query, chunks.append)
+
+    assert streamed_summary == summary
+    assert streamed_tree == tree
+    assert "".join(chunks) == f"{tree}\n{content}"
+
+
+def test_ingest_query_tree_structure(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test the rendering of the directory structure.
+
+    Given a directory with nested files and directories and a symlink:
+    When ``ingest_query`` is invoked,
+    Then the tree should list every node in digest order, with connectors and indentation reflecting nesting.
+    """
+    (temp_directory / "link").symlink_to(temp_directory / "file1.txt")
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+
+    _, tree, _ = ingest_query(sample_query)
+
+    assert tree == (
+        "Directory structure:\n"
+        "└── test_repo/\n"
+        "    ├── file1.txt\n"
+        "    ├── file2.py\n"
+        "    ├── dir1/\n"
+        "    │   └── file_dir1.txt\n"
+        "    ├── dir2/\n"
+        "    │   └── file_dir2.txt\n"
+        "    ├── link -> file1.txt\n"
+        "    └── src/\n"
+        "        ├── subfile1.txt\n"
+        "        ├── subfile2.py\n"
+        "        └── subdir/\n"
+        "            ├── file_subdir.py\n"
+        "            └── file_subdir.txt\n"
+    )
@@ -0,0 +1,216 @@
+"""Tests for the ``mirror_cache`` module.
+
+These tests clone local repositories through the mirror cache with real ``git`` commands (the remote URLs are
+rewritten to local paths), covering incremental fetches, sparse checkouts, shared fetches, and LRU eviction.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import shutil
+import subprocess
+from typing import TYPE_CHECKING
+
+import pytest
+
+from gitingest.clone import clone_repo
+from gitingest.schemas import CloneConfig
+from gitingest.utils import mirror_cache as mirror_cache_module
+from gitingest.utils.mirror_cache import MirrorCache
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock import MockerFixture
+
+pytestmark = [
+    pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed"),
+    pytest.mark.usefixtures("repo_exists_true"),
+]
+
+REMOTE_URL = "https://github.com/owner/repo"
+OTHER_REMOTE_URL = "https://github.com/owner/other"
+
+
+def _git(cwd: Path, *args: str) -> str:
+    """Run a git command in ``cwd`` and return its output."""
+    env = {**os.environ, "GIT_AUTHOR_NAME": "a", "GIT_AUTHOR_EMAIL": "a@b", "GIT_COMMITTER_NAME": "a"}
+    env["GIT_COMMITTER_EMAIL"] = "a@b"
+    result = subprocess.run(["git", *args], cwd=cwd, env=env, check=True, capture_output=True, text=True)  # noqa: S603, S607
+    return result.stdout.strip()
+
+
+def _commit(repo: Path, files: dict[str, str]) -> str:
+    """Write ``files`` into ``repo``, commit them and return the commit SHA."""
+    for name, content in files.items():
+        (repo / name).parent.mkdir(parents=True, exist_ok=True)
+        (repo / name).write_text(content)
+    _git(repo, "add", ".")
+    _git(repo, "commit", "--quiet", "-m", "update")
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def remotes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> dict[str, Path]:
+    """Create local repositories and make git fetch them in place of ``REMOTE_URL`` and ``OTHER_REMOTE_URL``.
+
+    Returns
+    -------
+    dict[str, Path]
+        The local repository standing in for every remote URL.
+
+    """
+    repos = {}
+    for index, url in enumerate((REMOTE_URL, OTHER_REMOTE_URL)):
+        repo = tmp_path / "remotes" / url.rsplit("/", 1)[-1]
+        repo.mkdir(parents=True)
+        _git(repo, "init", "--quiet")
+        _git(repo, "config", "uploadpack.allowAnySHA1InWant", "true")
+        monkeypatch.setenv(f"GIT_CONFIG_KEY_{index}", f"url.{repo.as_uri()}.insteadOf")
+        monkeypatch.setenv(f"GIT_CONFIG_VALUE_{index}", url)
+        repos[url] = repo
+    monkeypatch.setenv("GIT_CONFIG_COUNT", str(len(repos)))
+    return repos
+
+
+@pytest.mark.asyncio
+async def test_clone_repo_through_mirror_cache(tmp_path: Path, remotes: dict[str, Path]) -> None:
+    """Test that clones are materialized from the mirror, which only fetches the commits it is missing.
+
+    Given a mirror cache and a repository with two commits:
+    When both commits are cloned, the first one twice, and then the mirror is deleted,
+    Then every clone should contain the files of its commit, and remain usable without the mirror.
+    """
+    remote = remotes[REMOTE_URL]
+    first = _commit(remote, {"README.md": "first", "src/app.py": "print(1)"})
+    second = _commit(remote, {"README.md": "second"})
+    cache = MirrorCache(tmp_path / "mirrors")
+
+    clones = {}
+    for name, commit in (("a", first), ("b", second), ("c", first)):
+        clones[name] = tmp_path / "clones" / name
+        await clone_repo(CloneConfig(url=REMOTE_URL, local_path=str(clones[name]), commit=commit), mirror_cache=cache)
+
+    mirror = cache.mirror_path(REMOTE_URL)
+    assert mirror == tmp_path / "mirrors" / "github.com" / "owner" / "repo.git"
+    assert _git(mirror, "for-each-ref", "--format=%(refname)").split() == sorted(
+        [f"refs/gitingest/{first}", f"refs/gitingest/{second}"],
+    )
+
+    shutil.rmtree(mirror)
+
+    assert (clones["a"] / "README.md").read_text() == "first"
+    assert (clones["b"] / "README.md").read_text() == "second"
+    assert (clones["c"] / "src" / "app.py").read_text() == "print(1)"
+    assert _git(clones["b"], "rev-parse", "HEAD") == second
+    assert _git(clones["b"], "config", "remote.origin.url") == REMOTE_URL
+    _git(clones["b"], "fsck", "--connectivity-only")
+
+
+@pytest.mark.asyncio
+async def test_clone_repo_through_mirror_cache_with_subpath(tmp_path: Path, remotes: dict[str, Path]) -> None:
+    """Test that a partial clone materialized from the mirror only checks out the requested subpath.
+
+    Given a repository with files inside and outside ``src/``:
+    When it is cloned through the mirror cache with ``subpath="/src"``,
+    Then the files of other directories should not be checked out.
+    """
+    commit = _commit(remotes[REMOTE_URL], {"src/app.py": "app", "docs/index.md": "docs"})
+    local_path = tmp_path / "clone"
+    config = CloneConfig(url=REMOTE_URL, local_path=str(local_path), commit=commit, subpath="/src")
+
+    await clone_repo(config, mirror_cache=MirrorCache(tmp_path / "mirrors"))
+
+    assert (local_path / "src" / "app.py").read_text() == "app"
+    assert not (local_path / "docs").exists()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_clones_share_one_fetch(
+    tmp_path: Path,
+    remotes: dict[str, Path],
+    mocker: MockerFixture,
+) -> None:
+    """Test that concurrent clones of the same repository wait for a single fetch into the mirror.
+
+    Given several clones of the same commit started at once:
+    When they all complete,
+    Then the mirror should have fetched from the remote only once.
+    """
+    commit = _commit(remotes[REMOTE_URL], {"README.md": "hello"})
+    cache = MirrorCache(tmp_path / "mirrors")
+    run_command = mocker.spy(mirror_cache_module, "run_command")
+
+    await asyncio.gather(
+        *(cache.clone(REMOTE_URL, commit, str(tmp_path / "clones" / str(index))) for index in range(3)),
+    )
+
+    fetches = [call for call in run_command.call_args_list if "fetch" in call.args]
+    assert len(fetches) == 1
+    assert all((tmp_path / "clones" / str(index) / ".git" / "shallow").exists() for index in range(3))
+
+
+@pytest.mark.asyncio
+async def test_mirror_cache_evicts_least_recently_used(tmp_path: Path, remotes: dict[str, Path]) -> None:
+    """Test that mirrors beyond the disk budget are evicted, least recently used first.
+
+    Given a mirror of one repository and a disk budget with room for only one mirror:
+    When a second repository is cloned through the cache,
+    Then the first mirror should be deleted and the second one kept.
+    """
+    cache = MirrorCache(tmp_path / "mirrors")
+    first, second = (cache.mirror_path(url) for url in remotes)
+    assert first is not None
+    assert second is not None
+
+    await cache.clone(REMOTE_URL, _commit(remotes[REMOTE_URL], {"README.md": "1"}), str(tmp_path / "clones" / "1"))
+    cache.max_bytes = sum(path.stat().st_size for path in first.rglob("*") if path.is_file()) * 3 // 2
+
+    other_commit = _commit(remotes[OTHER_REMOTE_URL], {"README.md": "2"})
+    await cache.clone(OTHER_REMOTE_URL, other_commit, str(tmp_path / "clones" / "2"))
+
+    assert not first.exists()
+    assert second.exists()
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(fcntl is None, reason="file locks require fcntl")
+async def test_mirror_cache_does_not_evict_mirrors_locked_elsewhere(tmp_path: Path, remotes: dict[str, Path]) -> None:
+    """Test that a mirror whose file lock is held, e.g. by a clone in another worker process, is not evicted.
+
+    Given a mirror locked through its lock file and a disk budget with room for only one mirror:
+    When a second repository is cloned through the cache,
+    Then the locked mirror should be kept, and evicted by the next clone once unlocked.
+    """
+    cache = MirrorCache(tmp_path / "mirrors")
+    first = cache.mirror_path(REMOTE_URL)
+    assert first is not None
+
+    await cache.clone(REMOTE_URL, _commit(remotes[REMOTE_URL], {"README.md": "1"}), str(tmp_path / "clones" / "1"))
+    cache.max_bytes = sum(path.stat().st_size for path in first.rglob("*") if path.is_file()) * 3 // 2
+
+    with (first.parent / "repo.git.lock").open("ab") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        other_commit = _commit(remotes[OTHER_REMOTE_URL], {"README.md": "2"})
+        await cache.clone(OTHER_REMOTE_URL, other_commit, str(tmp_path / "clones" / "2"))
+        assert first.exists()
+
+    await cache.clone(OTHER_REMOTE_URL, other_commit, str(tmp_path / "clones" / "3"))
+    assert not first.exists()
+
+
+def test_mirror_cache_rejects_unsafe_urls(tmp_path: Path) -> None:
+    """Test that only HTTP(S) URLs with safe path segments and full commit SHAs go through the cache."""
+    cache = MirrorCache(tmp_path)
+
+    assert cache.can_clone(REMOTE_URL, "a" * 40)
+    assert not cache.can_clone(REMOTE_URL, "abc123")
+    assert cache.mirror_path("file:///srv/repo") is None
+    assert cache.mirror_path("https://github.com/owner/..") is None
+    assert cache.mirror_path("https://github.com/repo") is None
@@ -0,0 +1,59 @@
+"""Tests for the progress events reported during an ingestion."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from gitingest.ingestion import ingest_query
+from gitingest.utils.progress import ProgressEvent, ProgressReporter, report_progress
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from gitingest.query_parser import IngestionQuery
+
+FILES_IN_TEMP_DIRECTORY = 8
+
+
+def test_report_progress_is_rate_limited_per_stage() -> None:
+    """Test that events following one of the same stage too closely are dropped, unless forced.
+
+    Given an active reporter with a long minimum interval:
+    When several events are reported per stage,
+    Then only the first event of each stage and the forced ones should be passed on.
+    """
+    events: list[ProgressEvent] = []
+    report_progress("walk", files=1)  # No active reporter: ignored
+
+    with ProgressReporter(events.append, min_interval=60).activate():
+        for files in range(1, 100):
+            report_progress("walk", files=files)
+        report_progress("walk", files=100, force=True)
+        report_progress("format", files=1)
+
+    report_progress("walk", files=101)
+
+    assert [(event.stage, event.counters) for event in events] == [
+        ("walk", {"files": 1}),
+        ("walk", {"files": 100}),
+        ("format", {"files": 1}),
+    ]
+
+
+def test_ingest_query_reports_progress(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test that ingesting a directory reports the files walked against their limits, then the files written."""
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    events: list[ProgressEvent] = []
+
+    with ProgressReporter(events.append, min_interval=0).activate():
+        ingest_query(sample_query)
+
+    walk = [event for event in events if event.stage == "walk"]
+    assert walk
+    assert walk[-1].counters["files"] == FILES_IN_TEMP_DIRECTORY
+    assert walk[-1].counters["max_files"] > 0
+    assert walk[-1].counters["max_bytes"] > 0
+    assert events[-1].stage == "format"
+    assert events[-1].counters == {"files": FILES_IN_TEMP_DIRECTORY, "total_files": FILES_IN_TEMP_DIRECTORY}
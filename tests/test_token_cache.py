@@ -0,0 +1,84 @@
+"""Tests for the ``token_cache`` module.
+
+These tests validate the persistent per-file token count cache: lookups across ingestions, LRU eviction, and the
+fallback to an empty cache when the database cannot be used.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from gitingest.ingestion import ingest_query
+from gitingest.utils.token_cache import TokenCountCache
+from gitingest.utils.token_utils import TokenCounter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import tiktoken
+    from pytest_mock import MockerFixture
+
+    from gitingest.query_parser import IngestionQuery
+
+
+def test_token_cache_only_counts_changed_files(
+    temp_directory: Path,
+    sample_query: IngestionQuery,
+    tmp_path: Path,
+    mocker: MockerFixture,
+    byte_encoding: tiktoken.Encoding,
+) -> None:
+    """Test that re-ingesting a repository only tokenizes the files that changed.
+
+    Given a directory that has been ingested once with a token count cache:
+    When one file is modified and the directory is ingested again,
+    Then only the modified file should be encoded, and the total should still be exact.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    cache = TokenCountCache(tmp_path / "cache.sqlite3")
+    ingest_query(sample_query, token_counter=TokenCounter(threads=1, cache=cache))
+
+    (temp_directory / "file1.txt").write_text("Changed content")
+    encode = mocker.spy(byte_encoding, "encode")
+    counter = TokenCounter(threads=1, cache=cache)
+    _, tree, content = ingest_query(sample_query, token_counter=counter)
+
+    encoded = [call.args[0] for call in encode.call_args_list]
+    assert len(encoded) == 1
+    assert "Changed content" in encoded[0]
+    assert counter.total == len(f"{tree}{content}".encode())
+
+
+def test_token_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    """Test that the cache keeps at most ``max_entries`` counts, evicting the least recently used ones.
+
+    Given a cache bounded to two entries holding ``a`` and ``b``:
+    When ``a`` is looked up and ``c`` is added,
+    Then ``b`` should be evicted, while ``a`` and ``c`` are kept.
+    """
+    cache = TokenCountCache(tmp_path / "cache.sqlite3", max_entries=2)
+    a, b, c = (cache.digest(text) for text in "abc")
+    cache.put_many("enc", {a: 1, b: 2})
+    cache.get_many("enc", [a])
+
+    cache.put_many("enc", {c: 3})
+
+    assert cache.get_many("enc", [a, b, c]) == {a: 1, c: 3}
+    assert cache.get_many("other", [a]) == {}
+
+
+def test_token_cache_unusable_database(tmp_path: Path) -> None:
+    """Test that a cache whose database cannot be opened behaves as an empty cache.
+
+    Given a cache whose path is a directory:
+    When counts are stored and looked up,
+    Then nothing should be raised and nothing should be found.
+    """
+    cache = TokenCountCache(tmp_path)
+    digest = cache.digest("text")
+
+    cache.put_many("enc", {digest: 1})
+
+    assert cache.get_many("enc", [digest]) == {}
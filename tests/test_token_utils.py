@@ -0,0 +1,195 @@
+"""Tests for the ``token_utils`` module.
+
+These tests validate the incremental token counter used while the digest is written, including per-file counts and
+the handling of encodings that cannot be loaded.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+import pytest
+import requests
+
+from gitingest.config import TOKEN_PROCESS_POOL_THRESHOLD
+from gitingest.ingestion import ingest_query, stream_ingest_query
+from gitingest.utils.token_utils import (
+    TokenCounter,
+    encoding_load_seconds,
+    format_token_count,
+    get_encoding,
+    warm_up_encoding,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import tiktoken
+    from pytest_mock import MockerFixture
+
+    from gitingest.query_parser import IngestionQuery
+
+
+@pytest.mark.usefixtures("byte_encoding")
+def test_token_counter_per_file_counts(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test that the digest is counted file by file.
+
+    Given a directory with several files:
+    When ``ingest_query`` is invoked with a ``TokenCounter``,
+    Then every file should get its own token count, and the counts should add up to the whole digest.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    counter = TokenCounter()
+
+    summary, tree, content = ingest_query(sample_query, token_counter=counter)
+
+    assert set(counter.file_counts) == {
+        path.relative_to(temp_directory).as_posix() for path in temp_directory.rglob("*") if path.is_file()
+    }
+    assert counter.file_counts["file1.txt"] > 0
+    assert counter.total == len(f"{tree}{content}".encode())
+    assert f"Estimated tokens: {format_token_count(counter.total)}" in summary
+
+
+@pytest.mark.usefixtures("byte_encoding")
+def test_token_counter_streaming_matches_in_memory(temp_directory: Path, sample_query: IngestionQuery) -> None:
+    """Test that streaming the digest yields the same token counts as building it in memory.
+
+    Given a directory with several files:
+    When the digest is built by ``ingest_query`` and streamed by ``stream_ingest_query``,
+    Then both counters should report the same total and per-file counts.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    in_memory, streamed = TokenCounter(), TokenCounter()
+
+    ingest_query(sample_query, token_counter=in_memory)
+    stream_ingest_query(sample_query, lambda _: None, token_counter=streamed)
+
+    assert streamed.total == in_memory.total
+    assert streamed.file_counts == in_memory.file_counts
+
+
+def test_token_counter_stops_after_failure(mocker: MockerFixture, byte_encoding: tiktoken.Encoding) -> None:
+    """Test that the counter gives up once the encoding cannot be loaded.
+
+    Given an encoding whose download fails once:
+    When several texts are counted,
+    Then the total should be ``None`` and the encoding should not be requested again.
+    """
+    get_encoding = mocker.patch("tiktoken.get_encoding", side_effect=[requests.ConnectionError(), byte_encoding])
+    counter = TokenCounter(batch_size=1)
+
+    counter.add("first")
+    counter.add("second")
+
+    assert counter.total is None
+    assert get_encoding.call_count == 1
+
+
+@pytest.mark.usefixtures("byte_encoding")
+@pytest.mark.parametrize(
+    ("threads", "process_threshold"),
+    [
+        (4, TOKEN_PROCESS_POOL_THRESHOLD),  # encode_batch on a thread pool
+        (2, 0),  # worker processes
+    ],
+)
+def test_token_counter_parallel_matches_serial(
+    temp_directory: Path,
+    sample_query: IngestionQuery,
+    threads: int,
+    process_threshold: int,
+) -> None:
+    """Test that parallel tokenization returns the same counts as the serial path.
+
+    Given a directory with several files and a tiny batch size:
+    When the digest is counted in batches on threads or worker processes,
+    Then the total and per-file counts should match those of a single-threaded counter.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    serial = TokenCounter(threads=1)
+    parallel = TokenCounter(threads=threads, batch_size=64, process_threshold=process_threshold)
+
+    ingest_query(sample_query, token_counter=serial)
+    ingest_query(sample_query, token_counter=parallel)
+
+    assert parallel.total == serial.total
+    assert parallel.file_counts == serial.file_counts
+
+
+@pytest.mark.usefixtures("byte_encoding")
+def test_token_counter_workers_shut_down_when_sink_raises(
+    temp_directory: Path,
+    sample_query: IngestionQuery,
+    mocker: MockerFixture,
+) -> None:
+    """Test that the worker processes counting tokens are shut down when writing the digest fails.
+
+    Given a counter encoding every batch in worker processes:
+    When the sink raises partway through the digest,
+    Then the error should be propagated and the worker pool shut down.
+    """
+    sample_query.local_path = temp_directory
+    sample_query.subpath = "/"
+    sample_query.type = None
+    shutdown = mocker.spy(ProcessPoolExecutor, "shutdown")
+    counter = TokenCounter(threads=2, batch_size=1, process_threshold=0)
+    chunks: list[str] = []
+
+    def sink(chunk: str) -> None:
+        chunks.append(chunk)
+        if len(chunks) > 4:  # noqa: PLR2004
+            msg = "No space left on device"
+            raise OSError(msg)
+
+    with pytest.raises(OSError, match="No space left"):
+        stream_ingest_query(sample_query, sink, token_counter=counter)
+
+    shutdown.assert_called_once()
+
+
+def test_get_encoding_loads_once(mocker: MockerFixture, byte_encoding: tiktoken.Encoding) -> None:
+    """Test that the encoding registry loads each encoding once per process.
+
+    Given an encoding that has not been loaded yet:
+    When it is pre-loaded and then requested by several token counters,
+    Then ``tiktoken`` should be asked for it only once, and the load time should be recorded.
+    """
+    tiktoken_get_encoding = mocker.patch("tiktoken.get_encoding", return_value=byte_encoding)
+
+    assert warm_up_encoding("o200k_base") is not None
+    TokenCounter(batch_size=1).add("text")
+    TokenCounter(batch_size=1).add("text")
+
+    assert get_encoding("o200k_base") is byte_encoding
+    assert tiktoken_get_encoding.call_count == 1
+    assert encoding_load_seconds("o200k_base") is not None
+
+
+def test_warm_up_encoding_failure_is_retried(mocker: MockerFixture, byte_encoding: tiktoken.Encoding) -> None:
+    """Test that a failed pre-load is reported and not cached.
+
+    Given an encoding whose download fails once:
+    When it is pre-loaded and later requested again,
+    Then the pre-load should return ``None`` and the second request should load the encoding.
+    """
+    mocker.patch("tiktoken.get_encoding", side_effect=[requests.ConnectionError(), byte_encoding])
+
+    assert warm_up_encoding("o200k_base") is None
+    assert get_encoding("o200k_base") is byte_encoding
+
+
+@pytest.mark.parametrize(
+    ("total_tokens", "expected"),
+    [(999, "999"), (1_500, "1.5k"), (2_345_678, "2.3M")],
+)
+def test_format_token_count(total_tokens: int, expected: str) -> None:
+    """Test that token counts are formatted with ``k`` and ``M`` suffixes."""
+    assert format_token_count(total_tokens) == expected